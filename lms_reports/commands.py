@@ -0,0 +1,152 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("export-lesson-logs")
+@click.option("--output", required=True, help="File to write, appended to when resuming with --after")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv")
+@click.option("--gzip", "compress", is_flag=True, default=False, help="Gzip the output")
+@click.option("--student", help="Only logs of this student")
+@click.option("--course", help="Only logs of this course")
+@click.option("--lesson", help="Only logs of this lesson")
+@click.option("--completed-only", is_flag=True, default=False)
+@click.option("--include-archived", is_flag=True, default=False, help="Also export archived logs")
+@click.option("--after", help="Resume after this log name (the cursor printed by a previous run)")
+@pass_context
+def export_lesson_logs(
+	context, output, fmt, compress, student, course, lesson, completed_only, include_archived, after
+):
+	"""Export lesson logs with watch history in constant memory"""
+	import frappe
+
+	from lms_reports.lms_reports.export import write_export
+
+	filters = {
+		"student": student,
+		"course": course,
+		"lesson": lesson,
+		"is_completed": completed_only,
+		"include_archived": include_archived,
+	}
+
+	def report(count, cursor):
+		click.echo(f"{count} logs written, cursor: {cursor}")
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		# A resumed run appends; gzip members concatenate into a valid file
+		with open(output, "ab" if after else "wb") as f:
+			count, _cursor = write_export(f, filters, fmt, compress, after, header=not after, on_chunk=report)
+		click.echo(f"Exported {count} logs to {output}")
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-lesson-logs")
+@click.option("--course", help="Only rebuild logs of this course")
+@click.option("--from-date", help="Only rebuild logs with source activity from this date")
+@click.option("--to-date", help="Only rebuild logs with source activity up to this date")
+@click.option(
+	"--partition",
+	type=click.Choice(["course", "student"]),
+	default="course",
+	help="Split the work per course or per student",
+)
+@click.option("--processes", type=int, default=4, help="Worker processes")
+@click.option("--dry-run", is_flag=True, default=False, help="Only print what would change")
+@click.option("--reset", is_flag=True, default=False, help="Ignore the checkpoint of a previous run")
+@pass_context
+def rebuild_lesson_logs(context, course, from_date, to_date, partition, processes, dry_run, reset):
+	"""Rebuild lesson logs from watch durations, quiz submissions and course progress"""
+	import json
+
+	import frappe
+
+	from lms_reports.lms_reports.rebuild import rebuild_lesson_logs as rebuild
+
+	def report(stats):
+		if stats.get("error"):
+			click.secho(f"{stats['unit']}: failed\n{stats['error']}", fg="red")
+			return
+
+		click.echo(
+			f"{stats['unit']}: {stats['created']} created, {stats['updated']} updated, "
+			f"{stats['unchanged']} unchanged"
+		)
+		if dry_run:
+			for diff in stats["diffs"]:
+				click.echo("  " + json.dumps(diff, default=str))
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		totals = rebuild(
+			site,
+			partition=partition,
+			scope={"course": course, "from_date": from_date, "to_date": to_date},
+			processes=processes,
+			dry_run=dry_run,
+			reset=reset,
+			on_result=report,
+		)
+		click.echo(
+			f"{totals['units']} {partition} units: {totals['created']} created, "
+			f"{totals['updated']} updated, {totals['unchanged']} unchanged, {totals['errors']} failed"
+		)
+	finally:
+		frappe.destroy()
+
+
+@click.command("backfill-daily-activity")
+@click.option("--from-date", required=True, help="First day to rebuild")
+@click.option("--to-date", help="Last day to rebuild, defaults to today")
+@click.option("--course", help="Only rebuild rows of this course")
+@pass_context
+def backfill_daily_activity(context, from_date, to_date, course):
+	"""Rebuild the LMS Daily Activity rollup from watch history, quizzes and completions"""
+	import frappe
+
+	from lms_reports.lms_reports.activity import backfill_daily_activity as backfill
+
+	def report(day, row_count):
+		click.echo(f"{day}: {row_count} rows")
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		backfill(from_date, to_date, course=course, on_day=report)
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-quiz-analytics")
+@click.option("--quiz", help="Only rebuild this quiz")
+@click.option("--course", help="Only rebuild quizzes of this course")
+@pass_context
+def rebuild_quiz_analytics(context, quiz, course):
+	"""Recompute LMS Quiz Analytics from quiz submissions"""
+	import frappe
+
+	from lms_reports.lms_reports.quiz_analytics import rebuild_quiz_analytics as rebuild
+
+	def report(quizzes, submissions):
+		click.echo(f"{quizzes} quizzes rebuilt from {submissions} submissions")
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		total = rebuild(quiz=quiz, course=course, on_chunk=report)
+		click.echo(f"Rebuilt analytics of {total} quizzes")
+	finally:
+		frappe.destroy()
+
+
+commands = [export_lesson_logs, rebuild_lesson_logs, backfill_daily_activity, rebuild_quiz_analytics]
@@ -1,22 +1,16 @@
 import frappe
 
+from lms_reports.lms_reports.bulk import enroll_users
+
 def enroll_admin():
     frappe.init(site="lms.localhost")
     frappe.connect()
     
-    courses = frappe.get_all("LMS Course", filters={"published": 1})
+    courses = frappe.get_all("LMS Course", filters={"published": 1}, pluck="name")
     print(f"Found {len(courses)} published courses")
     
-    for course in courses:
-        if not frappe.db.exists("LMS Enrollment", {"course": course.name, "member": "Administrator"}):
-            enrollment = frappe.new_doc("LMS Enrollment")
-            enrollment.course = course.name
-            enrollment.member = "Administrator"
-            enrollment.member_type = "Student"
-            enrollment.insert(ignore_permissions=True)
-            print(f"Enrolled Administrator in {course.name}")
-        else:
-            print(f"Administrator already enrolled in {course.name}")
+    result = enroll_users(["Administrator"], courses)
+    print(f"Enrolled Administrator in {result['enrolled']} courses, {result['skipped']} already enrolled")
             
     frappe.db.commit()
 
@@ -6,6 +6,9 @@ Automatically tracks quiz attempts and scores.
 import frappe
 from frappe.utils import flt, cint, now_datetime
 
+from lms_reports.lms_reports.archive import restore_lesson_log
+from lms_reports.lms_reports.quiz_analytics import update_quiz_analytics
+
 
 def on_quiz_submit(doc, method=None):
     """
@@ -42,6 +45,9 @@ def on_quiz_submit(doc, method=None):
             "LMS Student Lesson Log",
             {"student": student, "lesson": lesson}
         )
+        if not existing_log:
+            # A returning student continues from their archived log
+            existing_log = restore_lesson_log(student, lesson)
 
         if existing_log:
             log = frappe.get_doc("LMS Student Lesson Log", existing_log)
@@ -52,6 +58,8 @@ def on_quiz_submit(doc, method=None):
             log.chapter = chapter
             log.lesson = lesson
 
+        before = (log.quiz_attempts, log.quiz_best_score, log.quiz_passed_at_attempt)
+
         # Update quiz tracking
         log.quiz_attempts = cint(log.quiz_attempts) + 1
 
@@ -65,18 +73,13 @@ def on_quiz_submit(doc, method=None):
 
         log.last_watched_timestamp = now_datetime()
 
-        # Check if lesson is completed
-        is_completed = frappe.db.exists("LMS Course Progress", {
-            "lesson": lesson,
-            "member": student,
-            "status": "Complete"
-        })
-
-        if is_completed:
-            log.is_completed = 1
-            log.completion_percentage = 100
-
         log.save(ignore_permissions=True)
+
+        # Per-quiz aggregates, committed together with the log
+        update_quiz_analytics(
+            quiz, lesson, course, before,
+            (log.quiz_attempts, log.quiz_best_score, log.quiz_passed_at_attempt)
+        )
         frappe.db.commit()
 
     except Exception as e:
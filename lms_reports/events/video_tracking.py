@@ -6,6 +6,8 @@ Automatically tracks student activity when they watch videos or complete lessons
 import frappe
 from frappe.utils import flt, now_datetime
 
+from lms_reports.lms_reports.archive import restore_lesson_log
+
 
 def on_video_watch(doc, method=None):
     """
@@ -49,6 +51,9 @@ def on_video_watch(doc, method=None):
             "LMS Student Lesson Log",
             {"student": student, "lesson": lesson}
         )
+        if not existing_log:
+            # A returning student continues from their archived log
+            existing_log = restore_lesson_log(student, lesson)
 
         if existing_log:
             log = frappe.get_doc("LMS Student Lesson Log", existing_log)
@@ -68,14 +73,9 @@ def on_video_watch(doc, method=None):
 
         log.last_watched_timestamp = now_datetime()
 
-        # Check if lesson is completed in standard LMS
-        is_completed = frappe.db.exists("LMS Course Progress", {
-            "lesson": lesson,
-            "member": student,
-            "status": "Complete"
-        })
-
-        if is_completed:
+        # The progress row carries the completion itself; completions made
+        # elsewhere are repaired by the nightly reconciliation
+        if doc.doctype == "LMS Course Progress" and doc.status == "Complete":
             log.is_completed = 1
             log.completion_percentage = 100
 
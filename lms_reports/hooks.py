@@ -29,11 +29,11 @@ app_license = "mit"
 # app_include_js = "/assets/lms_reports/js/lms_reports.js"
 
 # include js, css files in header of web template
-web_include_css = "/assets/lms_reports/css/course_progress.css"
-web_include_js = [
-	"/assets/lms_reports/js/lms_bundle.js",
-	"/assets/lms_reports/js/lesson_locker.js"
-]
+# web_include_css = "lms_reports.bundle.css"
+# web_include_js = "lms_reports.bundle.js"
+
+# Course and lesson pages only, see lms_reports.utils.update_website_context
+update_website_context = "lms_reports.utils.update_website_context"
 
 # App-specific JS files
 # app_include_js = "/assets/lms_reports/js/course_progress_injector.js"
@@ -153,29 +153,42 @@ doc_events = {
 	},
 	"LMS Course Progress": {
 		"after_insert": "lms_reports.events.video_tracking.on_video_watch"
+	},
+	"LMS Enrollment": {
+		"on_trash": "lms_reports.lms_reports.leaderboard.remove_enrollment"
+	},
+	"Course Lesson": {
+		"on_update": "lms_reports.lesson_locker.clear_outline_cache",
+		"on_trash": "lms_reports.lesson_locker.clear_outline_cache"
 	}
 }
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"lms_reports.tasks.all"
-# 	],
-# 	"daily": [
-# 		"lms_reports.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"lms_reports.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"lms_reports.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"lms_reports.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"daily": [
+		"lms_reports.lms_reports.leaderboard.rebuild_leaderboards"
+	],
+	"weekly": [
+		"lms_reports.lms_reports.archive.archive_inactive_logs"
+	],
+	"hourly": [
+		"lms_reports.lms_reports.at_risk.scan_at_risk_learners",
+		"lms_reports.lms_reports.report.student_progress_report.student_progress_report.refresh_stale_prepared_reports"
+	],
+	"cron": {
+		"* * * * *": [
+			"lms_reports.lms_reports.realtime.publish_deferred_updates"
+		],
+		"30 1 * * *": [
+			"lms_reports.lms_reports.reconcile.reconcile_lesson_completion"
+		],
+		"0 3 * * *": [
+			"lms_reports.lms_reports.watch_history.compact_watch_history"
+		]
+	},
+}
 
 # Testing
 # -------
@@ -3,8 +3,23 @@ Lesson Unlock Logic
 Prevents students from accessing next lessons until previous lessons are completed
 """
 
+import base64
+import hashlib
+
 import frappe
 from frappe import _
+from frappe.utils import flt
+
+from lms_reports.lms_reports.archive import ARCHIVE_DOCTYPE, get_archive_horizon
+from lms_reports.progress_tracker import DEFAULT_PASSING_PERCENTAGE, get_progress_weighting
+
+# Per-lesson flags returned by `get_course_lesson_lock_bits`, 4 bits per lesson
+LESSON_UNLOCKED = 1
+LESSON_COMPLETED = 2
+LESSON_VIDEO_DONE = 4
+LESSON_QUIZ_DONE = 8
+
+OUTLINE_CACHE_KEY = "lms_reports:lesson_outline"
 
 
 @frappe.whitelist()
@@ -13,7 +28,7 @@ def check_lesson_access(lesson, course=None, member=None):
 	Check if student can access this lesson
 
 	Rules:
-	1. Must complete previous lesson (video 95%+ watched)
+	1. Must complete previous lesson (video watched up to the course's watched threshold)
 	2. If previous lesson has quiz, must pass quiz (>= passing %)
 	3. Instructors can always access
 
@@ -69,7 +84,7 @@ def check_lesson_access(lesson, course=None, member=None):
 
 	# Check if previous lesson is completed
 	previous_lesson = all_lessons[current_idx - 1]
-	previous_status = get_lesson_completion_status(previous_lesson.name, member)
+	previous_status = get_lessons_completion_status([previous_lesson], member, course)[previous_lesson.name]
 
 	if not previous_status['is_completed']:
 		return {
@@ -92,7 +107,7 @@ def get_lesson_completion_status(lesson, member):
 	Check if lesson is completed
 
 	Completion criteria:
-	- Video: 95%+ watched OR marked as complete
+	- Video: watched up to the course's watched threshold OR marked as complete
 	- Quiz: If quiz exists, must pass (score >= passing_percentage)
 
 	Returns:
@@ -103,68 +118,128 @@ def get_lesson_completion_status(lesson, member):
 			'missing': list  # What's missing to complete
 		}
 	"""
-	missing = []
+	lesson_doc = frappe.db.get_value("Course Lesson", lesson, ["name", "quiz_id", "course"], as_dict=True)
+	if not lesson_doc:
+		frappe.throw(_("Lesson {0} not found").format(lesson), frappe.DoesNotExistError)
 
-	# Check video progress
-	video_progress = frappe.db.get_value(
-		"LMS Student Lesson Log",
-		{
-			"lesson": lesson,
-			"student": member
-		},
-		["completion_percentage", "is_completed"],
-		as_dict=True
-	)
+	return get_lessons_completion_status([lesson_doc], member, lesson_doc.course)[lesson]
 
-	video_completed = False
-	if video_progress:
-		completion = video_progress.get('completion_percentage', 0)
-		video_completed = completion >= 95 or video_progress.get('is_completed')
 
-	if not video_completed:
-		missing.append('Watch video to 95%+')
+def get_lessons_completion_status(lessons, member, course):
+	"""
+	Bulk version of `get_lesson_completion_status`
 
-	# Check quiz (if exists)
-	lesson_doc = frappe.get_doc("Course Lesson", lesson)
-	quiz_completed = None
+	Fetches lesson logs, quiz passing percentages and latest quiz submissions
+	for all given lessons in three queries instead of several per lesson.
+
+	Args:
+		lessons: list of dicts with 'name' and 'quiz_id'
+		member: Student email
+		course: LMS Course of the lessons, for its watched threshold
+
+	Returns:
+		dict: {lesson-name: completion status dict}
+	"""
+	return get_members_lessons_completion_status(lessons, [member], course)[member]
 
-	if lesson_doc.quiz_id:
-		# Quiz exists, must pass it
-		passing_percentage = frappe.db.get_value(
+
+def get_members_lessons_completion_status(lessons, members, course):
+	"""
+	Version of `get_lessons_completion_status` for several members, with the
+	same number of queries
+
+	Returns:
+		dict: {member: {lesson-name: completion status dict}}
+	"""
+	lesson_names = [l.name for l in lessons]
+	quiz_ids = list({l.quiz_id for l in lessons if l.quiz_id})
+	watched_threshold = flt(get_progress_weighting(course).watched_threshold)
+
+	video_progress_map = {}
+	if lesson_names and members:
+		for log in frappe.get_all(
+			"LMS Student Lesson Log",
+			filters={"student": ["in", members], "lesson": ["in", lesson_names]},
+			fields=["student", "lesson", "completion_percentage", "is_completed"]
+		):
+			video_progress_map[(log.student, log.lesson)] = log
+
+		# Logs of a returning student may still be in the cold archive
+		missing = {
+			(member, name) for member in members for name in lesson_names
+			if (member, name) not in video_progress_map
+		}
+		if missing and get_archive_horizon():
+			for log in frappe.get_all(
+				ARCHIVE_DOCTYPE,
+				filters={
+					"student": ["in", list({member for member, _name in missing})],
+					"lesson": ["in", list({name for _member, name in missing})]
+				},
+				fields=["student", "lesson", "completion_percentage", "is_completed"]
+			):
+				if (log.student, log.lesson) in missing:
+					video_progress_map[(log.student, log.lesson)] = log
+
+	passing_map = {}
+	latest_score_map = {}
+	if quiz_ids and members:
+		passing_map = dict(frappe.get_all(
 			"LMS Quiz",
-			lesson_doc.quiz_id,
-			"passing_percentage"
-		) or 70
+			filters={"name": ["in", quiz_ids]},
+			fields=["name", "passing_percentage"],
+			as_list=True
+		))
 
-		quiz_result = frappe.db.get_value(
+		# Newest first, so the first row seen per quiz is the latest attempt
+		for submission in frappe.get_all(
 			"LMS Quiz Submission",
-			{
-				"quiz": lesson_doc.quiz_id,
-				"member": member
-			},
-			["percentage", "score"],
-			as_dict=True,
+			filters={"quiz": ["in", quiz_ids], "member": ["in", members]},
+			fields=["member", "quiz", "percentage"],
 			order_by="creation desc"
-		)
+		):
+			latest_score_map.setdefault((submission.member, submission.quiz), submission.percentage or 0)
 
-		if quiz_result:
-			quiz_score = quiz_result.get('percentage', 0)
-			quiz_completed = quiz_score >= passing_percentage
-		else:
-			quiz_completed = False
-
-		if not quiz_completed:
-			missing.append(f'Pass quiz ({passing_percentage}%+)')
-
-	# Lesson is completed if video is done AND quiz is done (if quiz exists)
-	is_completed = video_completed and (quiz_completed if lesson_doc.quiz_id else True)
+	result = {}
+	for member in members:
+		result[member] = {}
+		for lesson in lessons:
+			missing = []
+
+			# Check video progress
+			video_progress = video_progress_map.get((member, lesson.name))
+			video_completed = False
+			if video_progress:
+				completion = video_progress.get('completion_percentage') or 0
+				video_completed = completion >= watched_threshold or bool(video_progress.get('is_completed'))
+
+			if not video_completed:
+				missing.append(f'Watch video to {watched_threshold:g}%+')
+
+			# Check quiz (if exists)
+			quiz_completed = None
+			if lesson.quiz_id:
+				passing_percentage = passing_map.get(lesson.quiz_id) or DEFAULT_PASSING_PERCENTAGE
+
+				if (member, lesson.quiz_id) in latest_score_map:
+					quiz_completed = latest_score_map[(member, lesson.quiz_id)] >= passing_percentage
+				else:
+					quiz_completed = False
+
+				if not quiz_completed:
+					missing.append(f'Pass quiz ({passing_percentage}%+)')
+
+			# Lesson is completed if video is done AND quiz is done (if quiz exists)
+			is_completed = video_completed and (quiz_completed if lesson.quiz_id else True)
+
+			result[member][lesson.name] = {
+				'is_completed': is_completed,
+				'video_completed': video_completed,
+				'quiz_completed': quiz_completed,
+				'missing': missing
+			}
 
-	return {
-		'is_completed': is_completed,
-		'video_completed': video_completed,
-		'quiz_completed': quiz_completed,
-		'missing': missing
-	}
+	return result
 
 
 def is_instructor(course, member):
@@ -172,33 +247,123 @@ def is_instructor(course, member):
 	if not course or not member:
 		return False
 
-	# Check if user has instructor role
-	has_role = frappe.db.exists(
+	return member in get_instructors(course, [member])
+
+
+def get_instructors(course, members):
+	"""
+	Members who get instructor access to a course: users with an instructor
+	role who teach it, and System Managers
+
+	Returns:
+		set of members
+	"""
+	with_role = set(frappe.get_all(
 		"Has Role",
-		{
-			"parent": member,
+		filters={
+			"parent": ["in", members],
 			"role": ["in", ["Course Creator", "Moderator", "System Manager"]]
+		},
+		pluck="parent"
+	))
+	if not with_role:
+		return set()
+
+	teaching = set(frappe.get_all(
+		"LMS Course Instructor",
+		filters={"parent": course, "instructor": ["in", list(with_role)]},
+		pluck="instructor"
+	))
+
+	# System Manager can access all
+	return teaching | {
+		member for member in with_role - teaching
+		if "System Manager" in frappe.get_roles(member)
+	}
+
+
+def get_course_outline(course):
+	"""
+	Get the lessons of a course in outline order, with a version hash
+
+	Cached per course and cleared when a Course Lesson changes.
+
+	Returns:
+		dict: {
+			'version': str,  # changes whenever the outline changes
+			'lessons': list  # dicts with name, title, idx, quiz_id
 		}
+	"""
+	outline = frappe.cache().hget(OUTLINE_CACHE_KEY, course)
+	if outline:
+		return outline
+
+	lessons = frappe.get_all(
+		"Course Lesson",
+		filters={"course": course},
+		fields=["name", "title", "idx", "quiz_id"],
+		order_by="idx asc"
 	)
 
-	if has_role:
-		# Check if they're assigned to this course
-		is_course_instructor = frappe.db.exists(
-			"LMS Course Instructor",
-			{
-				"parent": course,
-				"instructor": member
-			}
-		)
+	signature = "\n".join(f"{l.name}:{l.quiz_id or ''}" for l in lessons)
+	outline = {
+		'version': hashlib.md5(signature.encode()).hexdigest()[:12],
+		'lessons': lessons
+	}
+	frappe.cache().hset(OUTLINE_CACHE_KEY, course, outline)
+	return outline
 
-		if is_course_instructor:
-			return True
 
-		# System Manager can access all
-		if "System Manager" in frappe.get_roles(member):
-			return True
+def clear_outline_cache(doc, method=None):
+	"""Clear the cached outline when a Course Lesson is changed or deleted"""
+	if doc.get("course"):
+		frappe.cache().hdel(OUTLINE_CACHE_KEY, doc.course)
 
-	return False
+
+def get_outline_access(course, member):
+	"""
+	Evaluate access for every lesson of a course in outline order
+
+	Follows the same rules as `check_lesson_access`, but evaluates the whole
+	outline with a fixed number of queries.
+
+	Returns:
+		tuple: (outline dict, list of (lesson, can_access, reason, completion))
+	"""
+	outline, access = get_members_outline_access(course, [member])
+	return outline, access[member]
+
+
+def get_members_outline_access(course, members):
+	"""
+	Version of `get_outline_access` for several members, with the same
+	number of queries
+
+	Returns:
+		tuple: (outline dict, {member: list of (lesson, can_access, reason, completion)})
+	"""
+	outline = get_course_outline(course)
+	lessons = [frappe._dict(l) for l in outline['lessons']]
+
+	statuses = get_members_lessons_completion_status(lessons, members, course)
+	instructors = get_instructors(course, members)
+
+	access = {}
+	for member in members:
+		rows = access[member] = []
+		for i, lesson in enumerate(lessons):
+			if member in instructors:
+				can_access, reason = True, 'Instructor access'
+			elif i == 0:
+				can_access, reason = True, 'First lesson'
+			elif not statuses[member][lessons[i - 1].name]['is_completed']:
+				can_access, reason = False, _('You must complete the previous lesson first')
+			else:
+				can_access, reason = True, 'All requirements met'
+
+			rows.append((lesson, can_access, reason, statuses[member][lesson.name]))
+
+	return outline, access
 
 
 @frappe.whitelist()
@@ -218,25 +383,88 @@ def get_course_lesson_lock_status(course, member=None):
 	if not member:
 		member = frappe.session.user
 
-	# Get all lessons
-	lessons = frappe.get_all(
-		"Course Lesson",
-		filters={"course": course},
-		fields=["name", "title", "idx"],
-		order_by="idx asc"
-	)
+	_outline, rows = get_outline_access(course, member)
 
 	result = {}
-	for lesson in lessons:
-		access_check = check_lesson_access(lesson.name, course, member)
-		completion = get_lesson_completion_status(lesson.name, member)
-
+	previous = None
+	for lesson, can_access, reason, completion in rows:
 		result[lesson.name] = {
-			'can_access': access_check['can_access'],
-			'reason': access_check.get('reason', ''),
+			'can_access': can_access,
+			'reason': reason,
 			'is_completed': completion['is_completed'],
 			'video_completed': completion['video_completed'],
 			'quiz_completed': completion['quiz_completed']
 		}
 
+		if not can_access and previous:
+			result[lesson.name]['previous_lesson'] = previous.name
+			result[lesson.name]['previous_lesson_title'] = previous.title
+
+		previous = lesson
+
 	return result
+
+
+@frappe.whitelist()
+def get_course_lesson_lock_bits(course, version=None, member=None):
+	"""
+	Compact lock status for all lessons in a course
+
+	Each lesson gets 4 flag bits (unlocked, completed, video done, quiz done),
+	packed two lessons per byte in outline order and base64 encoded. Reasons
+	are left out; fetch them with `check_lesson_access` for a clicked lesson.
+
+	Args:
+		course: Course name
+		version: Outline version the client already has cached
+		member: Student email (defaults to current user)
+
+	Returns:
+		dict: {
+			'version': str,
+			'flags': str,
+			'lessons': list  # lesson names, only if `version` is outdated
+		}
+	"""
+	if not member:
+		member = frappe.session.user
+
+	outline, rows = get_outline_access(course, member)
+
+	flags = []
+	for _lesson, can_access, _reason, completion in rows:
+		value = 0
+		if can_access:
+			value |= LESSON_UNLOCKED
+		if completion['is_completed']:
+			value |= LESSON_COMPLETED
+		if completion['video_completed']:
+			value |= LESSON_VIDEO_DONE
+		if completion['quiz_completed']:
+			value |= LESSON_QUIZ_DONE
+		flags.append(value)
+
+	result = {
+		'version': outline['version'],
+		'flags': pack_lesson_flags(flags)
+	}
+
+	if version != outline['version']:
+		result['lessons'] = [lesson.name for lesson, *_rest in rows]
+
+	return result
+
+
+def pack_lesson_flags(flags):
+	"""Pack 4-bit lesson flags two per byte (low nibble first) as base64"""
+	packed = bytearray((len(flags) + 1) // 2)
+	for i, value in enumerate(flags):
+		packed[i // 2] |= (value & 0x0F) << (4 * (i % 2))
+
+	return base64.b64encode(bytes(packed)).decode()
+
+
+def unpack_lesson_flags(encoded, count):
+	"""Inverse of `pack_lesson_flags`"""
+	packed = base64.b64decode(encoded)
+	return [(packed[i // 2] >> (4 * (i % 2))) & 0x0F for i in range(count)]
@@ -0,0 +1,353 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Daily activity rollup for trend charts.
+
+LMS Daily Activity holds one row per (date, course, lesson) with active
+students, watched seconds, completions and quiz attempts, plus a course total
+row (empty lesson) that counts each active student of the course once.
+
+Rows are maintained incrementally: every saved lesson log adds its deltas with
+an upsert in the same transaction, so trend charts read only the rollup.
+`backfill_daily_activity` rebuilds days from watch history, quiz submissions
+and course progress, one day per chunk.
+"""
+
+import hashlib
+
+import frappe
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import add_days, cint, flt, get_datetime, getdate, now_datetime, today
+from pypika.terms import Case, Values
+
+ROLLUP_DOCTYPE = "LMS Daily Activity"
+LOG_DOCTYPE = "LMS Student Lesson Log"
+HISTORY_DOCTYPE = "LMS Watch History"
+
+# Lesson of the course total rows
+COURSE_TOTAL = ""
+
+METRIC_FIELDS = ["active_students", "watch_seconds", "completions", "quiz_attempts"]
+
+DEFAULT_TREND_DAYS = 90
+MAX_TREND_DAYS = 366
+
+
+def get_rollup_name(activity_date, course, lesson):
+	key = f"{activity_date}|{course}|{lesson}"
+	return hashlib.md5(key.encode()).hexdigest()
+
+
+def get_segment_seconds(row):
+	"""Seconds of video covered by a history row (positions, not wall time)"""
+	return max(flt(row.get("end_time")) - flt(row.get("start_time")), 0)
+
+
+def get_log_activity(doc, before):
+	"""
+	Deltas a lesson log save adds to its day
+
+	Args:
+		doc: the saved LMS Student Lesson Log
+		before: the log as it was before the save, or None for a new log
+
+	Returns:
+		dict with `activity_date` and the metric deltas, or None if the save
+		recorded no activity (e.g. an admin edit)
+	"""
+	if not doc.last_watched_timestamp:
+		return None
+
+	last_active = before and before.last_watched_timestamp
+	if last_active and get_datetime(last_active) == get_datetime(doc.last_watched_timestamp):
+		return None
+
+	activity_date = getdate(doc.last_watched_timestamp)
+	known_rows = {row.name for row in before.watch_history} if before else set()
+	watch_seconds = sum(get_segment_seconds(row) for row in doc.watch_history if row.name not in known_rows)
+
+	delta = {
+		"activity_date": activity_date,
+		"active_students": int(not last_active or getdate(last_active) != activity_date),
+		"watch_seconds": flt(watch_seconds, 3),
+		"completions": int(cint(doc.is_completed) and not (before and cint(before.is_completed))),
+		"quiz_attempts": max(cint(doc.quiz_attempts) - cint(before and before.quiz_attempts), 0),
+	}
+	return delta if any(delta[field] for field in METRIC_FIELDS) else None
+
+
+def update_daily_activity(doc):
+	"""
+	Add the activity of a saved lesson log to the rollup, called from its on_update
+
+	Args:
+		doc: LMS Student Lesson Log document
+	"""
+	delta = get_log_activity(doc, doc.get_doc_before_save())
+	if not delta:
+		return
+
+	course_delta = dict(delta)
+	if delta["active_students"] and is_active_in_course(doc, delta["activity_date"]):
+		# Already counted in the course total through another lesson
+		course_delta["active_students"] = 0
+
+	add_activity(
+		[
+			{**delta, "course": doc.course, "lesson": doc.lesson},
+			{**course_delta, "course": doc.course, "lesson": COURSE_TOTAL},
+		]
+	)
+
+
+def is_active_in_course(doc, activity_date):
+	"""
+	Whether the student has another lesson log of the course active on that day
+
+	This is a plain read, not a locking one: when two lessons of one course
+	are saved for the same student in concurrent transactions, neither sees
+	the other and the student is counted twice in that day's course total.
+	A student's tracking requests come from one player and rarely overlap,
+	and `backfill_daily_activity` recounts a day exactly. Locking the other
+	logs instead would deadlock those same two saves, each holding its own
+	log row.
+	"""
+	return bool(
+		frappe.db.exists(
+			LOG_DOCTYPE,
+			{
+				"student": doc.student,
+				"course": doc.course,
+				"name": ["!=", doc.name],
+				"last_watched_timestamp": [">=", activity_date],
+			},
+		)
+	)
+
+
+def add_activity(rows, replace=False):
+	"""
+	Upsert rollup rows in one query
+
+	Args:
+		rows: dicts with activity_date, course, lesson and metric values
+		replace: overwrite the metrics instead of adding to them (backfill)
+	"""
+	if not rows:
+		return
+
+	Activity = frappe.qb.DocType(ROLLUP_DOCTYPE)
+	now = now_datetime()
+	user = frappe.session.user
+
+	query = frappe.qb.into(Activity).columns(
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"docstatus",
+		"idx",
+		"activity_date",
+		"course",
+		"lesson",
+		*METRIC_FIELDS,
+	)
+	for row in rows:
+		query = query.insert(
+			get_rollup_name(row["activity_date"], row["course"], row["lesson"]),
+			now,
+			now,
+			user,
+			user,
+			0,
+			0,
+			row["activity_date"],
+			row["course"],
+			row["lesson"],
+			*(row.get(field) or 0 for field in METRIC_FIELDS),
+		)
+
+	for field in METRIC_FIELDS:
+		value = Values(Activity[field]) if replace else Activity[field] + Values(Activity[field])
+		query = query.on_duplicate_key_update(Activity[field], value)
+	query = query.on_duplicate_key_update(Activity.modified, Values(Activity.modified))
+
+	query.run()
+
+
+def get_day_activity(day, course=None):
+	"""
+	Rebuild the rollup rows of one day from the source tables
+
+	Active students are the (student, lesson) pairs with watch history, a quiz
+	submission or a completion on that day.
+
+	Args:
+		day: date to rebuild
+		course: only this course
+
+	Returns:
+		list of rollup row dicts, course totals included
+	"""
+	start, end = getdate(day), add_days(getdate(day), 1)
+	rows = {}
+	active = set()
+
+	def get_row(course, lesson):
+		return rows.setdefault(
+			(course, lesson),
+			{
+				"activity_date": start,
+				"course": course,
+				"lesson": lesson,
+				**{field: 0 for field in METRIC_FIELDS},
+			},
+		)
+
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+	History = frappe.qb.DocType(HISTORY_DOCTYPE)
+	seconds = (
+		Case().when(History.end_time > History.start_time, History.end_time - History.start_time).else_(0)
+	)
+	query = (
+		frappe.qb.from_(History)
+		.join(Log)
+		.on(History.parent == Log.name)
+		.select(Log.student, Log.course, Log.lesson, Sum(seconds).as_("watch_seconds"))
+		.where(History.parenttype == LOG_DOCTYPE)
+		.where((History.watched_at >= start) & (History.watched_at < end))
+		.groupby(Log.student, Log.course, Log.lesson)
+	)
+	if course:
+		query = query.where(Log.course == course)
+
+	for student, log_course, lesson, watch_seconds in query.run():
+		get_row(log_course, lesson)["watch_seconds"] += flt(watch_seconds, 3)
+		active.add((student, log_course, lesson))
+
+	Submission = frappe.qb.DocType("LMS Quiz Submission")
+	Quiz = frappe.qb.DocType("LMS Quiz")
+	Lesson = frappe.qb.DocType("Course Lesson")
+	query = (
+		frappe.qb.from_(Submission)
+		.join(Quiz)
+		.on(Submission.quiz == Quiz.name)
+		.join(Lesson)
+		.on(Quiz.lesson == Lesson.name)
+		.select(Submission.member, Lesson.course, Lesson.name, Count("*"))
+		.where((Submission.creation >= start) & (Submission.creation < end))
+		.groupby(Submission.member, Lesson.course, Lesson.name)
+	)
+	if course:
+		query = query.where(Lesson.course == course)
+
+	for student, lesson_course, lesson, attempts in query.run():
+		get_row(lesson_course, lesson)["quiz_attempts"] += cint(attempts)
+		active.add((student, lesson_course, lesson))
+
+	Progress = frappe.qb.DocType("LMS Course Progress")
+	query = (
+		frappe.qb.from_(Progress)
+		.select(Progress.member, Progress.course, Progress.lesson)
+		.where(Progress.status == "Complete")
+		.where((Progress.creation >= start) & (Progress.creation < end))
+	)
+	if course:
+		query = query.where(Progress.course == course)
+
+	for student, progress_course, lesson in query.run():
+		get_row(progress_course, lesson)["completions"] += 1
+		active.add((student, progress_course, lesson))
+
+	course_students = set()
+	for student, active_course, lesson in active:
+		get_row(active_course, lesson)["active_students"] += 1
+		course_students.add((student, active_course))
+
+	for key in list(rows):
+		total = get_row(key[0], COURSE_TOTAL)
+		for field in ("watch_seconds", "completions", "quiz_attempts"):
+			total[field] += rows[key][field]
+
+	for _student, active_course in course_students:
+		get_row(active_course, COURSE_TOTAL)["active_students"] += 1
+
+	return list(rows.values())
+
+
+def backfill_daily_activity(from_date, to_date=None, course=None, on_day=None):
+	"""
+	Rebuild the rollup for a date range, one day per query batch and commit
+
+	Rows of a rebuilt day that no longer have any activity are removed.
+	Watch history already moved to LMS Watch History Archive is not counted.
+
+	Args:
+		from_date: first day to rebuild
+		to_date: last day to rebuild, defaults to today
+		course: only this course
+		on_day: callback(day, row_count) after each committed day
+	"""
+	day = getdate(from_date)
+	last_day = getdate(to_date or today())
+
+	while day <= last_day:
+		filters = {"activity_date": day}
+		if course:
+			filters["course"] = course
+
+		frappe.db.delete(ROLLUP_DOCTYPE, filters)
+		rows = get_day_activity(day, course)
+		add_activity(rows, replace=True)
+		frappe.db.commit()
+
+		if on_day:
+			on_day(day, len(rows))
+		day = add_days(day, 1)
+
+
+@frappe.whitelist()
+def get_activity_trend(course=None, lesson=None, days=DEFAULT_TREND_DAYS, to_date=None):
+	"""
+	Daily activity trend for charts, read from the rollup only
+
+	Args:
+		course: LMS Course; without it, course totals of all courses are summed
+			(a student active in two courses counts twice)
+		lesson: Course Lesson of the course, defaults to the course total
+		days: number of days up to `to_date`
+		to_date: last day, defaults to today
+
+	Returns:
+		dict with `labels` (dates) and one list per metric, zero-filled
+	"""
+	frappe.has_permission(ROLLUP_DOCTYPE, "read", throw=True)
+
+	days = min(max(cint(days) or DEFAULT_TREND_DAYS, 1), MAX_TREND_DAYS)
+	last_day = getdate(to_date or today())
+	first_day = add_days(last_day, -(days - 1))
+
+	Activity = frappe.qb.DocType(ROLLUP_DOCTYPE)
+	query = (
+		frappe.qb.from_(Activity)
+		.select(Activity.activity_date, *(Sum(Activity[field]).as_(field) for field in METRIC_FIELDS))
+		.where(Activity.lesson == ((course and lesson) or COURSE_TOTAL))
+		.where(Activity.activity_date[first_day:last_day])
+		.groupby(Activity.activity_date)
+	)
+	if course:
+		query = query.where(Activity.course == course)
+
+	by_date = {getdate(row.activity_date): row for row in query.run(as_dict=True)}
+
+	trend = {"labels": [], **{field: [] for field in METRIC_FIELDS}}
+	for offset in range(days):
+		day = add_days(first_day, offset)
+		row = by_date.get(day) or {}
+		trend["labels"].append(str(day))
+		for field in METRIC_FIELDS:
+			trend[field].append(flt(row.get(field), 2))
+
+	return trend
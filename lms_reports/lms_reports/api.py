@@ -1,10 +1,25 @@
 # Copyright (c) 2026, LMS Reports and contributors
 # For license information, please see license.txt
 
+import base64
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, flt, cint
+from frappe.query_builder import Order
+from frappe.utils import add_days, cint, flt, getdate, now_datetime
 from lms.lms.doctype.course_lesson.course_lesson import save_progress
+from lms_reports.lms_reports.archive import ARCHIVE_DOCTYPE, restore_lesson_log, should_include_archive
+from lms_reports.lms_reports.coverage import (
+    add_segment,
+    count_seconds,
+    decode_coverage,
+    encode_coverage,
+    get_coverage_percentage,
+    get_heartbeat_span,
+)
+from lms_reports.lms_reports.quiz_analytics import update_quiz_analytics
+from lms_reports.lms_reports.realtime import get_course_row
 
 
 @frappe.whitelist(allow_guest=True)
@@ -78,33 +93,150 @@ def track_lesson_watch(course, video_speed="1x", watched_duration=0,
     if not lesson:
         frappe.throw(_("Lesson not found"))
     
-    # Check if log exists
+    doc = get_lesson_log(student, course, lesson)
+    apply_watch_event(doc, video_speed, watched_duration, video_total_duration, start_time, end_time)
+    doc.save(ignore_permissions=True)
+
+    sync_lms_completion(doc, student, lesson, course)
+
+    return {
+        "success": True,
+        "completion_percentage": doc.completion_percentage,
+        "is_completed": doc.is_completed
+    }
+
+
+@frappe.whitelist(methods=["POST"])
+def track_lesson_watch_batch(events):
+    """
+    Track a batch of buffered watch events in a single request.
+    Used by the frontend event queue, including `navigator.sendBeacon` flushes
+    on page hide, so the final position is not lost when the tab is closed.
+
+    Events are grouped by lesson so each LMS Student Lesson Log is loaded and
+    saved once per batch, with one watch history row per event.
+
+    Args:
+        events: List (or JSON string) of dicts with the same keys as
+            `track_lesson_watch` arguments
+    """
+    student = frappe.session.user
+
+    if student == "Guest":
+        frappe.throw(_("Please login to track progress"))
+
+    if isinstance(events, str):
+        events = json.loads(events)
+
+    # Group events by lesson, keeping their original order
+    grouped = {}
+    resolved_numbers = {}
+    for event in events or []:
+        course = event.get("course")
+        lesson = event.get("lesson")
+        lesson_number = event.get("lesson_number")
+
+        if not lesson and lesson_number:
+            key = (course, lesson_number)
+            if key not in resolved_numbers:
+                resolved_numbers[key] = get_lesson_from_number(course, lesson_number).get("lesson")
+            lesson = resolved_numbers[key]
+
+        if not course or not lesson:
+            continue
+
+        grouped.setdefault((course, lesson), []).append(event)
+
+    results = {}
+    for i, ((course, lesson), lesson_events) in enumerate(grouped.items()):
+        # Each lesson is written under its own savepoint, so a lesson that
+        # fails halfway does not leave rows behind in the batch's commit
+        save_point = f"watch_batch_{i}"
+        frappe.db.savepoint(save_point)
+        try:
+            doc = get_lesson_log(student, course, lesson)
+            for event in lesson_events:
+                apply_watch_event(
+                    doc,
+                    event.get("video_speed") or "1x",
+                    event.get("watched_duration"),
+                    event.get("video_total_duration"),
+                    event.get("start_time"),
+                    event.get("end_time")
+                )
+            doc.save(ignore_permissions=True)
+            sync_lms_completion(doc, student, lesson, course)
+
+            results[lesson] = {
+                "completion_percentage": doc.completion_percentage,
+                "is_completed": doc.is_completed
+            }
+        except Exception:
+            # Drop the failing lesson instead of the whole batch, otherwise
+            # the client would keep retrying the same events forever
+            frappe.db.rollback(save_point=save_point)
+            frappe.log_error(f"Failed to track watch batch for {lesson}", "LMS Reports - Video Tracking")
+
+    return {
+        "success": True,
+        "processed": sum(len(e) for e in grouped.values()),
+        "lessons": results
+    }
+
+
+def get_lesson_log(student, course, lesson):
+    """Get the student's LMS Student Lesson Log for a lesson, or a new unsaved one."""
     existing_log = frappe.db.exists(
         "LMS Student Lesson Log",
         {"student": student, "lesson": lesson}
     )
     
-    chapter = frappe.db.get_value("Course Lesson", lesson, "chapter")
-    
+    if not existing_log:
+        # A returning student continues from their archived log
+        existing_log = restore_lesson_log(student, lesson)
+
     if existing_log:
-        doc = frappe.get_doc("LMS Student Lesson Log", existing_log)
-    else:
-        doc = frappe.new_doc("LMS Student Lesson Log")
-        doc.student = student
-        doc.course = course
-        doc.chapter = chapter
-        doc.lesson = lesson
+        return frappe.get_doc("LMS Student Lesson Log", existing_log)
 
+    doc = frappe.new_doc("LMS Student Lesson Log")
+    doc.student = student
+    doc.course = course
+    doc.chapter = frappe.db.get_value("Course Lesson", lesson, "chapter")
+    doc.lesson = lesson
+    return doc
+
+
+def apply_watch_event(doc, video_speed, watched_duration, video_total_duration, start_time, end_time):
+    """Apply a single watch event to a lesson log and append its history row."""
+    previous_position = flt(doc.watched_duration)
     doc.video_speed = video_speed
     # Use max of current watched and new position (don't keep adding)
     doc.watched_duration = max(flt(doc.watched_duration), flt(watched_duration))
     doc.video_total_duration = flt(video_total_duration)
     doc.last_watched_timestamp = now_datetime()
     
-    # Calculate video completion percentage
+    # Merge the watched segment into the coverage bitmap. Older clients only
+    # send the position: the part played since the previous position counts
+    # when one heartbeat could have covered it, a longer jump is a seek
+    segment_start, counted = start_time, True
+    position_only = not flt(end_time)
+    if position_only:
+        end_time = watched_duration
+        segment_start = max(flt(start_time), previous_position)
+        counted = flt(end_time) - segment_start <= get_heartbeat_span(video_speed)
+    coverage = decode_coverage(doc.watched_coverage)
+    if counted and add_segment(coverage, segment_start, end_time, video_total_duration):
+        doc.watched_coverage = encode_coverage(coverage)
+    doc.watched_seconds = count_seconds(coverage)
+
+    # Calculate video completion percentage from the seconds actually watched
     if flt(video_total_duration) > 0:
-        completion = min(100, (doc.watched_duration / video_total_duration) * 100)
-        doc.completion_percentage = completion
+        completion = get_coverage_percentage(coverage, video_total_duration)
+        if position_only:
+            # Position-only clients can't tell a seek from playback, so they
+            # keep being credited by position as before coverage tracking
+            completion = max(completion, min(100, doc.watched_duration * 100 / flt(video_total_duration)))
+        doc.completion_percentage = max(flt(doc.completion_percentage), completion)
 
     # Add watch history entry
     doc.append("watch_history", {
@@ -114,22 +246,29 @@ def track_lesson_watch(course, video_speed="1x", watched_duration=0,
         "end_time": flt(end_time),
         "duration_watched": flt(watched_duration)
     })
-    
-    doc.save(ignore_permissions=True)
 
-    # Sync with standard LMS
-    if flt(doc.completion_percentage) >= 100:
+
+def sync_lms_completion(doc, student, lesson, course):
+    """
+    Mark the lesson complete in standard LMS once the video is fully watched.
+
+    The LMS Course Progress hook flags the log as completed when the progress
+    row is created; anything else is repaired by the nightly reconciliation.
+    """
+    if flt(doc.completion_percentage) >= 100 and not doc.is_completed:
+        from lms_reports.progress_tracker import clear_member_progress_cache
+
         try:
             save_progress(lesson, course)
-            check_and_update_log_completion(doc, student, lesson)
+            clear_member_progress_cache(course, [student])
+            # save_progress skips students who are not enrolled, so report
+            # what was actually stored
+            doc.is_completed = 1 if frappe.db.exists(
+                "LMS Course Progress",
+                {"member": student, "lesson": lesson, "status": "Complete"}
+            ) else 0
         except Exception:
             frappe.log_error("Failed to update standard LMS progress")
-    
-    return {
-        "success": True,
-        "completion_percentage": doc.completion_percentage,
-        "is_completed": doc.is_completed
-    }
 
 
 @frappe.whitelist()
@@ -147,21 +286,8 @@ def update_quiz_result(lesson, course, quiz, score, total_score, percentage):
     # Actually, it's better to create an LMS Quiz Submission and let its hook handle it.
     # But if the frontend calls this directly, we ensure it's recorded.
     
-    existing_log = frappe.db.exists(
-        "LMS Student Lesson Log",
-        {"student": student, "lesson": lesson}
-    )
-    
-    chapter = frappe.db.get_value("Course Lesson", lesson, "chapter")
-    
-    if existing_log:
-        doc = frappe.get_doc("LMS Student Lesson Log", existing_log)
-    else:
-        doc = frappe.new_doc("LMS Student Lesson Log")
-        doc.student = student
-        doc.course = course
-        doc.chapter = chapter
-        doc.lesson = lesson
+    doc = get_lesson_log(student, course, lesson)
+    before = (doc.quiz_attempts, doc.quiz_best_score, doc.quiz_passed_at_attempt)
     
     doc.quiz_attempts = cint(doc.quiz_attempts) + 1
     if flt(percentage) > flt(doc.quiz_best_score):
@@ -172,12 +298,18 @@ def update_quiz_result(lesson, course, quiz, score, total_score, percentage):
     
     doc.last_watched_timestamp = now_datetime()
     doc.save(ignore_permissions=True)
+    update_quiz_analytics(
+        quiz, lesson, course, before,
+        (doc.quiz_attempts, doc.quiz_best_score, doc.quiz_passed_at_attempt)
+    )
 
     # Sync with standard LMS
     if flt(percentage) >= 100:
+        from lms_reports.progress_tracker import clear_member_progress_cache
+
         try:
             save_progress(lesson, course)
-            check_and_update_log_completion(doc, student, lesson)
+            clear_member_progress_cache(course, [student])
         except Exception:
             frappe.log_error("Failed to update standard LMS progress")
     
@@ -208,8 +340,35 @@ def check_and_update_log_completion(log_doc, student, lesson):
         log_doc.save(ignore_permissions=True)
 
 
+# Sort fields accepted by `get_student_progress` and how to compare them
+# when merging archived logs. None of them is NULL (see
+# patches/v1_0/backfill_last_watched_timestamp), so pages are read straight
+# from their index.
+STUDENT_PROGRESS_SORT_FIELDS = {
+    "last_watched_timestamp": str,
+    "modified": str,
+    "completion_percentage": flt,
+    "quiz_best_score": flt,
+    "quiz_attempts": flt,
+    "student": str,
+    "lesson": str
+}
+
+STUDENT_PROGRESS_FIELDS = [
+    "name", "student", "student_name", "course", "chapter", "lesson",
+    "completion_percentage", "is_completed", "video_speed",
+    "watched_duration", "video_total_duration", "last_watched_timestamp",
+    "quiz_attempts", "quiz_best_score", "quiz_passed_at_attempt"
+]
+
+MAX_PAGE_LENGTH = 1000
+
+
 @frappe.whitelist()
-def get_student_progress(course=None, lesson=None, student=None):
+def get_student_progress(course=None, lesson=None, student=None, since=None,
+                         limit=None, cursor=None, sort_by="last_watched_timestamp",
+                         sort_order="desc", from_date=None, to_date=None, with_total=0,
+                         include_archived=0):
     """
     Get student progress data for reporting.
     Can filter by course, lesson, or student.
@@ -218,7 +377,23 @@ def get_student_progress(course=None, lesson=None, student=None):
         course: Optional LMS Course filter
         lesson: Optional Course Lesson filter
         student: Optional Student (User) filter
+        since: Optional watermark from a previous call (or an If-None-Match
+            header). When given, the result is wrapped in a delta envelope,
+            see `make_delta_response`.
+        limit: Page length (max 1000). When given, a page is returned as
+            {"rows", "next_cursor", "total"} instead of a plain list
+        cursor: `next_cursor` of the previous page
+        sort_by: One of STUDENT_PROGRESS_SORT_FIELDS
+        sort_order: "asc" or "desc"
+        from_date: Only logs last watched on or after this date
+        to_date: Only logs last watched on or before this date
+        with_total: Also count all matching logs (one extra query)
+        include_archived: Also read logs moved to the cold archive; they are
+            read anyway when `from_date` is before the archive horizon
     """
+    from frappe.query_builder.functions import Count
+
+    since = get_since(since)
     filters = {}
     
     if course:
@@ -228,28 +403,189 @@ def get_student_progress(course=None, lesson=None, student=None):
     if student:
         filters["student"] = student
     
-    logs = frappe.get_all(
-        "LMS Student Lesson Log",
-        filters=filters,
-        fields=[
-            "name", "student", "student_name", "course", "chapter", "lesson",
-            "completion_percentage", "is_completed", "video_speed",
-            "watched_duration", "video_total_duration", "last_watched_timestamp",
-            "quiz_attempts", "quiz_best_score", "quiz_passed_at_attempt"
-        ],
-        order_by="last_watched_timestamp desc"
-    )
-    
-    # Enrich with course and lesson titles
-    for log in logs:
-        log.course_title = frappe.db.get_value("LMS Course", log.course, "title")
-        log.lesson_title = frappe.db.get_value("Course Lesson", log.lesson, "title")
+    if sort_by not in STUDENT_PROGRESS_SORT_FIELDS:
+        frappe.throw(_("Cannot sort by {0}").format(sort_by))
+    descending = (sort_order or "desc").lower() == "desc"
+
+    if since is not None:
+        watermark = get_watermark(("LMS Student Lesson Log", filters))
+        if since and since == watermark:
+            return make_delta_response(watermark, unchanged=True)
+
+    sort_type = STUDENT_PROGRESS_SORT_FIELDS[sort_by]
+    after = decode_cursor(cursor) if cursor else None
+    page_length = min(cint(limit), MAX_PAGE_LENGTH) if limit else 0
+
+    def get_conditions(Log):
+        conditions = [Log[field] == value for field, value in filters.items()]
+        if since:
+            conditions.append(Log.modified > since)
+        if from_date:
+            conditions.append(Log.last_watched_timestamp >= getdate(from_date))
+        if to_date:
+            conditions.append(Log.last_watched_timestamp < add_days(getdate(to_date), 1))
+        return conditions
+
+    def get_page(doctype):
+        Log = frappe.qb.DocType(doctype)
+        Course = frappe.qb.DocType("LMS Course")
+        Lesson = frappe.qb.DocType("Course Lesson")
+
+        # Titles come from the same query instead of two lookups per row
+        query = (
+            frappe.qb.from_(Log)
+            .left_join(Course).on(Course.name == Log.course)
+            .left_join(Lesson).on(Lesson.name == Log.lesson)
+            .select(
+                *(Log[field] for field in STUDENT_PROGRESS_FIELDS),
+                Course.title.as_("course_title"),
+                Lesson.title.as_("lesson_title")
+            )
+        )
+        for condition in get_conditions(Log):
+            query = query.where(condition)
+
+        # Keyset pagination on (sort value, name)
+        sort_value = Log[sort_by]
+        if after:
+            after_value, after_name = after
+            if descending:
+                query = query.where(
+                    (sort_value < after_value) | ((sort_value == after_value) & (Log.name < after_name))
+                )
+            else:
+                query = query.where(
+                    (sort_value > after_value) | ((sort_value == after_value) & (Log.name > after_name))
+                )
+
+        order = Order.desc if descending else Order.asc
+        query = query.orderby(sort_value, order=order).orderby(Log.name, order=order)
+
+        if page_length:
+            query = query.limit(page_length + 1)
+
+        return query.run(as_dict=True)
+
+    logs = get_page("LMS Student Lesson Log")
+
+    # Cold logs are only read when the caller's filters reach them
+    include_archive = should_include_archive(include_archived, from_date)
+    if include_archive:
+        archived = get_page(ARCHIVE_DOCTYPE)
+        for log in archived:
+            log.archived = 1
+
+        def sort_key(log):
+            return (sort_type(log.get(sort_by)), log.name)
+
+        logs = sorted(logs + archived, key=sort_key, reverse=descending)
+        if page_length:
+            logs = logs[:page_length + 1]
+
+    result = logs
+    if page_length:
+        next_cursor = None
+        if len(logs) > page_length:
+            logs = logs[:page_length]
+            last = logs[-1]
+            next_cursor = encode_cursor(last.get(sort_by), last.name)
+
+        result = {"rows": logs, "next_cursor": next_cursor, "total": None}
+        if cint(with_total):
+            result["total"] = 0
+            for doctype in ("LMS Student Lesson Log", ARCHIVE_DOCTYPE if include_archive else None):
+                if not doctype:
+                    continue
+                Log = frappe.qb.DocType(doctype)
+                count_query = frappe.qb.from_(Log).select(Count(Log.name))
+                for condition in get_conditions(Log):
+                    count_query = count_query.where(condition)
+                result["total"] += count_query.run()[0][0]
     
-    return logs
+    if since is not None:
+        return make_delta_response(watermark, data=result, delta=bool(since))
+
+    return result
+
+
+def encode_cursor(value, name):
+    """Opaque pagination cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps([str(value), name]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        frappe.throw(_("Invalid cursor"))
+    return value, name
+
+
+def get_since(since):
+    """
+    Resolve the watermark a client already has, from the `since` argument
+    or an `If-None-Match` request header.
+    """
+    if since is None and getattr(frappe.local, "request", None):
+        etag = frappe.get_request_header("If-None-Match")
+        if etag:
+            since = etag.removeprefix("W/").strip('"')
+
+    return since
+
+
+def set_etag(watermark):
+    """
+    Send a watermark as the response's ETag, so HTTP clients can pass it back
+    in `If-None-Match` (see `get_since`). Only single watermarks qualify.
+    """
+    headers = getattr(frappe.local, "response_headers", None)
+    if headers is not None and watermark and isinstance(watermark, str):
+        headers["ETag"] = f'"{watermark}"'
+
+
+def get_watermark(*sources):
+    """
+    Get a change watermark: the latest `modified` across (doctype, filters) sources.
+    Any insert or update of a matching row moves the watermark forward.
+    """
+    watermarks = []
+    for doctype, filters in sources:
+        value = frappe.get_all(
+            doctype,
+            filters=filters,
+            fields=["max(modified) as watermark"],
+            as_list=True
+        )
+        if value and value[0][0]:
+            watermarks.append(str(value[0][0]))
+
+    return max(watermarks) if watermarks else ""
+
+
+def make_delta_response(watermark, data=None, unchanged=False, delta=False):
+    """
+    Envelope for incremental reads.
+
+    Returns:
+        dict: {
+            "watermark": str,  # pass back as `since` on the next call
+            "unchanged": 0/1,  # nothing changed, `data` is empty
+            "delta": 0/1,      # `data` only holds rows changed since `since`
+            "data": ...
+        }
+    """
+    set_etag(watermark)
+    return {
+        "watermark": watermark,
+        "unchanged": 1 if unchanged else 0,
+        "delta": 1 if delta else 0,
+        "data": data
+    }
 
 
 @frappe.whitelist()
-def get_course_progress_summary(course, student=None, lesson=None):
+def get_course_progress_summary(course, student=None, lesson=None, since=None):
     """
     Get summary of all students' progress in a course.
     Useful for admin dashboard.
@@ -258,11 +594,44 @@ def get_course_progress_summary(course, student=None, lesson=None):
         course: LMS Course name
         student: Optional Student (User) filter
         lesson: Optional Course Lesson filter
+        since: Optional watermark from a previous call (or an If-None-Match
+            header). When given, the summary is wrapped in a delta envelope
+            (see `make_delta_response`) and only lists students whose
+            enrollment, logs or lesson completions changed since then.
     """
+    since = get_since(since)
+
     # Filter enrollments
     filters = {"course": course}
     if student:
         filters["member"] = student
+
+    if since is not None:
+        log_filters = {"course": course}
+        if student:
+            log_filters["student"] = student
+
+        sources = (
+            ("LMS Enrollment", filters),
+            ("LMS Student Lesson Log", log_filters),
+            ("LMS Course Progress", filters)
+        )
+        watermark = get_watermark(*sources)
+        if since and since == watermark:
+            return make_delta_response(watermark, unchanged=True)
+
+        if since:
+            total_students = frappe.db.count("LMS Enrollment", filters)
+            changed_members = set()
+            for doctype, source_filters in sources:
+                member_field = "student" if doctype == "LMS Student Lesson Log" else "member"
+                changed_members.update(frappe.get_all(
+                    doctype,
+                    filters={**source_filters, "modified": [">", since]},
+                    pluck=member_field,
+                    distinct=True
+                ))
+            filters["member"] = ["in", list(changed_members)]
         
     enrollments = frappe.get_all(
         "LMS Enrollment",
@@ -270,6 +639,27 @@ def get_course_progress_summary(course, student=None, lesson=None):
         fields=["member", "member_name", "progress", "modified"]
     )
     
+    if lesson:
+        all_lessons = get_course_lessons_ordered(course)
+        summary = {
+            "total_students": len(enrollments),
+            "lesson_count": len(all_lessons),
+            "version": get_course_log_version(course),
+            "students": get_lesson_scoped_students(course, lesson, enrollments, all_lessons)
+        }
+    else:
+        summary = get_course_scoped_summary(course, enrollments)
+
+    if since is not None:
+        if since:
+            summary["total_students"] = total_students
+        return make_delta_response(watermark, data=summary, delta=bool(since))
+
+    return summary
+
+
+def get_course_scoped_summary(course, enrollments):
+    """Per-student summary with details of every lesson of the course."""
     # Get ALL lessons for this course in correct order
     all_lessons = get_course_lessons_ordered(course)
     lesson_count = len(all_lessons)
@@ -280,6 +670,7 @@ def get_course_progress_summary(course, student=None, lesson=None):
     summary = {
         "total_students": len(enrollments),
         "lesson_count": lesson_count,
+        "version": get_course_log_version(course),
         "students": []
     }
     
@@ -309,35 +700,15 @@ def get_course_progress_summary(course, student=None, lesson=None):
         lesson_details = []
         
         for lesson_info in all_lessons:
-            lesson_name = lesson_info["lesson"]
-            lesson_title = lesson_info["title"]
-            
-            # Check if completed
-            is_completed = lesson_name in lms_completed_map
-            completion_date = lms_completed_map.get(lesson_name)
-            
-            # Get custom log info if exists
-            custom_log = custom_log_map.get(lesson_name, {})
-            if custom_log and custom_log.get("is_completed"):
-                is_completed = True
-                if not completion_date:
-                    completion_date = custom_log.get("last_watched_timestamp") or custom_log.get("modified")
-            
-            if is_completed:
+            lesson_detail = get_lesson_detail(
+                lesson_info["lesson"],
+                lesson_info["title"],
+                lms_completed_map.get(lesson_info["lesson"]),
+                custom_log_map.get(lesson_info["lesson"])
+            )
+            if lesson_detail["is_completed"]:
                 completed_count += 1
             
-            lesson_detail = {
-                "lesson": lesson_name,
-                "lesson_title": lesson_title,
-                "is_completed": 1 if is_completed else 0,
-                "completion_percentage": 100 if is_completed else (custom_log.get("completion_percentage") or 0),
-                "completion_date": completion_date,
-                "video_speed": custom_log.get("video_speed") or None,
-                "last_watched_timestamp": custom_log.get("last_watched_timestamp"),
-                "quiz_attempts": custom_log.get("quiz_attempts") or 0,
-                "quiz_best_score": custom_log.get("quiz_best_score") or 0,
-                "quiz_passed_at_attempt": custom_log.get("quiz_passed_at_attempt") or 0
-            }
             lesson_details.append(lesson_detail)
         
         # Calculate overall progress (use max of enrollment progress and our calculation)
@@ -353,44 +724,218 @@ def get_course_progress_summary(course, student=None, lesson=None):
             "lesson_details": lesson_details
         }
         
-        # If specific lesson filter, add that info
-        if lesson:
-            matching_detail = next((d for d in lesson_details if d["lesson"] == lesson), None)
-            if matching_detail:
-                student_data["specific_lesson"] = matching_detail
-        
         summary["students"].append(student_data)
     
     return summary
 
 
-def get_course_lessons_ordered(course):
-    """Get all lessons for a course in correct order."""
-    lessons = []
-    chapters = frappe.get_all(
-        "Chapter Reference",
-        filters={"parent": course},
-        fields=["chapter", "idx"],
-        order_by="idx"
+def get_lesson_scoped_students(course, lesson, enrollments, all_lessons):
+    """
+    Lean per-student rows for one lesson of a course.
+
+    The lesson's completions and logs are fetched for the whole cohort in two
+    queries, and completed lessons of the outline (`all_lessons`) in two more,
+    so the cost grows with the number of students only. Rows carry
+    `specific_lesson` but no `lesson_details` or `completed_lessons`.
+    """
+    if not enrollments:
+        return []
+
+    lesson_title = frappe.db.get_value("Course Lesson", lesson, "title")
+
+    lms_completed_map = dict(frappe.get_all(
+        "LMS Course Progress",
+        filters={"course": course, "lesson": lesson, "status": "Complete"},
+        fields=["member", "creation"],
+        as_list=True
+    ))
+
+    custom_log_map = {
+        log.student: log
+        for log in frappe.get_all(
+            "LMS Student Lesson Log",
+            filters={"course": course, "lesson": lesson},
+            fields=["student", "completion_percentage", "is_completed", "video_speed",
+                   "last_watched_timestamp", "quiz_attempts", "quiz_best_score",
+                   "quiz_passed_at_attempt", "modified"]
+        )
+    }
+
+    completed = get_completed_lesson_counts(
+        course, [e.member for e in enrollments], [l["lesson"] for l in all_lessons]
     )
-    
-    for chapter in chapters:
-        lesson_refs = frappe.get_all(
-            "Lesson Reference",
-            filters={"parent": chapter.chapter},
-            fields=["lesson", "idx"],
-            order_by="idx"
+
+    students = []
+    for enrollment in enrollments:
+        # Same as the course-scoped summary: max of enrollment progress and our calculation
+        calculated_progress = (
+            completed.get(enrollment.member, 0) / len(all_lessons) * 100 if all_lessons else 0
+        )
+        overall_progress = max(enrollment.progress or 0, calculated_progress)
+        students.append({
+            "student": enrollment.member,
+            "student_name": enrollment.member_name,
+            "overall_progress": overall_progress,
+            "completion_date": enrollment.modified if overall_progress >= 100 else None,
+            "specific_lesson": get_lesson_detail(
+                lesson,
+                lesson_title,
+                lms_completed_map.get(enrollment.member),
+                custom_log_map.get(enrollment.member)
+            )
+        })
+
+    return students
+
+
+def get_completed_lesson_counts(course, members, lessons):
+    """
+    Completed lessons per member, counting a lesson done in LMS Course
+    Progress OR in its custom log, like `get_lesson_detail`.
+    """
+    if not members or not lessons:
+        return {}
+
+    done = {
+        (row.member, row.lesson)
+        for row in frappe.get_all(
+            "LMS Course Progress",
+            filters={"course": course, "member": ["in", members], "lesson": ["in", lessons], "status": "Complete"},
+            fields=["member", "lesson"]
+        )
+    }
+    done.update(
+        (row.student, row.lesson)
+        for row in frappe.get_all(
+            "LMS Student Lesson Log",
+            filters={"course": course, "student": ["in", members], "lesson": ["in", lessons], "is_completed": 1},
+            fields=["student", "lesson"]
+        )
+    )
+
+    counts = {}
+    for member, _lesson in done:
+        counts[member] = counts.get(member, 0) + 1
+    return counts
+
+
+def get_lesson_detail(lesson, lesson_title, lms_completion_date, custom_log):
+    """
+    Build the dashboard detail of one lesson for one student.
+
+    A lesson is complete if it's in LMS Course Progress (`lms_completion_date`)
+    OR its custom log has is_completed=1.
+    """
+    custom_log = custom_log or {}
+    is_completed = lms_completion_date is not None
+    completion_date = lms_completion_date
+
+    if custom_log.get("is_completed"):
+        is_completed = True
+        if not completion_date:
+            completion_date = custom_log.get("last_watched_timestamp") or custom_log.get("modified")
+
+    return {
+        "lesson": lesson,
+        "lesson_title": lesson_title,
+        "is_completed": 1 if is_completed else 0,
+        "completion_percentage": 100 if is_completed else (custom_log.get("completion_percentage") or 0),
+        "completion_date": completion_date,
+        "video_speed": custom_log.get("video_speed") or None,
+        "last_watched_timestamp": custom_log.get("last_watched_timestamp"),
+        "quiz_attempts": custom_log.get("quiz_attempts") or 0,
+        "quiz_best_score": custom_log.get("quiz_best_score") or 0,
+        "quiz_passed_at_attempt": custom_log.get("quiz_passed_at_attempt") or 0
+    }
+
+
+def get_course_log_version(course):
+    """Latest modified timestamp of the course's lesson logs, used as a change version."""
+    version = frappe.get_all(
+        "LMS Student Lesson Log",
+        filters={"course": course},
+        fields=["max(modified) as version"],
+        as_list=True
+    )
+    return str(version[0][0]) if version and version[0][0] else None
+
+
+@frappe.whitelist()
+def get_course_progress_changes(course, since=None, limit=1000):
+    """
+    Get (student, lesson) rows changed since a version, for the dashboard
+    to catch up after a realtime reconnect instead of reloading everything.
+
+    Args:
+        course: LMS Course name
+        since: Version (modified timestamp) the client last applied
+        limit: Maximum rows; beyond that the client should do a full reload
+
+    Returns:
+        dict: {"version", "rows", "full_reload"}
+    """
+    limit = cint(limit) or 1000
+
+    if not since:
+        return {"version": get_course_log_version(course), "rows": [], "full_reload": 1}
+
+    # New students are not part of the client's snapshot
+    if frappe.db.exists("LMS Enrollment", {"course": course, "creation": [">", since]}):
+        return {"version": get_course_log_version(course), "rows": [], "full_reload": 1}
+
+    logs = frappe.get_all(
+        "LMS Student Lesson Log",
+        filters={"course": course, "modified": [">", since]},
+        fields=[
+            "student", "lesson", "completion_percentage", "is_completed", "video_speed",
+            "last_watched_timestamp", "quiz_attempts", "quiz_best_score",
+            "quiz_passed_at_attempt", "modified"
+        ],
+        order_by="modified asc",
+        limit_page_length=limit + 1
+    )
+
+    if len(logs) > limit:
+        return {"version": get_course_log_version(course), "rows": [], "full_reload": 1}
+
+    rows = [get_course_row(log) for log in logs]
+    return {
+        "version": rows[-1]["version"] if rows else since,
+        "rows": rows,
+        "full_reload": 0
+    }
+
+
+def get_course_lessons_ordered(course):
+    """Get all lessons for a course in correct order, in one query."""
+    ChapterRef = frappe.qb.DocType("Chapter Reference")
+    LessonRef = frappe.qb.DocType("Lesson Reference")
+    Lesson = frappe.qb.DocType("Course Lesson")
+
+    rows = (
+        frappe.qb.from_(ChapterRef)
+        .join(LessonRef).on(LessonRef.parent == ChapterRef.chapter)
+        .left_join(Lesson).on(Lesson.name == LessonRef.lesson)
+        .select(
+            LessonRef.lesson,
+            Lesson.title,
+            ChapterRef.idx.as_("chapter_idx"),
+            LessonRef.idx.as_("lesson_idx")
         )
-        for ref in lesson_refs:
-            title = frappe.db.get_value("Course Lesson", ref.lesson, "title") or ref.lesson
-            lessons.append({
-                "lesson": ref.lesson,
-                "title": title,
-                "chapter_idx": chapter.idx,
-                "lesson_idx": ref.idx
-            })
-    
-    return lessons
+        .where(ChapterRef.parent == course)
+        .orderby(ChapterRef.idx)
+        .orderby(LessonRef.idx)
+    ).run(as_dict=True)
+
+    return [
+        {
+            "lesson": row.lesson,
+            "title": row.title or row.lesson,
+            "chapter_idx": row.chapter_idx,
+            "lesson_idx": row.lesson_idx
+        }
+        for row in rows
+    ]
 
 
 @frappe.whitelist()
@@ -0,0 +1,279 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Cold storage for lesson logs of inactive enrollments.
+
+A weekly job moves the LMS Student Lesson Log rows of every (student, course)
+without activity for longer than the threshold in LMS Reports Settings into
+LMS Student Lesson Log Archive. The archive has the same fields, keeps the log
+names and holds the watch history as compressed JSON. Hot tables and their
+indexes then only hold current cohorts.
+
+Readers only look at the archive when they need it:
+- the report and `get_student_progress` when asked to include archived
+  logs, or when their date range starts before the archive horizon
+- the lesson locker for lessons without a hot log
+A student who becomes active again gets the archived log restored by the
+tracking get-or-create paths, bulk completion and the log rebuild, see
+`restore_lesson_log`.
+"""
+
+import frappe
+from frappe.model import no_value_fields, table_fields
+from frappe.utils import add_days, cint, get_datetime, now_datetime
+
+from lms_reports.lms_reports.engagement import clear_lessons_engagement_cache
+from lms_reports.lms_reports.watch_history import compress_rows, decompress_rows
+
+LOG_DOCTYPE = "LMS Student Lesson Log"
+ARCHIVE_DOCTYPE = "LMS Student Lesson Log Archive"
+HISTORY_DOCTYPE = "LMS Watch History"
+
+STANDARD_FIELDS = ["name", "creation", "modified", "owner", "modified_by"]
+HISTORY_FIELDS = ["watched_at", "video_speed", "start_time", "end_time", "duration_watched"]
+
+# (student, course) enrollments moved per batch, and batches per run
+BATCH_SIZE = 100
+MAX_BATCHES = 100
+
+
+def get_log_fields():
+	"""Data fields shared by LMS Student Lesson Log and its archive"""
+	return [
+		df.fieldname
+		for df in frappe.get_meta(LOG_DOCTYPE).fields
+		if df.fieldtype not in no_value_fields and df.fieldtype not in table_fields
+	]
+
+
+def get_archive_horizon():
+	"""Logs inactive since before this datetime may be in the archive, None if nothing was archived"""
+	horizon = frappe.db.get_single_value("LMS Reports Settings", "log_archive_horizon")
+	return get_datetime(horizon) if horizon else None
+
+
+def should_include_archive(include_archived=False, from_date=None):
+	"""
+	Whether a read has to look at the archive
+
+	Args:
+		include_archived: the caller asked for archived logs
+		from_date: start of the date range the caller reads, if any
+	"""
+	if cint(include_archived):
+		return True
+
+	horizon = get_archive_horizon()
+	return bool(horizon and from_date and get_datetime(from_date) < horizon)
+
+
+def get_inactive_enrollments(cutoff, limit=BATCH_SIZE * MAX_BATCHES):
+	"""
+	(student, course) pairs without student activity since `cutoff`
+
+	Activity is `last_watched_timestamp`, which every tracking write sets.
+	Both sides of the anti-join are range scans on its index: the logs older
+	than the cutoff (the ones to archive) and the ones newer (active pairs),
+	so the rest of the table is never read.
+	"""
+	from pypika.terms import Tuple
+
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+	active = frappe.qb.from_(Log).select(Log.student, Log.course).where(Log.last_watched_timestamp >= cutoff)
+	return (
+		frappe.qb.from_(Log)
+		.select(Log.student, Log.course)
+		.distinct()
+		.where(Log.last_watched_timestamp < cutoff)
+		.where(Tuple(Log.student, Log.course).notin(active))
+		.limit(limit)
+	).run(as_dict=True)
+
+
+def archive_logs(log_names):
+	"""
+	Move lesson logs and their watch history into the archive
+
+	Returns:
+		int: logs archived
+	"""
+	if not log_names:
+		return 0
+
+	fields = STANDARD_FIELDS + get_log_fields()
+	logs = frappe.get_all(LOG_DOCTYPE, filters={"name": ["in", log_names]}, fields=fields)
+	if not logs:
+		return 0
+
+	# Only logs read here are moved; a row archived earlier under the same
+	# name is older than the hot log, so it is replaced
+	log_names = [log.name for log in logs]
+
+	history = {}
+	for row in frappe.get_all(
+		HISTORY_DOCTYPE,
+		filters={"parenttype": LOG_DOCTYPE, "parent": ["in", log_names]},
+		fields=["parent", *HISTORY_FIELDS],
+		order_by="parent asc, idx asc",
+	):
+		history.setdefault(row.pop("parent"), []).append(row)
+
+	now = now_datetime()
+	frappe.db.delete(ARCHIVE_DOCTYPE, {"name": ["in", log_names]})
+	frappe.db.bulk_insert(
+		ARCHIVE_DOCTYPE,
+		[*fields, "docstatus", "archived_on", "compressed_history"],
+		[
+			[
+				*(log.get(f) for f in fields),
+				0,
+				now,
+				compress_rows(history[log.name]) if history.get(log.name) else None,
+			]
+			for log in logs
+		],
+	)
+
+	frappe.db.delete(HISTORY_DOCTYPE, {"parenttype": LOG_DOCTYPE, "parent": ["in", log_names]})
+	frappe.db.delete(LOG_DOCTYPE, {"name": ["in", log_names]})
+	clear_lessons_engagement_cache(log.lesson for log in logs)
+	return len(logs)
+
+
+def archive_inactive_logs():
+	"""
+	Weekly job: move logs of enrollments inactive beyond the threshold
+
+	Disabled while `archive_inactive_days` in LMS Reports Settings is 0.
+	"""
+	days = cint(frappe.db.get_single_value("LMS Reports Settings", "archive_inactive_days"))
+	if days <= 0:
+		return 0
+
+	cutoff = get_datetime(add_days(now_datetime(), -days))
+	inactive = get_inactive_enrollments(cutoff)
+	archived = 0
+	for start in range(0, len(inactive), BATCH_SIZE):
+		enrollments = inactive[start : start + BATCH_SIZE]
+		Log = frappe.qb.DocType(LOG_DOCTYPE)
+		condition = None
+		for row in enrollments:
+			match = (Log.student == row.student) & (Log.course == row.course)
+			condition = match if condition is None else condition | match
+
+		names = frappe.qb.from_(Log).select(Log.name).where(condition).run(pluck=True)
+		archived += archive_logs(names)
+		frappe.db.commit()
+
+	horizon = get_archive_horizon()
+	if archived and (not horizon or cutoff > horizon):
+		frappe.db.set_single_value("LMS Reports Settings", "log_archive_horizon", cutoff)
+		frappe.db.commit()
+
+	frappe.logger("lms_reports").info(f"Archived {archived} inactive lesson logs")
+	return archived
+
+
+def restore_lesson_log(student, lesson):
+	"""
+	Move an archived log of (student, lesson) back to the hot table
+
+	Called before a tracking write creates a new log, so a returning student
+	continues from their archived progress. Restored rows keep their name and
+	timestamps and are written without document hooks.
+
+	Returns:
+		name of the restored log, or None if nothing was archived
+	"""
+	fields = STANDARD_FIELDS + get_log_fields()
+	archived = frappe.get_all(
+		ARCHIVE_DOCTYPE,
+		filters={"student": student, "lesson": lesson},
+		fields=[*fields, "compressed_history"],
+		limit=1,
+	)
+	if not archived:
+		return None
+
+	log = archived[0]
+	try:
+		frappe.db.bulk_insert(LOG_DOCTYPE, [*fields, "docstatus"], [[*(log.get(f) for f in fields), 0]])
+	except Exception as e:
+		if not frappe.db.is_duplicate_entry(e):
+			raise
+		# A concurrent write restored the log first, continue with it
+		return frappe.db.get_value(LOG_DOCTYPE, {"student": student, "lesson": lesson})
+
+	history = decompress_rows(log.compressed_history)
+	if history:
+		now = now_datetime()
+		frappe.db.bulk_insert(
+			HISTORY_DOCTYPE,
+			[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"parent",
+				"parenttype",
+				"parentfield",
+				"idx",
+				*HISTORY_FIELDS,
+			],
+			[
+				[
+					frappe.generate_hash(length=10),
+					now,
+					now,
+					log.owner,
+					log.owner,
+					log.name,
+					LOG_DOCTYPE,
+					"watch_history",
+					idx,
+					*(row.get(f) for f in HISTORY_FIELDS),
+				]
+				for idx, row in enumerate(history, start=1)
+			],
+		)
+
+	frappe.db.delete(ARCHIVE_DOCTYPE, {"name": log.name})
+	clear_lessons_engagement_cache([lesson])
+	return log.name
+
+
+def restore_lesson_logs(pairs):
+	"""
+	Restore the archived logs of (student, lesson) pairs, for bulk writers
+
+	Returns:
+		names of the restored logs
+	"""
+	if not pairs:
+		return []
+
+	archived = frappe.get_all(
+		ARCHIVE_DOCTYPE,
+		filters={
+			"student": ["in", list({student for student, _lesson in pairs})],
+			"lesson": ["in", list({lesson for _student, lesson in pairs})],
+		},
+		fields=["student", "lesson"],
+	)
+	return [
+		restore_lesson_log(row.student, row.lesson) for row in archived if (row.student, row.lesson) in pairs
+	]
+
+
+def get_archived_logs(filters, fields):
+	"""
+	Archived rows matching hot-table filters
+
+	Rows are marked with `archived: 1` so callers can tell them apart.
+	"""
+	rows = frappe.get_all(ARCHIVE_DOCTYPE, filters=filters, fields=fields)
+	for row in rows:
+		row.archived = 1
+	return rows
@@ -0,0 +1,427 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+At-risk learner detection.
+
+An hourly job flags enrolled students who:
+- had no activity for `at_risk_inactive_days` (Inactive), including students
+  who never started, counted from their enrollment
+- are stuck before a locked lesson and made no progress for
+  `at_risk_stalled_days` (Stalled)
+
+Flags are kept in LMS At Risk Learner, one row per enrollment.
+
+Instead of scanning every enrollment, each run only looks at students whose
+latest activity crossed a threshold since the previous run: the lesson logs
+with `last_watched_timestamp` in [watermark - days, now - days), found with a
+range scan on that index. Students with activity since the watermark have
+their flags cleared.
+"""
+
+import frappe
+from frappe.query_builder.functions import Max
+from frappe.utils import add_days, cint, date_diff, get_datetime, now_datetime
+
+from lms_reports.lesson_locker import get_members_outline_access
+
+FLAG_DOCTYPE = "LMS At Risk Learner"
+LOG_DOCTYPE = "LMS Student Lesson Log"
+
+AT_RISK_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+INACTIVE = "Inactive"
+STALLED = "Stalled"
+
+# Lesson logs (or enrollments) read per query
+BATCH_SIZE = 500
+
+MAX_PAGE_LENGTH = 500
+
+
+def scan_at_risk_learners():
+	"""
+	Hourly job: update at-risk flags from activity since the last run
+
+	Returns:
+		dict with the number of learners flagged and cleared
+	"""
+	settings = frappe.get_cached_doc("LMS Reports Settings")
+	inactive_days = cint(settings.at_risk_inactive_days)
+	stalled_days = cint(settings.at_risk_stalled_days)
+	watermark = settings.at_risk_watermark and get_datetime(settings.at_risk_watermark)
+	now = now_datetime()
+
+	cleared = 0
+	if watermark:
+		for pairs in iter_active_pairs(watermark):
+			cleared += clear_flags(pairs)
+
+	flagged = 0
+	if inactive_days > 0:
+		start, end = get_window(watermark, now, inactive_days)
+		for pairs in iter_active_pairs(start, end):
+			flagged += flag_learners(get_idle_enrollments(pairs, end), INACTIVE)
+
+		for enrollments in iter_unstarted_enrollments(start, end):
+			flagged += flag_learners(enrollments, INACTIVE)
+
+	if stalled_days > 0:
+		start, end = get_window(watermark, now, stalled_days)
+		for pairs in iter_active_pairs(start, end):
+			flagged += flag_learners(get_idle_enrollments(pairs, end), STALLED)
+
+	# Flags and the watermark are committed together, so a failed run is redone in full
+	frappe.db.set_single_value("LMS Reports Settings", {"at_risk_watermark": now, "last_at_risk_scan": now})
+	frappe.db.commit()
+
+	frappe.logger("lms_reports").info(f"At-risk scan flagged {flagged} and cleared {cleared} learners")
+	return {"flagged": flagged, "cleared": cleared}
+
+
+def get_window(watermark, now, days):
+	"""
+	Activity times that crossed the `days` threshold since the last run
+
+	Returns:
+		(start, end) for start <= t < end; start is None on the first run
+	"""
+	end = add_days(now, -days)
+	return (add_days(watermark, -days) if watermark else None), end
+
+
+def iter_active_pairs(start=None, end=None):
+	"""
+	Yield sets of (student, course) with lesson activity in start <= t < end
+
+	Pages are a keyset on (last_watched_timestamp, name), so each one is a
+	range read of the timestamp index.
+	"""
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+
+	after = None
+	while True:
+		query = (
+			frappe.qb.from_(Log)
+			.select(Log.name, Log.student, Log.course, Log.last_watched_timestamp)
+			.orderby(Log.last_watched_timestamp)
+			.orderby(Log.name)
+			.limit(BATCH_SIZE)
+		)
+		if start:
+			query = query.where(Log.last_watched_timestamp >= start)
+		if end:
+			query = query.where(Log.last_watched_timestamp < end)
+		if after:
+			after_time, after_name = after
+			query = query.where(
+				(Log.last_watched_timestamp > after_time)
+				| ((Log.last_watched_timestamp == after_time) & (Log.name > after_name))
+			)
+
+		chunk = query.run(as_dict=True)
+		if not chunk:
+			return
+
+		yield {(log.student, log.course) for log in chunk}
+		after = chunk[-1].last_watched_timestamp, chunk[-1].name
+
+
+def get_idle_enrollments(pairs, before):
+	"""
+	Enrollments of the given (student, course) pairs whose latest activity is before `before`
+
+	Students who completed the course are skipped.
+	"""
+	if not pairs:
+		return []
+
+	students = list({student for student, _course in pairs})
+	courses = list({course for _student, course in pairs})
+
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+	last_activity = {
+		(student, course): last
+		for student, course, last in (
+			frappe.qb.from_(Log)
+			.select(Log.student, Log.course, Max(Log.last_watched_timestamp))
+			.where(Log.student.isin(students))
+			.where(Log.course.isin(courses))
+			.groupby(Log.student, Log.course)
+		).run()
+	}
+
+	enrollments = frappe.get_all(
+		"LMS Enrollment",
+		filters={"member": ["in", students], "course": ["in", courses], "progress": ["<", 100]},
+		fields=["name", "member", "course", "progress"],
+	)
+
+	idle = []
+	for enrollment in enrollments:
+		key = (enrollment.member, enrollment.course)
+		last = last_activity.get(key)
+		if key in pairs and last and get_datetime(last) < get_datetime(before):
+			enrollment.last_activity = last
+			idle.append(enrollment)
+
+	return idle
+
+
+def iter_unstarted_enrollments(start, end):
+	"""Yield batches of enrollments created in start <= t < end without any lesson log"""
+	Enrollment = frappe.qb.DocType("LMS Enrollment")
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+
+	after = None
+	while True:
+		query = (
+			frappe.qb.from_(Enrollment)
+			.left_join(Log)
+			.on((Log.student == Enrollment.member) & (Log.course == Enrollment.course))
+			.select(
+				Enrollment.name,
+				Enrollment.member,
+				Enrollment.course,
+				Enrollment.progress,
+				Enrollment.creation.as_("last_activity"),
+			)
+			.where(Log.name.isnull())
+			.where(Enrollment.creation < end)
+			.orderby(Enrollment.name)
+			.limit(BATCH_SIZE)
+		)
+		if start:
+			query = query.where(Enrollment.creation >= start)
+		if after:
+			query = query.where(Enrollment.name > after)
+
+		chunk = query.run(as_dict=True)
+		if not chunk:
+			return
+
+		yield chunk
+		after = chunk[-1].name
+
+
+def get_stalled_lessons(course, members):
+	"""
+	The lesson each member has to finish before the next one unlocks
+
+	The outline and the completion of all members are read once for the course.
+
+	Returns:
+		{member: (lesson, missing requirements)} for members with a locked lesson
+	"""
+	_outline, access = get_members_outline_access(course, members)
+	stalled = {}
+	for member, rows in access.items():
+		lesson, missing = get_stalled_lesson(rows)
+		if lesson:
+			stalled[member] = (lesson, missing)
+
+	return stalled
+
+
+def get_stalled_lesson(rows):
+	"""
+	The lesson to finish before the first locked one
+
+	Args:
+		rows: outline access of a member, see `get_outline_access`
+
+	Returns:
+		(lesson, missing requirements), or (None, None) if nothing is locked
+	"""
+	for i, (_lesson, can_access, _reason, _status) in enumerate(rows):
+		if not can_access:
+			# Nothing to finish before the first lesson
+			if i == 0:
+				return None, None
+			blocking, _can_access, _reason, status = rows[i - 1]
+			return blocking.name, status.get("missing") or []
+
+	return None, None
+
+
+def flag_learners(enrollments, reason):
+	"""
+	Store flags for enrollments, replacing earlier ones of the same enrollment
+
+	A Stalled flag never replaces an Inactive one, and is only stored when a
+	lesson is actually locked for the student.
+
+	Returns:
+		number of learners flagged
+	"""
+	if not enrollments:
+		return 0
+
+	names = [e.name for e in enrollments]
+	if reason == STALLED:
+		inactive = set(
+			frappe.get_all(FLAG_DOCTYPE, filters={"name": ["in", names], "reason": INACTIVE}, pluck="name")
+		)
+		enrollments = [e for e in enrollments if e.name not in inactive]
+
+	full_names = (
+		dict(
+			frappe.get_all(
+				"User",
+				filters={"name": ["in", list({e.member for e in enrollments})]},
+				fields=["name", "full_name"],
+				as_list=True,
+			)
+		)
+		if enrollments
+		else {}
+	)
+
+	stalled = {}
+	if reason == STALLED:
+		members_by_course = {}
+		for enrollment in enrollments:
+			members_by_course.setdefault(enrollment.course, set()).add(enrollment.member)
+		for course, members in members_by_course.items():
+			for member, lesson in get_stalled_lessons(course, list(members)).items():
+				stalled[(member, course)] = lesson
+
+	now = now_datetime()
+	user = frappe.session.user
+	values = []
+	for enrollment in enrollments:
+		stalled_lesson, missing = None, None
+		if reason == STALLED:
+			stalled_lesson, missing = stalled.get((enrollment.member, enrollment.course), (None, None))
+			if not stalled_lesson:
+				continue
+
+		values.append(
+			[
+				enrollment.name,
+				now,
+				now,
+				user,
+				user,
+				0,
+				enrollment.member,
+				full_names.get(enrollment.member),
+				enrollment.course,
+				enrollment.name,
+				reason,
+				enrollment.last_activity,
+				enrollment.progress,
+				now,
+				stalled_lesson,
+				"\n".join(missing) if missing else None,
+			]
+		)
+
+	if not values:
+		return 0
+
+	frappe.db.delete(FLAG_DOCTYPE, {"name": ["in", [row[0] for row in values]]})
+	frappe.db.bulk_insert(
+		FLAG_DOCTYPE,
+		[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"docstatus",
+			"member",
+			"member_name",
+			"course",
+			"enrollment",
+			"reason",
+			"last_activity",
+			"progress",
+			"flagged_on",
+			"stalled_lesson",
+			"missing",
+		],
+		values,
+	)
+	return len(values)
+
+
+def clear_flags(pairs):
+	"""Remove flags of (student, course) pairs that are active again"""
+	if not pairs:
+		return 0
+
+	Flag = frappe.qb.DocType(FLAG_DOCTYPE)
+	flags = [
+		row[0]
+		for row in (
+			frappe.qb.from_(Flag)
+			.select(Flag.name, Flag.member, Flag.course)
+			.where(Flag.member.isin(list({student for student, _course in pairs})))
+		).run()
+		if (row[1], row[2]) in pairs
+	]
+	if flags:
+		frappe.db.delete(FLAG_DOCTYPE, {"name": ["in", flags]})
+
+	return len(flags)
+
+
+@frappe.whitelist()
+def get_at_risk_learners(
+	course=None, reason=None, member=None, min_inactive_days=None, start=0, page_length=100
+):
+	"""
+	Flagged learners, least recently active first
+
+	Args:
+		course: only this course
+		reason: Inactive or Stalled
+		member: only this student
+		min_inactive_days: only learners inactive for at least this many days
+		start, page_length: paging
+
+	Returns:
+		dict: {'total', 'last_scan', 'rows': [flag fields + inactive_days]}
+	"""
+	frappe.only_for(AT_RISK_ROLES)
+
+	filters = {}
+	if course:
+		filters["course"] = course
+	if reason:
+		filters["reason"] = reason
+	if member:
+		filters["member"] = member
+	if cint(min_inactive_days) > 0:
+		filters["last_activity"] = ["<=", add_days(now_datetime(), -cint(min_inactive_days))]
+
+	rows = frappe.get_all(
+		FLAG_DOCTYPE,
+		filters=filters,
+		fields=[
+			"member",
+			"member_name",
+			"course",
+			"enrollment",
+			"reason",
+			"last_activity",
+			"progress",
+			"flagged_on",
+			"stalled_lesson",
+			"missing",
+		],
+		order_by="last_activity asc",
+		limit_start=max(cint(start), 0),
+		limit_page_length=min(max(cint(page_length), 1), MAX_PAGE_LENGTH),
+	)
+
+	today = now_datetime()
+	for row in rows:
+		row.inactive_days = date_diff(today, row.last_activity) if row.last_activity else None
+
+	return {
+		"total": frappe.db.count(FLAG_DOCTYPE, filters),
+		"last_scan": frappe.db.get_single_value("LMS Reports Settings", "last_at_risk_scan"),
+		"rows": rows,
+	}
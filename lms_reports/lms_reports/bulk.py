@@ -0,0 +1,455 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Bulk enrollment and bulk completion for instructors.
+
+Both paths prefetch existing rows once, write the missing ones with
+multi-row inserts and update the rest with bulk updates. Document hooks
+don't run for these writes. Enrollment progress, the course enrollment
+count, realtime pushes, the daily activity rollup and the progress caches
+are updated once per batch instead.
+
+System Managers and Moderators can change any course, Course Creators only
+the courses they are an instructor of.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.model import table_fields
+from frappe.utils import now_datetime, today
+
+from lms_reports.lms_reports.activity import COURSE_TOTAL, add_activity
+from lms_reports.lms_reports.archive import restore_lesson_logs
+from lms_reports.lms_reports.leaderboard import update_leaderboard
+from lms_reports.lms_reports.realtime import queue_bulk_update, queue_course_progress
+
+BULK_ROLES = ["System Manager", "Moderator", "Course Creator"]
+# Roles that may change every course, other bulk roles only the courses they teach
+COURSE_MANAGER_ROLES = ["System Manager", "Moderator"]
+
+# Max rows per API call, larger cohorts are sent in several calls
+MAX_BATCH_SIZE = 10000
+
+
+def parse_list(value):
+	if isinstance(value, str):
+		value = json.loads(value) if value.strip().startswith("[") else [value]
+	return list(dict.fromkeys(v for v in (value or []) if v))
+
+
+def check_course_access(courses):
+	"""Throw unless the current user may change every one of the courses"""
+	if set(frappe.get_roles()) & set(COURSE_MANAGER_ROLES):
+		return
+
+	taught = set(
+		frappe.get_all(
+			"LMS Course Instructor",
+			filters={
+				"parenttype": "LMS Course",
+				"parent": ["in", list(courses)],
+				"instructor": frappe.session.user,
+			},
+			pluck="parent",
+		)
+	)
+	not_permitted = set(courses) - taught
+	if not_permitted:
+		frappe.throw(
+			_("You are not an instructor of: {0}").format(", ".join(sorted(not_permitted))),
+			frappe.PermissionError,
+		)
+
+
+def make_rows(doctype, rows):
+	"""
+	Complete rows for `frappe.db.bulk_insert` with names, standard fields and defaults
+
+	Returns:
+		(fields, values) for `frappe.db.bulk_insert`
+	"""
+	meta = frappe.get_meta(doctype)
+	defaults = {
+		df.fieldname: df.default for df in meta.fields if df.default and df.fieldtype not in table_fields
+	}
+
+	now = now_datetime()
+	user = frappe.session.user
+	standard = {"creation": now, "modified": now, "owner": user, "modified_by": user, "docstatus": 0}
+
+	completed = []
+	for row in rows:
+		row = {**defaults, **standard, **{k: v for k, v in row.items() if v is not None}}
+		row.setdefault("name", frappe.generate_hash(length=10))
+		completed.append(row)
+
+	fields = list(dict.fromkeys(f for row in completed for f in row))
+	return fields, [[row.get(f) for f in fields] for row in completed]
+
+
+def get_full_names(users):
+	return dict(
+		frappe.get_all(
+			"User", filters={"name": ["in", list(users)]}, fields=["name", "full_name"], as_list=True
+		)
+	)
+
+
+def enroll_users(users, courses, member_type="Student"):
+	"""
+	Enroll every user in every course, skipping existing enrollments
+
+	Returns:
+		dict with enrolled and skipped counts
+	"""
+	if not users or not courses:
+		return {"enrolled": 0, "skipped": 0}
+
+	existing = {
+		(row.member, row.course)
+		for row in frappe.get_all(
+			"LMS Enrollment",
+			filters={"member": ["in", users], "course": ["in", courses]},
+			fields=["member", "course"],
+		)
+	}
+
+	names = get_full_names(users)
+	has_member_name = frappe.get_meta("LMS Enrollment").has_field("member_name")
+
+	rows = []
+	for course in courses:
+		for user in users:
+			if (user, course) in existing:
+				continue
+			row = {"course": course, "member": user, "member_type": member_type}
+			if has_member_name:
+				row["member_name"] = names.get(user)
+			rows.append(row)
+
+	if rows:
+		fields, values = make_rows("LMS Enrollment", rows)
+		frappe.db.bulk_insert("LMS Enrollment", fields, values)
+		update_enrollment_counts({row["course"] for row in rows})
+
+	return {"enrolled": len(rows), "skipped": len(existing)}
+
+
+def update_enrollment_counts(courses):
+	"""Refresh the enrollment count of each course once, if LMS keeps one"""
+	if not frappe.get_meta("LMS Course").has_field("enrollments"):
+		return
+
+	counts = dict(
+		frappe.get_all(
+			"LMS Enrollment",
+			filters={"course": ["in", list(courses)]},
+			fields=["course", "count(name) as count"],
+			group_by="course",
+			as_list=True,
+		)
+	)
+	frappe.db.bulk_update(
+		"LMS Course",
+		{course: {"enrollments": counts.get(course, 0)} for course in courses},
+		update_modified=False,
+	)
+
+
+def mark_lessons_complete(pairs):
+	"""
+	Mark (student, lesson) pairs complete in LMS and in the lesson logs
+
+	Pairs of students who are not enrolled in the lesson's course are skipped,
+	as `save_progress` does.
+
+	Args:
+		pairs: list of (student, lesson)
+
+	Returns:
+		dict with completed (newly marked), skipped (already complete) and
+		not_enrolled counts
+	"""
+	pairs = list(dict.fromkeys(pairs))
+	if not pairs:
+		return {"completed": 0, "skipped": 0, "not_enrolled": 0}
+
+	students = list({student for student, _lesson in pairs})
+	lesson_names = list({lesson for _student, lesson in pairs})
+
+	lessons = {
+		row.name: row
+		for row in frappe.get_all(
+			"Course Lesson", filters={"name": ["in", lesson_names]}, fields=["name", "course", "chapter"]
+		)
+	}
+	missing = set(lesson_names) - set(lessons)
+	if missing:
+		frappe.throw(_("Lessons not found: {0}").format(", ".join(sorted(missing))))
+
+	enrolled = {
+		(row.member, row.course)
+		for row in frappe.get_all(
+			"LMS Enrollment",
+			filters={
+				"member": ["in", students],
+				"course": ["in", list({l.course for l in lessons.values()})],
+			},
+			fields=["member", "course"],
+		)
+	}
+	requested = len(pairs)
+	pairs = [(student, lesson) for student, lesson in pairs if (student, lessons[lesson].course) in enrolled]
+	not_enrolled = requested - len(pairs)
+	restore_lesson_logs(set(pairs))
+
+	progress = {
+		(row.member, row.lesson): row
+		for row in frappe.get_all(
+			"LMS Course Progress",
+			filters={"member": ["in", students], "lesson": ["in", lesson_names]},
+			fields=["name", "member", "lesson", "status"],
+		)
+	}
+	logs = {
+		(row.student, row.lesson): row
+		for row in frappe.get_all(
+			"LMS Student Lesson Log",
+			filters={"student": ["in", students], "lesson": ["in", lesson_names]},
+			fields=[
+				"name",
+				"student",
+				"lesson",
+				"is_completed",
+				"video_speed",
+				"last_watched_timestamp",
+				"quiz_attempts",
+				"quiz_best_score",
+				"quiz_passed_at_attempt",
+			],
+		)
+	}
+
+	names = get_full_names(students)
+	has_member_name = frappe.get_meta("LMS Course Progress").has_field("member_name")
+	now = now_datetime()
+
+	new_progress, progress_updates = [], {}
+	new_logs, log_updates = [], {}
+	changed = []
+	completions = {}
+	for student, lesson in pairs:
+		course, chapter = lessons[lesson].course, lessons[lesson].chapter
+		row = progress.get((student, lesson))
+		log = logs.get((student, lesson))
+
+		if row and row.status == "Complete" and log and log.is_completed:
+			continue
+
+		if not row:
+			new_row = {
+				"member": student,
+				"course": course,
+				"chapter": chapter,
+				"lesson": lesson,
+				"status": "Complete",
+			}
+			if has_member_name:
+				new_row["member_name"] = names.get(student)
+			new_progress.append(new_row)
+		elif row.status != "Complete":
+			progress_updates[row.name] = {"status": "Complete"}
+
+		if not (log and log.is_completed):
+			completions[(course, lesson)] = completions.get((course, lesson), 0) + 1
+
+		if not log:
+			log = frappe._dict(
+				{
+					# Same name as the doctype's naming expression LSLL-{student}-{lesson}
+					"name": f"LSLL-{student}-{lesson}",
+					"student": student,
+					"student_name": names.get(student),
+					"course": course,
+					"chapter": chapter,
+					"lesson": lesson,
+					"last_watched_timestamp": now,
+				}
+			)
+			new_logs.append(log)
+		else:
+			log_updates[log.name] = {"is_completed": 1, "completion_percentage": 100}
+
+		log.update({"course": course, "is_completed": 1, "completion_percentage": 100, "modified": now})
+		changed.append(log)
+
+	if new_progress:
+		frappe.db.bulk_insert("LMS Course Progress", *make_rows("LMS Course Progress", new_progress))
+	if progress_updates:
+		frappe.db.bulk_update("LMS Course Progress", progress_updates)
+	if new_logs:
+		frappe.db.bulk_insert(
+			"LMS Student Lesson Log",
+			*make_rows(
+				"LMS Student Lesson Log",
+				[
+					{
+						k: log.get(k)
+						for k in (
+							"name",
+							"student",
+							"student_name",
+							"course",
+							"chapter",
+							"lesson",
+							"is_completed",
+							"completion_percentage",
+							"last_watched_timestamp",
+						)
+					}
+					for log in new_logs
+				],
+			),
+			ignore_duplicates=True,
+		)
+	if log_updates:
+		frappe.db.bulk_update("LMS Student Lesson Log", log_updates)
+
+	update_course_progress({(log.student, log.course) for log in changed})
+	add_completions(completions)
+	queue_bulk_update(changed)
+
+	return {"completed": len(changed), "skipped": len(pairs) - len(changed), "not_enrolled": not_enrolled}
+
+
+def add_completions(completions):
+	"""
+	Add bulk completions to today's LMS Daily Activity rows
+
+	Marking a lesson complete is not student activity, so active students
+	and the engagement analytics (watch history) are left as they are.
+
+	Args:
+		completions: {(course, lesson): newly completed logs}
+	"""
+	day = today()
+	totals = {}
+	rows = []
+	for (course, lesson), count in completions.items():
+		rows.append({"activity_date": day, "course": course, "lesson": lesson, "completions": count})
+		totals[course] = totals.get(course, 0) + count
+
+	rows += [
+		{"activity_date": day, "course": course, "lesson": COURSE_TOTAL, "completions": count}
+		for course, count in totals.items()
+	]
+	add_activity(rows)
+
+
+def update_course_progress(members):
+	"""Recompute enrollment progress of (member, course) pairs, with one grouped read per course"""
+	from lms_reports.lms_reports.funnel import clear_funnel_cache
+	from lms_reports.progress_tracker import clear_member_progress_cache, get_members_course_progress
+
+	if not members:
+		return
+
+	by_course = {}
+	for member, course in members:
+		by_course.setdefault(course, []).append(member)
+	for course, course_members in by_course.items():
+		clear_member_progress_cache(course, course_members)
+		clear_funnel_cache(course)
+
+	enrollments = {
+		(row.member, row.course): row.name
+		for row in frappe.get_all(
+			"LMS Enrollment",
+			filters={
+				"member": ["in", list({m for m, _c in members})],
+				"course": ["in", list({c for _m, c in members})],
+			},
+			fields=["name", "member", "course"],
+		)
+	}
+
+	updates = {}
+	course_progress = {}
+	for course, course_members in by_course.items():
+		course_members = [member for member in course_members if (member, course) in enrollments]
+		if not course_members:
+			continue
+
+		summaries = get_members_course_progress(course, course_members)
+		for member in course_members:
+			progress = summaries[member]["overall_progress"]
+			updates[enrollments[(member, course)]] = {"progress": progress}
+			course_progress.setdefault(course, {})[member] = progress
+			queue_course_progress(member, course, progress)
+
+	if updates:
+		frappe.db.bulk_update("LMS Enrollment", updates)
+
+	for course, progress_by_member in course_progress.items():
+		update_leaderboard(course, progress_by_member)
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_enroll(users, courses, member_type="Student"):
+	"""
+	Enroll many users in many courses
+
+	Args:
+		users: list (or JSON string) of User names
+		courses: list (or JSON string) of LMS Course names
+		member_type: LMS Enrollment member type
+	"""
+	frappe.only_for(BULK_ROLES)
+
+	users, courses = parse_list(users), parse_list(courses)
+	if len(users) * len(courses) > MAX_BATCH_SIZE:
+		frappe.throw(_("At most {0} enrollments can be created per call").format(MAX_BATCH_SIZE))
+	check_course_access(courses)
+
+	return enroll_users(users, courses, member_type)
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_mark_complete(pairs=None, students=None, lesson=None):
+	"""
+	Mark lessons complete for many students, e.g. after an offline class
+
+	Args:
+		pairs: list (or JSON string) of {"student", "lesson"} dicts
+		students: list (or JSON string) of students, with `lesson`, as a shortcut
+			for marking one lesson complete for a whole cohort
+		lesson: Course Lesson name used with `students`
+	"""
+	frappe.only_for(BULK_ROLES)
+
+	if isinstance(pairs, str):
+		pairs = json.loads(pairs)
+
+	pairs = [(p.get("student"), p.get("lesson")) for p in pairs or []]
+	if lesson:
+		pairs += [(student, lesson) for student in parse_list(students)]
+
+	pairs = [(student, lesson) for student, lesson in pairs if student and lesson]
+	if len(pairs) > MAX_BATCH_SIZE:
+		frappe.throw(_("At most {0} lessons can be marked complete per call").format(MAX_BATCH_SIZE))
+
+	if pairs:
+		check_course_access(
+			set(
+				frappe.get_all(
+					"Course Lesson",
+					filters={"name": ["in", list({lesson for _student, lesson in pairs})]},
+					pluck="course",
+				)
+			)
+		)
+
+	return mark_lessons_complete(pairs)
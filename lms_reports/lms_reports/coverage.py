@@ -0,0 +1,116 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Watched-coverage bitmap of a lesson video, one bit per second.
+
+The bitmap is stored base64 encoded on LMS Student Lesson Log
+(`watched_coverage`), so its size is bounded by the video length (about 450
+bytes per hour) instead of growing with every heartbeat. Segments are merged
+in O(segment length) and unique seconds watched are counted without reading
+the watch history, so seeking ahead no longer counts as watched.
+"""
+
+import base64
+import math
+
+from frappe.utils import flt
+
+# Upper bound for videos of unknown or absurd length, keeps the bitmap small
+MAX_COVERAGE_SECONDS = 6 * 3600
+
+# Seconds between two progress reports of the player
+HEARTBEAT_INTERVAL = 30
+
+
+def decode_coverage(value):
+	"""Stored coverage to a mutable bitmap"""
+	return bytearray(base64.b64decode(value)) if value else bytearray()
+
+
+def encode_coverage(bitmap):
+	"""Bitmap to its stored form"""
+	return base64.b64encode(bytes(bitmap)).decode()
+
+
+def get_length_seconds(video_total_duration):
+	if flt(video_total_duration) <= 0:
+		return MAX_COVERAGE_SECONDS
+	return min(math.ceil(flt(video_total_duration)), MAX_COVERAGE_SECONDS)
+
+
+def get_heartbeat_span(video_speed=None):
+	"""Most video seconds one heartbeat can cover at a playback speed like 1.5x"""
+	speed = flt(str(video_speed or "").rstrip("x")) or 1
+	return HEARTBEAT_INTERVAL * max(speed, 1)
+
+
+def add_segment(bitmap, start, end, video_total_duration=None):
+	"""
+	Mark the seconds of a watched segment in the bitmap
+
+	Every second the segment touches counts, so consecutive segments with
+	fractional boundaries leave no gaps.
+
+	Args:
+		bitmap: bytearray from `decode_coverage`, updated in place
+		start: segment start position in seconds
+		end: segment end position in seconds
+		video_total_duration: video length, seconds past it are ignored
+
+	Returns:
+		int: number of seconds that were not covered before
+	"""
+	first = max(0, math.floor(flt(start)))
+	last = min(math.ceil(flt(end)), get_length_seconds(video_total_duration))
+	if last <= first:
+		return 0
+
+	needed = (last + 7) // 8
+	if len(bitmap) < needed:
+		bitmap.extend(bytes(needed - len(bitmap)))
+
+	added = 0
+	for second in range(first, last):
+		index, bit = divmod(second, 8)
+		mask = 1 << bit
+		if not bitmap[index] & mask:
+			bitmap[index] |= mask
+			added += 1
+
+	return added
+
+
+def count_seconds(bitmap):
+	"""Unique seconds watched"""
+	return int.from_bytes(bitmap, "little").bit_count()
+
+
+def get_coverage_percentage(bitmap, video_total_duration):
+	"""Share of the video watched at least once, 0-100"""
+	if flt(video_total_duration) <= 0:
+		return 0
+	return min(100, count_seconds(bitmap) * 100 / get_length_seconds(video_total_duration))
+
+
+def get_intervals(bitmap):
+	"""
+	Watched seconds as merged [start, end) intervals
+
+	Returns:
+		list of [start, end] pairs in seconds
+	"""
+	intervals = []
+	start = None
+	for second in range(len(bitmap) * 8):
+		watched = bitmap[second // 8] & (1 << (second % 8))
+		if watched and start is None:
+			start = second
+		elif not watched and start is not None:
+			intervals.append([start, second])
+			start = None
+
+	if start is not None:
+		intervals.append([start, len(bitmap) * 8])
+
+	return intervals
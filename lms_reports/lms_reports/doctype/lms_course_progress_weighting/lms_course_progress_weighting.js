@@ -0,0 +1,24 @@
+// Copyright (c) 2026, Gulinur and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("LMS Course Progress Weighting", {
+	refresh(frm) {
+		if (frm.is_new()) return;
+
+		frm.add_custom_button(__("Recompute Progress"), () => {
+			frappe.call({
+				method: "lms_reports.progress_tracker.recompute_progress",
+				args: { course: frm.doc.course },
+				callback: () => frappe.show_alert(__("Progress recompute queued")),
+			});
+		});
+
+		frm.add_custom_button(__("Cancel Recompute"), () => {
+			frappe.call({
+				method: "lms_reports.progress_tracker.cancel_progress_recompute",
+				args: { course: frm.doc.course },
+				callback: () => frappe.show_alert(__("Recompute will stop after the current batch")),
+			});
+		});
+	},
+});
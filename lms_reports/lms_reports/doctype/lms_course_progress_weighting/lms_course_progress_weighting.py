@@ -0,0 +1,26 @@
+# Copyright (c) 2026, Gulinur and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+
+from lms_reports.progress_tracker import enqueue_course_progress_recompute
+
+WEIGHTING_FIELDS = ("video_weight", "quiz_weight", "watched_threshold")
+
+
+class LMSCourseProgressWeighting(Document):
+	def validate(self):
+		if flt(self.video_weight) + flt(self.quiz_weight) != 100:
+			frappe.throw(_("Video Weight and Quiz Weight must add up to 100"))
+
+	def on_update(self):
+		before = self.get_doc_before_save()
+		if not before or any(flt(before.get(f)) != flt(self.get(f)) for f in WEIGHTING_FIELDS):
+			enqueue_course_progress_recompute(self.course)
+
+	def on_trash(self):
+		# The course falls back to the default weighting
+		enqueue_course_progress_recompute(self.course)
@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Gulinur and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class LMSDailyActivity(Document):
+	pass
+
+
+def on_doctype_update():
+	# Course and lesson trends scan (course, lesson, date); site-wide trends scan (lesson, date)
+	frappe.db.add_index("LMS Daily Activity", ["course", "lesson", "activity_date"])
+	frappe.db.add_index("LMS Daily Activity", ["lesson", "activity_date"])
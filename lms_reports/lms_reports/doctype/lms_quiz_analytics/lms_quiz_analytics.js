@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Gulinur and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("LMS Quiz Analytics", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -1,9 +1,27 @@
 # Copyright (c) 2026, Gulinur and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from lms_reports.lms_reports.activity import update_daily_activity
+from lms_reports.lms_reports.engagement import clear_engagement_cache
+from lms_reports.lms_reports.realtime import queue_lesson_update
 
 
 class LMSStudentLessonLog(Document):
-	pass
+	def before_insert(self):
+		# Never NULL, so paging by it can use its index
+		if not self.last_watched_timestamp:
+			self.last_watched_timestamp = now_datetime()
+
+	def on_update(self):
+		queue_lesson_update(self)
+		update_daily_activity(self)
+		clear_engagement_cache(self)
+
+
+def on_doctype_update():
+	# Per-lesson aggregates of a course (completion funnel) read only this index range
+	frappe.db.add_index("LMS Student Lesson Log", ["course", "lesson"])
@@ -0,0 +1,294 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Per-lesson engagement analytics from LMS Watch History.
+
+For one lesson:
+- retention: students who watched each fixed-size time bucket of the video
+- drop-off: students whose furthest position falls in each bucket
+- speeds: watched seconds and students per playback speed
+
+History is read in chunks of lesson logs (one log per student) and bucketed
+with NumPy when it is installed, in plain Python otherwise. Results are cached
+per lesson and dropped when a log of the lesson gets new history rows.
+History moved to LMS Watch History Archive is not included.
+"""
+
+import math
+
+import frappe
+from frappe.query_builder.functions import Max
+from frappe.utils import cint, flt, now_datetime
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+LOG_DOCTYPE = "LMS Student Lesson Log"
+HISTORY_DOCTYPE = "LMS Watch History"
+
+ANALYTICS_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+DEFAULT_BUCKET_SECONDS = 30
+# Buckets are widened to stay under this count for long videos
+MAX_BUCKETS = 200
+
+# Lesson logs whose history is read per query
+LOG_CHUNK_SIZE = 500
+
+ENGAGEMENT_CACHE_TTL = 24 * 60 * 60
+
+DEFAULT_SPEED = "1x"
+
+
+def get_engagement_key(lesson):
+	return f"lms_reports:engagement:{lesson}"
+
+
+def clear_engagement_cache(doc):
+	"""
+	Drop cached analytics of the lesson when a lesson log got new history rows
+
+	Args:
+		doc: LMS Student Lesson Log document, called from its on_update
+	"""
+	before = doc.get_doc_before_save()
+	if len(doc.watch_history) != len(before.watch_history if before else []):
+		frappe.cache().delete_value(get_engagement_key(doc.lesson))
+
+
+def clear_lessons_engagement_cache(lessons):
+	"""Drop cached analytics of lessons whose history was rewritten outside document saves"""
+	lessons = {lesson for lesson in lessons if lesson}
+	if lessons:
+		frappe.cache().delete_value([get_engagement_key(lesson) for lesson in lessons])
+
+
+@frappe.whitelist()
+def get_lesson_engagement(lesson, bucket_seconds=DEFAULT_BUCKET_SECONDS, refresh=0):
+	"""
+	Retention histogram, drop-off and speed distribution of a lesson's video
+
+	Args:
+		lesson: Course Lesson name
+		bucket_seconds: bucket size in seconds, widened for long videos
+		refresh: recompute even if cached
+
+	Returns:
+		dict with `buckets` (bucket start seconds), `retention`,
+		`retention_percentage`, `drop_off`, `speeds` and `students`
+	"""
+	frappe.only_for(ANALYTICS_ROLES)
+
+	bucket_seconds = max(cint(bucket_seconds) or DEFAULT_BUCKET_SECONDS, 1)
+	cache = frappe.cache()
+	cache_key = get_engagement_key(lesson)
+
+	if not cint(refresh):
+		cached = cache.hget(cache_key, str(bucket_seconds))
+		if cached:
+			return cached
+
+	result = compute_lesson_engagement(lesson, bucket_seconds)
+	cache.hset(cache_key, str(bucket_seconds), result)
+	cache.expire(cache.make_key(cache_key), ENGAGEMENT_CACHE_TTL)
+	return result
+
+
+def compute_lesson_engagement(lesson, bucket_seconds=DEFAULT_BUCKET_SECONDS):
+	"""Aggregate the watch history of all logs of a lesson, see `get_lesson_engagement`"""
+	logs = frappe.get_all(
+		LOG_DOCTYPE, filters={"lesson": lesson}, fields=["name", "video_total_duration"], order_by="name asc"
+	)
+
+	duration = max([flt(log.video_total_duration) for log in logs] or [0]) or get_max_position(lesson)
+	bucket_seconds = get_bucket_seconds(duration, bucket_seconds)
+	bucket_count = max(math.ceil(duration / bucket_seconds), 1)
+
+	totals = {
+		"students": 0,
+		"retention": [0] * bucket_count,
+		"drop_off": [0] * bucket_count,
+		"speed_seconds": {},
+		"speed_students": {},
+	}
+	for start in range(0, len(logs), LOG_CHUNK_SIZE):
+		chunk = [log.name for log in logs[start : start + LOG_CHUNK_SIZE]]
+		segments = get_segments(chunk)
+		if segments:
+			merge_summary(totals, summarize_segments(segments, len(chunk), bucket_seconds, bucket_count))
+
+	students = totals["students"]
+	total_seconds = sum(totals["speed_seconds"].values())
+	speeds = [
+		{
+			"speed": speed,
+			"seconds": flt(seconds, 1),
+			"students": totals["speed_students"][speed],
+			"percentage": flt(seconds / total_seconds * 100, 1) if total_seconds else 0,
+		}
+		for speed, seconds in totals["speed_seconds"].items()
+	]
+	speeds.sort(key=lambda row: row["seconds"], reverse=True)
+
+	return {
+		"lesson": lesson,
+		"duration": flt(duration, 1),
+		"bucket_seconds": bucket_seconds,
+		"students": students,
+		"buckets": [i * bucket_seconds for i in range(bucket_count)],
+		"retention": totals["retention"],
+		"retention_percentage": [
+			flt(count / students * 100, 1) if students else 0 for count in totals["retention"]
+		],
+		"drop_off": totals["drop_off"],
+		"speeds": speeds,
+		"computed_at": str(now_datetime()),
+	}
+
+
+def get_bucket_seconds(duration, bucket_seconds):
+	"""Bucket size, widened so the video fits in MAX_BUCKETS buckets"""
+	return max(bucket_seconds, math.ceil(flt(duration) / MAX_BUCKETS))
+
+
+def get_max_position(lesson):
+	"""Furthest watched position of a lesson, for logs without a video duration"""
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+	History = frappe.qb.DocType(HISTORY_DOCTYPE)
+	result = (
+		frappe.qb.from_(History)
+		.join(Log)
+		.on(History.parent == Log.name)
+		.select(Max(History.end_time))
+		.where(History.parenttype == LOG_DOCTYPE)
+		.where(Log.lesson == lesson)
+	).run()
+	return flt(result[0][0]) if result else 0
+
+
+def get_segments(log_names):
+	"""
+	Watch history of some lesson logs as (row, start, end, speed) tuples
+
+	`row` is the index of the log in `log_names`, so every student gets a
+	dense row number within the chunk.
+	"""
+	History = frappe.qb.DocType(HISTORY_DOCTYPE)
+	rows = (
+		frappe.qb.from_(History)
+		.select(History.parent, History.start_time, History.end_time, History.video_speed)
+		.where(History.parenttype == LOG_DOCTYPE)
+		.where(History.parent.isin(log_names))
+	).run()
+
+	index = {name: i for i, name in enumerate(log_names)}
+	return [
+		(index[parent], flt(start), flt(end), speed or DEFAULT_SPEED) for parent, start, end, speed in rows
+	]
+
+
+def summarize_segments(segments, row_count, bucket_seconds, bucket_count):
+	"""
+	Bucket the segments of one chunk
+
+	Args:
+		segments: (row, start, end, speed) tuples, rows in range(row_count)
+		row_count: students in the chunk
+		bucket_seconds: bucket size
+		bucket_count: buckets of the video; positions past the end fall in the last one
+
+	Returns:
+		dict with `students`, `retention` and `drop_off` (per bucket),
+		`speed_seconds` and `speed_students` (per speed)
+	"""
+	if np is not None:
+		return _summarize_numpy(segments, row_count, bucket_seconds, bucket_count)
+
+	return _summarize_python(segments, row_count, bucket_seconds, bucket_count)
+
+
+def _summarize_numpy(segments, row_count, bucket_seconds, bucket_count):
+	rows = np.fromiter((s[0] for s in segments), dtype=np.int64, count=len(segments))
+	starts = np.fromiter((s[1] for s in segments), dtype=np.float64, count=len(segments))
+	ends = np.fromiter((s[2] for s in segments), dtype=np.float64, count=len(segments))
+	speeds = np.array([s[3] for s in segments], dtype=object)
+
+	# Coverage per (student, bucket) as a difference array summed along the row
+	valid = ends > starts
+	first = np.clip(starts[valid] // bucket_seconds, 0, bucket_count - 1).astype(np.int64)
+	last = np.clip(np.ceil(ends[valid] / bucket_seconds) - 1, first - 1, bucket_count - 1).astype(np.int64)
+	diff = np.zeros((row_count, bucket_count + 1), dtype=np.int32)
+	np.add.at(diff, (rows[valid], first), 1)
+	np.add.at(diff, (rows[valid], last + 1), -1)
+	covered = np.cumsum(diff[:, :bucket_count], axis=1) > 0
+
+	furthest = np.full(row_count, -np.inf)
+	np.maximum.at(furthest, rows, ends)
+	watched = np.zeros(row_count, dtype=bool)
+	watched[rows] = True
+	stops = np.clip(furthest[watched] // bucket_seconds, 0, bucket_count - 1).astype(np.int64)
+
+	labels, inverse = np.unique(speeds, return_inverse=True)
+	seconds = np.bincount(inverse, weights=np.where(valid, ends - starts, 0), minlength=len(labels))
+	pairs = np.unique(rows * len(labels) + inverse)
+	students = np.bincount(pairs % len(labels), minlength=len(labels))
+
+	return {
+		"students": int(watched.sum()),
+		"retention": covered.sum(axis=0).tolist(),
+		"drop_off": np.bincount(stops, minlength=bucket_count).tolist(),
+		"speed_seconds": {str(label): float(s) for label, s in zip(labels, seconds, strict=True)},
+		"speed_students": {str(label): int(n) for label, n in zip(labels, students, strict=True)},
+	}
+
+
+def _summarize_python(segments, row_count, bucket_seconds, bucket_count):
+	covered = [set() for _ in range(row_count)]
+	furthest = {}
+	speed_seconds = {}
+	speed_rows = {}
+
+	for row, start, end, speed in segments:
+		furthest[row] = max(furthest.get(row, end), end)
+		speed_rows.setdefault(speed, set()).add(row)
+		speed_seconds.setdefault(speed, 0.0)
+		if end <= start:
+			continue
+
+		speed_seconds[speed] += end - start
+		first = min(max(int(start // bucket_seconds), 0), bucket_count - 1)
+		last = min(math.ceil(end / bucket_seconds) - 1, bucket_count - 1)
+		covered[row].update(range(first, last + 1))
+
+	retention = [0] * bucket_count
+	for buckets in covered:
+		for bucket in buckets:
+			retention[bucket] += 1
+
+	drop_off = [0] * bucket_count
+	for position in furthest.values():
+		drop_off[min(max(int(position // bucket_seconds), 0), bucket_count - 1)] += 1
+
+	return {
+		"students": len(furthest),
+		"retention": retention,
+		"drop_off": drop_off,
+		"speed_seconds": speed_seconds,
+		"speed_students": {speed: len(rows) for speed, rows in speed_rows.items()},
+	}
+
+
+def merge_summary(totals, summary):
+	"""Add the summary of one chunk to the running totals"""
+	totals["students"] += summary["students"]
+	for key in ("retention", "drop_off"):
+		totals[key] = [a + b for a, b in zip(totals[key], summary[key], strict=True)]
+
+	for speed, seconds in summary["speed_seconds"].items():
+		totals["speed_seconds"][speed] = totals["speed_seconds"].get(speed, 0) + seconds
+		totals["speed_students"][speed] = (
+			totals["speed_students"].get(speed, 0) + summary["speed_students"][speed]
+		)
@@ -5,6 +5,7 @@ import frappe
 from frappe.utils import now_datetime, flt, cint
 from lms.lms.doctype.course_lesson.course_lesson import save_progress
 from lms_reports.lms_reports.api import check_and_update_log_completion
+from lms_reports.progress_tracker import clear_member_progress_cache
 
 
 def on_quiz_submit(doc, method):
@@ -63,6 +64,7 @@ def on_quiz_submit(doc, method):
         if percentage >= 100:
             try:
                 save_progress(lesson, course)
+                clear_member_progress_cache(course, [student])
                 check_and_update_log_completion(log_doc, student, lesson)
             except Exception as e:
                 frappe.log_error(f"Failed to sync LMS progress: {str(e)}", "LMS Reports - Quiz Tracking")
@@ -2,6 +2,7 @@ import frappe
 from frappe.utils import now_datetime, flt
 from lms.lms.doctype.course_lesson.course_lesson import save_progress
 from lms_reports.lms_reports.api import check_and_update_log_completion
+from lms_reports.progress_tracker import clear_member_progress_cache
 
 
 def on_video_watch(doc, method):
@@ -61,6 +62,7 @@ def on_video_watch(doc, method):
         if flt(log_doc.completion_percentage) >= 100:
             try:
                 save_progress(lesson, course)
+                clear_member_progress_cache(course, [student])
                 check_and_update_log_completion(log_doc, student, lesson)
             except Exception:
                 frappe.log_error("Failed to update standard LMS progress")
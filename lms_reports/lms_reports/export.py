@@ -0,0 +1,285 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Streaming export of LMS Student Lesson Log with its LMS Watch History rows.
+
+Logs are read in keyset-ordered chunks (see the Student Progress Report) and
+their history in pages keyed on (parent, idx), so memory stays bounded by the
+chunk and page sizes whatever the number of rows. Archived logs (see
+`archive.py`) are exported after the hot ones when `include_archived` is set. Output is written incrementally as:
+- csv: one row per watch history entry, log fields repeated
+- jsonl: one line per log with its history nested
+
+Every chunk ends on a cursor; passing it back as `after` resumes the export.
+The download endpoint writes at most MAX_DOWNLOAD_LOGS logs per request and
+returns the cursor, so large exports are fetched in several calls.
+"""
+
+import csv
+import gzip
+import io
+import json
+import tempfile
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from lms_reports.lms_reports.archive import ARCHIVE_DOCTYPE, should_include_archive
+from lms_reports.lms_reports.report.student_progress_report.student_progress_report import (
+	get_conditions,
+	iter_lesson_logs,
+)
+from lms_reports.lms_reports.watch_history import decompress_rows
+
+FORMATS = ("csv", "jsonl")
+
+# Logs per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+# Watch history rows per query
+HISTORY_PAGE_SIZE = 5000
+
+# Cursors of archived logs, which are exported after the hot ones
+ARCHIVE_CURSOR_PREFIX = "archive:"
+
+# Logs written per download request, so one request stays within the request timeout
+MAX_DOWNLOAD_LOGS = 20000
+
+LOG_FIELDS = [
+	"student",
+	"student_name",
+	"course",
+	"chapter",
+	"lesson",
+	"completion_percentage",
+	"is_completed",
+	"video_speed",
+	"watched_duration",
+	"video_total_duration",
+	"last_watched_timestamp",
+	"quiz_attempts",
+	"quiz_best_score",
+	"quiz_passed_at_attempt",
+]
+
+HISTORY_FIELDS = ["watched_at", "video_speed", "start_time", "end_time", "duration_watched"]
+
+EXPORT_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+
+def iter_watch_history(log_names, page_size=HISTORY_PAGE_SIZE):
+	"""
+	Yield (log name, history rows in idx order) for the given logs that have history
+
+	History is read in pages keyed on (parent, idx), so only one page is held
+	in memory besides the rows of the log being yielded. Logs come in the same
+	order as a name-ordered read of the logs.
+	"""
+	if not log_names:
+		return
+
+	History = frappe.qb.DocType("LMS Watch History")
+	parent = rows = None
+	last = None
+	while True:
+		query = (
+			frappe.qb.from_(History)
+			.select(History.parent, History.idx, *(History[f] for f in HISTORY_FIELDS))
+			.where(History.parenttype == "LMS Student Lesson Log")
+			.where(History.parent.isin(log_names))
+			.orderby(History.parent)
+			.orderby(History.idx)
+			.limit(page_size)
+		)
+		if last:
+			query = query.where(
+				(History.parent > last[0]) | ((History.parent == last[0]) & (History.idx > last[1]))
+			)
+
+		page = query.run(as_dict=True)
+		for row in page:
+			if row.parent != parent:
+				if rows:
+					yield parent, rows
+				parent, rows = row.parent, []
+			rows.append({f: row[f] for f in HISTORY_FIELDS})
+
+		if len(page) < page_size:
+			break
+		last = (page[-1].parent, page[-1].idx)
+
+	if rows:
+		yield parent, rows
+
+
+def iter_archived_history(logs):
+	"""Yield (log name, history rows) for archived logs, decompressed one log at a time"""
+	for log in logs:
+		yield log.name, decompress_rows(log.pop("compressed_history", None))
+
+
+def pair_history(logs, history):
+	"""Yield (log, watch history) for name-ordered logs and their name-ordered history"""
+	history = iter(history)
+	pending = next(history, None)
+	for log in logs:
+		if pending and pending[0] == log.name:
+			yield log, pending[1]
+			pending = next(history, None)
+		else:
+			yield log, []
+
+
+def iter_export_chunks(filters=None, after=None, chunk_size=EXPORT_CHUNK_SIZE):
+	"""
+	Yield chunks of logs ordered by name, each an iterator of (log, watch history) pairs
+
+	Hot logs come first. With `include_archived` set in the filters, the logs
+	of LMS Student Lesson Log Archive follow, marked with `archived: 1` and
+	with cursors prefixed by ARCHIVE_CURSOR_PREFIX.
+
+	Args:
+		filters: report filters (student, course, lesson, is_completed, include_archived)
+		after: resume after this cursor
+		chunk_size: logs per chunk
+	"""
+	conditions = get_conditions(filters)
+	include_archived = should_include_archive((filters or {}).get("include_archived"))
+
+	if not (after or "").startswith(ARCHIVE_CURSOR_PREFIX):
+		for chunk in iter_lesson_logs(conditions, LOG_FIELDS, chunk_size, after):
+			yield pair_history(chunk, iter_watch_history([log.name for log in chunk]))
+		after = None
+	else:
+		after = after[len(ARCHIVE_CURSOR_PREFIX) :]
+
+	if not include_archived:
+		return
+
+	fields = [*LOG_FIELDS, "compressed_history"]
+	for chunk in iter_lesson_logs(conditions, fields, chunk_size, after, doctype=ARCHIVE_DOCTYPE):
+		for log in chunk:
+			log.archived = 1
+		yield pair_history(chunk, iter_archived_history(chunk))
+
+
+def get_cursor(log):
+	return ARCHIVE_CURSOR_PREFIX + log.name if log.get("archived") else log.name
+
+
+def write_export(
+	fileobj, filters=None, fmt="csv", compress=False, after=None, header=True, on_chunk=None, limit=None
+):
+	"""
+	Write lesson logs with their watch history to a binary file object
+
+	Args:
+		fileobj: binary file object to write to
+		filters: report filters (student, course, lesson, is_completed, include_archived)
+		fmt: "csv" or "jsonl"
+		compress: gzip the output
+		after: resume after this cursor
+		header: write the CSV header row (skip it when appending to a resumed file)
+		on_chunk: called as on_chunk(logs_written, cursor) after each chunk is flushed
+		limit: stop after this many logs
+
+	Returns:
+		(logs written, cursor) where cursor identifies the last log written, see `get_cursor`
+	"""
+	if fmt not in FORMATS:
+		frappe.throw(_("Export format must be one of: {0}").format(", ".join(FORMATS)))
+
+	raw = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+	out = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+
+	writer = None
+	if fmt == "csv":
+		writer = csv.writer(out)
+		if header:
+			writer.writerow(["name", *LOG_FIELDS, "archived", *("history_" + f for f in HISTORY_FIELDS)])
+
+	limit = cint(limit)
+	chunk_size = min(EXPORT_CHUNK_SIZE, limit) if limit > 0 else EXPORT_CHUNK_SIZE
+
+	count = 0
+	cursor = after
+	try:
+		for chunk in iter_export_chunks(filters, after, chunk_size):
+			for log, history in chunk:
+				if writer:
+					write_csv_rows(writer, log, history)
+				else:
+					out.write(json.dumps({**log, "watch_history": history}, default=str) + "\n")
+
+				count += 1
+				cursor = get_cursor(log)
+				if limit > 0 and count >= limit:
+					break
+
+			out.flush()
+			if on_chunk:
+				on_chunk(count, cursor)
+			if limit > 0 and count >= limit:
+				break
+	finally:
+		# Detach so closing the wrapper doesn't close the caller's file
+		out.flush()
+		out.detach()
+		if compress:
+			raw.close()
+
+	return count, cursor
+
+
+def write_csv_rows(writer, log, history):
+	log_values = [log.name, *(log.get(f) for f in LOG_FIELDS), log.get("archived", 0)]
+	if not history:
+		writer.writerow(log_values + [None] * len(HISTORY_FIELDS))
+		return
+
+	for entry in history:
+		writer.writerow(log_values + [entry.get(f) for f in HISTORY_FIELDS])
+
+
+@frappe.whitelist()
+def download_lesson_logs(filters=None, file_format="csv", compress=0, after=None, limit=MAX_DOWNLOAD_LOGS):
+	"""
+	Download lesson logs with watch history as CSV or JSONL
+
+	The export is spooled to a temporary file and streamed from disk, so the
+	worker never holds the whole export in memory. At most `limit` logs (up to
+	MAX_DOWNLOAD_LOGS) are written per request. When the limit is reached the
+	cursor of the last log is returned in the X-LMS-Export-Cursor header; call
+	again with `after` set to it until no cursor is returned. Resumed CSV
+	parts have no header row, so the parts can be concatenated.
+	"""
+	from werkzeug.wrappers import Response
+	from werkzeug.wsgi import wrap_file
+
+	frappe.only_for(EXPORT_ROLES)
+
+	if isinstance(filters, str):
+		filters = json.loads(filters or "{}")
+	compress = cint(compress)
+	limit = min(max(cint(limit), 1), MAX_DOWNLOAD_LOGS)
+
+	spool = tempfile.TemporaryFile()
+	count, cursor = write_export(spool, filters, file_format, compress, after, header=not after, limit=limit)
+	spool.seek(0)
+
+	filename = f"lesson_logs.{file_format}{'.gz' if compress else ''}"
+	response = Response(
+		wrap_file(frappe.local.request.environ, spool),
+		mimetype="application/gzip"
+		if compress
+		else ("text/csv" if file_format == "csv" else "application/x-ndjson"),
+		direct_passthrough=True,
+	)
+	response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+	response.headers["X-LMS-Export-Count"] = str(count)
+	if count >= limit:
+		response.headers["X-LMS-Export-Cursor"] = cursor
+
+	return response
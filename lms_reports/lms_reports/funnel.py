@@ -0,0 +1,165 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Course completion funnel.
+
+For each lesson in outline order: how many enrolled students started it,
+watched it up to the course's watched threshold, passed its quiz and
+completed it. Every stage is one grouped query over the whole course, so the
+cost does not grow with students x lessons in Python.
+"""
+
+import frappe
+from frappe.query_builder.functions import Count, IfNull
+from frappe.utils import cint, flt, now_datetime
+from pypika.functions import NullIf
+from pypika.terms import Case
+
+from lms_reports.lms_reports.api import get_course_lessons_ordered
+from lms_reports.progress_tracker import DEFAULT_PASSING_PERCENTAGE, get_progress_weighting
+
+FUNNEL_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+# Seconds a computed funnel is served from cache
+FUNNEL_CACHE_TTL = 60
+
+STAGES = ["started", "watched", "quiz_passed", "completed"]
+
+
+def get_funnel_key(course):
+	return f"lms_reports:course_funnel:{course}"
+
+
+def clear_funnel_cache(course):
+	"""Drop the cached funnel of a course after writes that skip document hooks"""
+	frappe.cache().delete_value(get_funnel_key(course))
+
+
+@frappe.whitelist()
+def get_course_funnel(course, refresh=0):
+	"""
+	Completion funnel of a course
+
+	Args:
+		course: LMS Course name
+		refresh: recompute even if cached
+
+	Returns:
+		dict: {
+			'course', 'enrolled', 'watched_threshold', 'computed_at',
+			'lessons': [{lesson, title, chapter_idx, lesson_idx, has_quiz,
+				started, watched, quiz_passed, completed, <stage>_percentage}]
+		}
+	"""
+	frappe.only_for(FUNNEL_ROLES)
+
+	cache = frappe.cache()
+	if not cint(refresh):
+		cached = cache.get_value(get_funnel_key(course))
+		if cached:
+			return cached
+
+	funnel = compute_course_funnel(course)
+	cache.set_value(get_funnel_key(course), funnel, expires_in_sec=FUNNEL_CACHE_TTL)
+	return funnel
+
+
+def compute_course_funnel(course):
+	"""Compute the funnel of a course with one query per stage, see `get_course_funnel`"""
+	threshold = flt(get_progress_weighting(course).watched_threshold)
+	enrolled = frappe.db.count("LMS Enrollment", {"course": course})
+
+	log_counts = get_log_counts(course, threshold)
+	quiz_passed = get_quiz_passed_counts(course)
+	completed = get_completed_counts(course)
+	quiz_lessons = set(
+		frappe.get_all("Course Lesson", filters={"course": course, "quiz_id": ["is", "set"]}, pluck="name")
+	)
+
+	lessons = []
+	for lesson in get_course_lessons_ordered(course):
+		name = lesson["lesson"]
+		row = {
+			**lesson,
+			"has_quiz": int(name in quiz_lessons),
+			"started": log_counts.get(name, (0, 0))[0],
+			"watched": log_counts.get(name, (0, 0))[1],
+			"quiz_passed": quiz_passed.get(name, 0),
+			"completed": completed.get(name, 0),
+		}
+		for stage in STAGES:
+			row[f"{stage}_percentage"] = flt(row[stage] / enrolled * 100, 1) if enrolled else 0
+		lessons.append(row)
+
+	return {
+		"course": course,
+		"enrolled": enrolled,
+		"watched_threshold": threshold,
+		"lessons": lessons,
+		"computed_at": str(now_datetime()),
+	}
+
+
+def get_log_counts(course, threshold):
+	"""
+	{lesson: (started, watched)} of enrolled students, from their lesson logs
+
+	Watched counts video progress only: a lesson marked complete without
+	reaching the threshold is completed, not watched. Both stages count
+	distinct students, so a student enrolled twice is counted once.
+	"""
+	Log = frappe.qb.DocType("LMS Student Lesson Log")
+	Enrollment = frappe.qb.DocType("LMS Enrollment")
+	watched = Count(Case().when(Log.completion_percentage >= threshold, Log.student)).distinct()
+
+	rows = (
+		frappe.qb.from_(Log)
+		.join(Enrollment)
+		.on((Enrollment.member == Log.student) & (Enrollment.course == Log.course))
+		.select(Log.lesson, Count(Log.student).distinct(), watched)
+		.where(Log.course == course)
+		.groupby(Log.lesson)
+	).run()
+	return {lesson: (cint(started), cint(watched)) for lesson, started, watched in rows}
+
+
+def get_quiz_passed_counts(course):
+	"""{lesson: enrolled students with a submission at or above the quiz passing percentage}"""
+	Lesson = frappe.qb.DocType("Course Lesson")
+	Quiz = frappe.qb.DocType("LMS Quiz")
+	Submission = frappe.qb.DocType("LMS Quiz Submission")
+	Enrollment = frappe.qb.DocType("LMS Enrollment")
+	passing_percentage = IfNull(NullIf(Quiz.passing_percentage, 0), DEFAULT_PASSING_PERCENTAGE)
+
+	rows = (
+		frappe.qb.from_(Lesson)
+		.join(Quiz)
+		.on(Quiz.name == Lesson.quiz_id)
+		.join(Submission)
+		.on(Submission.quiz == Quiz.name)
+		.join(Enrollment)
+		.on((Enrollment.member == Submission.member) & (Enrollment.course == course))
+		.select(Lesson.name, Count(Submission.member).distinct())
+		.where(Lesson.course == course)
+		.where(Submission.percentage >= passing_percentage)
+		.groupby(Lesson.name)
+	).run()
+	return {lesson: cint(count) for lesson, count in rows}
+
+
+def get_completed_counts(course):
+	"""{lesson: enrolled students who completed it in LMS Course Progress}"""
+	Progress = frappe.qb.DocType("LMS Course Progress")
+	Enrollment = frappe.qb.DocType("LMS Enrollment")
+
+	rows = (
+		frappe.qb.from_(Progress)
+		.join(Enrollment)
+		.on((Enrollment.member == Progress.member) & (Enrollment.course == Progress.course))
+		.select(Progress.lesson, Count(Progress.member).distinct())
+		.where(Progress.course == course)
+		.where(Progress.status == "Complete")
+		.groupby(Progress.lesson)
+	).run()
+	return {lesson: cint(count) for lesson, count in rows}
@@ -0,0 +1,332 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Per-course leaderboard by weighted progress.
+
+Each course has a Redis sorted set of its enrolled members. The score packs
+the overall progress (higher first) and the time that progress was reached
+(earlier first) into one exact float, so rank and top-K lookups are single
+O(log n) sorted set commands.
+
+The progress writers update a member's entry whenever enrollment progress
+is recalculated. A daily job rebuilds every course's set from LMS Enrollment
+and the lesson logs and swaps it in atomically, which also removes members
+that are no longer enrolled. A board whose key is missing (evicted or
+flushed) is rebuilt the same way before it is read or written.
+
+`LocalLeaderboard` has the same interface in process memory, for tests.
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime
+
+import frappe
+from frappe import _
+from frappe.query_builder.functions import Max
+from frappe.utils import cint, flt, get_datetime, now_datetime
+
+LEADERBOARD_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+# Progress is kept with 2 decimals: score = progress * 100 * TIME_SPAN + (TIME_SPAN - 1 - timestamp)
+TIME_SPAN = 10**10
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+# Enrollments read per query while rebuilding
+REBUILD_CHUNK_SIZE = 1000
+
+
+def encode_score(progress, reached_at):
+	"""Sort score of a member, higher is better"""
+	timestamp = min(max(int(get_datetime(reached_at).timestamp()), 0), TIME_SPAN - 1)
+	return float(round(flt(progress) * 100) * TIME_SPAN + (TIME_SPAN - 1 - timestamp))
+
+
+def decode_score(score):
+	"""(progress, reached_at) from a score"""
+	units, remainder = divmod(int(score), TIME_SPAN)
+	return units / 100, datetime.fromtimestamp(TIME_SPAN - 1 - remainder)
+
+
+def get_leaderboard_key(course):
+	return f"lms_reports:leaderboard:{course}"
+
+
+class RedisLeaderboard:
+	"""Leaderboard of a course in a Redis sorted set"""
+
+	def __init__(self, course):
+		self.cache = frappe.cache()
+		self.key = self.cache.make_key(get_leaderboard_key(course))
+		self.staging_key = self.cache.make_key(get_leaderboard_key(course) + ":rebuild")
+
+	def set_scores(self, scores):
+		if scores:
+			self.cache.zadd(self.key, scores)
+
+	def get_score(self, member):
+		return self.cache.zscore(self.key, member)
+
+	def remove(self, member):
+		self.cache.zrem(self.key, member)
+
+	def rank(self, member):
+		"""0-based rank, None if the member is not on the board"""
+		return self.cache.zrevrank(self.key, member)
+
+	def top(self, count, offset=0):
+		"""[(member, score)] from the best down"""
+		rows = self.cache.zrevrange(self.key, offset, offset + count - 1, withscores=True)
+		return [(frappe.safe_decode(member), score) for member, score in rows]
+
+	def count(self):
+		return self.cache.zcard(self.key)
+
+	def replace(self, scores):
+		"""Replace the whole board at once; readers see either the old or the new one"""
+		if not scores:
+			self.cache.delete(self.key)
+			return
+
+		pipeline = self.cache.pipeline()
+		pipeline.delete(self.staging_key)
+		pipeline.zadd(self.staging_key, scores)
+		pipeline.rename(self.staging_key, self.key)
+		pipeline.execute()
+
+
+class LocalLeaderboard:
+	"""
+	In-memory stand-in for `RedisLeaderboard`, ordered the same way
+
+	Like a Redis sorted set, entries are kept in ascending (score, member)
+	order and read from the end, so equal scores rank the greater member first.
+	"""
+
+	def __init__(self, course=None):
+		self.scores = {}
+		self.entries = []  # sorted (score, member)
+
+	def set_scores(self, scores):
+		for member, score in scores.items():
+			self.remove(member)
+			self.scores[member] = score
+			insort(self.entries, (score, member))
+
+	def get_score(self, member):
+		return self.scores.get(member)
+
+	def remove(self, member):
+		score = self.scores.pop(member, None)
+		if score is not None:
+			self.entries.pop(bisect_left(self.entries, (score, member)))
+
+	def rank(self, member):
+		score = self.scores.get(member)
+		if score is None:
+			return None
+		return len(self.entries) - 1 - bisect_left(self.entries, (score, member))
+
+	def top(self, count, offset=0):
+		end = len(self.entries) - offset
+		if end <= 0:
+			return []
+		return [(member, score) for score, member in reversed(self.entries[max(end - count, 0) : end])]
+
+	def count(self):
+		return len(self.entries)
+
+	def replace(self, scores):
+		self.scores = {}
+		self.entries = []
+		self.set_scores(scores)
+
+
+def get_leaderboard(course):
+	return RedisLeaderboard(course)
+
+
+def ensure_leaderboard(course, board=None):
+	"""
+	The leaderboard of a course, rebuilt from the database first when it is empty
+
+	Redis may evict or flush the key; reads and writes on a missing board
+	would otherwise rank only the members updated since.
+	"""
+	board = board or get_leaderboard(course)
+	if not board.count():
+		rebuild_leaderboard(course, board)
+	return board
+
+
+def update_leaderboard(course, progress_by_member, board=None):
+	"""
+	Record recalculated progress of members of a course
+
+	A member whose progress did not change keeps the time it was first
+	reached, so re-computations don't move them down among equals.
+
+	Args:
+		course: LMS Course name
+		progress_by_member: {member: overall progress}
+		board: leaderboard to update, the course's Redis board by default
+	"""
+	now = now_datetime()
+	try:
+		board = ensure_leaderboard(course, board)
+
+		scores = {}
+		for member, progress in progress_by_member.items():
+			current = board.get_score(member)
+			if current is not None and int(current) // TIME_SPAN == round(flt(progress) * 100):
+				continue
+			scores[member] = encode_score(progress, now)
+
+		board.set_scores(scores)
+	except Exception:
+		# The daily rebuild repairs the board, progress writes must not fail for it
+		frappe.log_error(f"Failed to update leaderboard of {course}", "LMS Reports - Leaderboard")
+
+
+def remove_enrollment(doc, method=None):
+	"""Take a deleted enrollment off its course's leaderboard, called from LMS Enrollment on_trash"""
+	try:
+		get_leaderboard(doc.course).remove(doc.member)
+	except Exception:
+		frappe.log_error(f"Failed to update leaderboard of {doc.course}", "LMS Reports - Leaderboard")
+
+
+def get_course_scores(course):
+	"""
+	Scores of all members of a course from the database
+
+	Members are ordered by LMS Enrollment.progress, ties broken by their
+	latest lesson log activity (or enrollment creation without one).
+	"""
+	Log = frappe.qb.DocType("LMS Student Lesson Log")
+	scores = {}
+	after = None
+	while True:
+		filters = {"course": course}
+		if after:
+			filters["name"] = [">", after]
+
+		chunk = frappe.get_all(
+			"LMS Enrollment",
+			filters=filters,
+			fields=["name", "member", "progress", "creation"],
+			order_by="name asc",
+			limit_page_length=REBUILD_CHUNK_SIZE,
+		)
+		if not chunk:
+			break
+
+		last_activity = dict(
+			(
+				frappe.qb.from_(Log)
+				.select(Log.student, Max(Log.last_watched_timestamp))
+				.where(Log.course == course)
+				.where(Log.student.isin([row.member for row in chunk]))
+				.groupby(Log.student)
+			).run()
+		)
+		for row in chunk:
+			scores[row.member] = encode_score(row.progress, last_activity.get(row.member) or row.creation)
+		after = chunk[-1].name
+
+	return scores
+
+
+def rebuild_leaderboard(course, board=None):
+	"""Rebuild the leaderboard of a course from the database and swap it in"""
+	(board or get_leaderboard(course)).replace(get_course_scores(course))
+
+
+def rebuild_leaderboards():
+	"""Daily consistency rebuild of every course leaderboard"""
+	for course in frappe.get_all("LMS Course", pluck="name"):
+		try:
+			rebuild_leaderboard(course)
+		except Exception:
+			frappe.log_error(f"Failed to rebuild leaderboard of {course}", "LMS Reports - Leaderboard")
+
+
+def check_leaderboard_access(course, member=None):
+	"""Staff see every board; learners only boards of their courses, and only their own rank"""
+	user = frappe.session.user
+	if set(frappe.get_roles(user)) & set(LEADERBOARD_ROLES):
+		return
+
+	if user == "Guest" or (member and member != user):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	if not frappe.db.exists("LMS Enrollment", {"course": course, "member": user}):
+		frappe.throw(_("You are not enrolled in this course"), frappe.PermissionError)
+
+
+@frappe.whitelist()
+def get_leaderboard_top(course, limit=DEFAULT_TOP, offset=0):
+	"""
+	Best members of a course
+
+	Returns:
+		dict: {'total', 'rows': [{rank, member, full_name, progress, reached_at}]}
+	"""
+	check_leaderboard_access(course)
+
+	limit = min(max(cint(limit) or DEFAULT_TOP, 1), MAX_TOP)
+	offset = max(cint(offset), 0)
+	board = ensure_leaderboard(course)
+	entries = board.top(limit, offset)
+
+	names = (
+		dict(
+			frappe.get_all(
+				"User",
+				filters={"name": ["in", [member for member, _score in entries]]},
+				fields=["name", "full_name"],
+				as_list=True,
+			)
+		)
+		if entries
+		else {}
+	)
+
+	rows = []
+	for position, (member, score) in enumerate(entries, start=offset + 1):
+		progress, reached_at = decode_score(score)
+		rows.append(
+			{
+				"rank": position,
+				"member": member,
+				"full_name": names.get(member) or member,
+				"progress": progress,
+				"reached_at": str(reached_at),
+			}
+		)
+
+	return {"total": board.count(), "rows": rows}
+
+
+@frappe.whitelist()
+def get_leaderboard_rank(course, member=None):
+	"""
+	Rank of a member (the current user by default) in a course
+
+	Returns:
+		dict: {'rank' (1-based, None if not on the board), 'total', 'progress'}
+	"""
+	member = member or frappe.session.user
+	check_leaderboard_access(course, member)
+
+	board = ensure_leaderboard(course)
+	rank = board.rank(member)
+	score = board.get_score(member)
+
+	return {
+		"rank": rank + 1 if rank is not None else None,
+		"total": board.count(),
+		"progress": decode_score(score)[0] if score is not None else None,
+	}
@@ -71,18 +71,37 @@ frappe.pages['student-progress-dashboard'].on_page_load = function (wrapper) {
 			
 			<div id="stats-section" style="display:none;">
 				<div class="row mb-4">
-					<div class="col-md-6">
+					<div class="col-md-4">
 						<div class="dashboard-stat-box" style="background:var(--card-bg); padding:20px; border-radius:8px; border:1px solid var(--border-color);">
 							<h5 class="text-muted">Total Students</h5>
 							<h2 id="total-students">0</h2>
 						</div>
 					</div>
-					<div class="col-md-6">
+					<div class="col-md-4">
 						<div class="dashboard-stat-box" style="background:var(--card-bg); padding:20px; border-radius:8px; border:1px solid var(--border-color);">
 							<h5 class="text-muted">Total Lessons</h5>
 							<h2 id="total-lessons">0</h2>
 						</div>
 					</div>
+					<div class="col-md-4">
+						<div class="dashboard-stat-box" style="background:var(--card-bg); padding:20px; border-radius:8px; border:1px solid var(--border-color);">
+							<h5 class="text-muted">At Risk Learners</h5>
+							<h2 id="at-risk-learners">0</h2>
+						</div>
+					</div>
+				</div>
+
+				<div class="row mb-4">
+					<div class="col-md-12">
+						<div class="card">
+							<div class="card-header">
+								<h5 class="card-title">Activity (Last 90 Days)</h5>
+							</div>
+							<div class="card-body">
+								<div id="activity-chart"></div>
+							</div>
+						</div>
+					</div>
 				</div>
 
 				<div class="row">
@@ -102,8 +121,23 @@ frappe.pages['student-progress-dashboard'].on_page_load = function (wrapper) {
 	`);
 }
 
+// Snapshot currently rendered, patched in place by realtime deltas
+let dashboard_state = {
+	page: null,
+	course: null,
+	student: null,
+	lesson: null,
+	data: null,
+	version: null,
+	subscribed_course: null
+};
+
 function render_dashboard(page, course, student, lesson) {
+	dashboard_state.page = page;
+
 	if (!course) {
+		unsubscribe_course();
+		dashboard_state.data = null;
 		$('#placeholder').show();
 		$('#stats-section').hide();
 		return;
@@ -112,6 +146,9 @@ function render_dashboard(page, course, student, lesson) {
 	$('#placeholder').hide();
 	$('#stats-section').show();
 
+	render_activity_chart(course, lesson);
+	render_at_risk_count(course);
+
 	frappe.call({
 		method: 'lms_reports.lms_reports.api.get_course_progress_summary',
 		args: {
@@ -121,12 +158,208 @@ function render_dashboard(page, course, student, lesson) {
 		},
 		callback: function (r) {
 			if (r.message) {
+				Object.assign(dashboard_state, {
+					course: course,
+					student: student,
+					lesson: lesson,
+					data: r.message,
+					version: r.message.version
+				});
 				update_dashboard(r.message, lesson);
+				subscribe_course(course);
+			}
+		}
+	});
+}
+
+// Flags stored by the hourly at-risk scan
+function render_at_risk_count(course) {
+	frappe.call({
+		method: 'lms_reports.lms_reports.at_risk.get_at_risk_learners',
+		args: {
+			course: course,
+			page_length: 1
+		},
+		callback: function (r) {
+			if (r.message) {
+				$('#at-risk-learners').text(r.message.total);
 			}
 		}
 	});
 }
 
+// Daily trend read from the LMS Daily Activity rollup
+function render_activity_chart(course, lesson) {
+	frappe.call({
+		method: 'lms_reports.lms_reports.activity.get_activity_trend',
+		args: {
+			course: course,
+			lesson: lesson,
+			days: 90
+		},
+		callback: function (r) {
+			if (!r.message) return;
+
+			let trend = r.message;
+			$('#activity-chart').empty();
+			new frappe.Chart('#activity-chart', {
+				type: 'line',
+				height: 240,
+				data: {
+					labels: trend.labels,
+					datasets: [
+						{ name: __('Active Students'), values: trend.active_students },
+						{ name: __('Watch Minutes'), values: trend.watch_seconds.map(s => Math.round(s / 60)) },
+						{ name: __('Completions'), values: trend.completions }
+					]
+				},
+				axisOptions: { xIsSeries: true, xAxisMode: 'tick' },
+				lineOptions: { hideDots: 1 }
+			});
+		}
+	});
+}
+
+// Live updates: tracking writes publish changed (student, lesson) rows to the course room
+function subscribe_course(course) {
+	if (!frappe.realtime || dashboard_state.subscribed_course === course) return;
+
+	unsubscribe_course();
+	frappe.realtime.doc_subscribe('LMS Course', course);
+	dashboard_state.subscribed_course = course;
+	dashboard_state.page.set_indicator(__('Live'), 'green');
+
+	if (!dashboard_state.listening) {
+		dashboard_state.listening = true;
+		frappe.realtime.on('lms_course_progress', (message) => {
+			if (message && message.course === dashboard_state.course) {
+				apply_course_rows(message.rows || [], message.version);
+			}
+		});
+
+		// Catch up with what was missed while disconnected
+		if (frappe.realtime.socket) {
+			frappe.realtime.socket.on('connect', () => {
+				if (dashboard_state.data) catch_up_changes();
+			});
+		}
+	}
+}
+
+function unsubscribe_course() {
+	if (frappe.realtime && dashboard_state.subscribed_course) {
+		frappe.realtime.doc_unsubscribe('LMS Course', dashboard_state.subscribed_course);
+	}
+	dashboard_state.subscribed_course = null;
+}
+
+function catch_up_changes() {
+	frappe.call({
+		method: 'lms_reports.lms_reports.api.get_course_progress_changes',
+		args: {
+			course: dashboard_state.course,
+			since: dashboard_state.version
+		},
+		callback: function (r) {
+			if (!r.message) return;
+			if (r.message.full_reload) {
+				reload_dashboard();
+			} else {
+				apply_course_rows(r.message.rows, r.message.version);
+			}
+		}
+	});
+}
+
+function reload_dashboard() {
+	render_dashboard(
+		dashboard_state.page,
+		dashboard_state.course,
+		dashboard_state.student,
+		dashboard_state.lesson
+	);
+}
+
+// Patch the snapshot with changed rows and re-render only the affected students
+function apply_course_rows(rows, version) {
+	let data = dashboard_state.data;
+	if (!data) return;
+
+	let changed_students = new Set();
+	let missing_student = false;
+
+	rows.forEach(row => {
+		if (dashboard_state.student && row.student !== dashboard_state.student) return;
+		if (dashboard_state.lesson && row.lesson !== dashboard_state.lesson) return;
+
+		let student = data.students.find(s => s.student === row.student);
+		if (!student) {
+			missing_student = true;
+			return;
+		}
+
+		// Lesson-filtered summaries only carry the filtered lesson
+		let detail = (student.specific_lesson && student.specific_lesson.lesson === row.lesson)
+			? student.specific_lesson
+			: (student.lesson_details || []).find(d => d.lesson === row.lesson);
+		if (!detail) return;
+
+		let was_completed = detail.is_completed;
+		Object.assign(detail, {
+			is_completed: row.is_completed || detail.is_completed,
+			completion_percentage: Math.max(row.completion_percentage, detail.is_completed ? 100 : 0),
+			completion_date: detail.completion_date || row.completion_date,
+			video_speed: row.video_speed || detail.video_speed,
+			last_watched_timestamp: row.last_watched_timestamp,
+			quiz_attempts: row.quiz_attempts,
+			quiz_best_score: row.quiz_best_score,
+			quiz_passed_at_attempt: row.quiz_passed_at_attempt
+		});
+
+		if (!was_completed && detail.is_completed && student.completed_lessons !== undefined) {
+			student.completed_lessons += 1;
+			let calculated = data.lesson_count ? student.completed_lessons / data.lesson_count * 100 : 0;
+			student.overall_progress = Math.max(student.overall_progress || 0, calculated);
+		}
+		if (dashboard_state.lesson) {
+			student.specific_lesson = detail;
+		}
+
+		changed_students.add(student);
+	});
+
+	if (version && (!dashboard_state.version || version > dashboard_state.version)) {
+		dashboard_state.version = version;
+	}
+
+	// A student we don't know about yet: the snapshot is incomplete
+	if (missing_student) {
+		reload_dashboard();
+		return;
+	}
+
+	changed_students.forEach(student => {
+		let rows_html = render_student_rows(student, data, dashboard_state.lesson);
+		let $rows = $('#students-table tbody > tr').filter(function () {
+			return $(this).data('student') === student.student;
+		});
+		if ($rows.length) {
+			let visible = $rows.filter('.student-details-row').is(':visible');
+			$rows.first().before(rows_html);
+			$rows.remove();
+			if (!visible) {
+				find_details_row(student.student).hide();
+			}
+		}
+	});
+}
+
+function find_details_row(student_id) {
+	return $('#students-table tr.student-details-row').filter(function () {
+		return $(this).data('student') === student_id;
+	});
+}
+
 function update_dashboard(data, lesson_filter) {
 	// Update Summary Stats
 	$('#total-students').text(data.total_students);
@@ -153,83 +386,15 @@ function update_dashboard(data, lesson_filter) {
 	`;
 
 	data.students.forEach(student => {
-		// Find most recent activity log
-		let last_active = "No activity";
-
-		// Get video speed from lesson details
-		let video_speed = '-';
-		if (student.lesson_details && student.lesson_details.length > 0) {
-			// Find the most recent non-null video speed
-			for (let ld of student.lesson_details) {
-				if (ld.video_speed) {
-					video_speed = ld.video_speed;
-					break;
-				}
-			}
-		}
-
-		// Unify progress bar with the completed lessons count
-		let progress_val = (student.completed_lessons / data.lesson_count) * 100;
-
-		if (lesson_filter && student.specific_lesson) {
-			progress_val = student.specific_lesson.completion_percentage;
-			if (student.specific_lesson.is_completed && student.specific_lesson.completion_date) {
-				last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(student.specific_lesson.completion_date)}</span>`;
-			} else if (student.specific_lesson.last_watched) {
-				last_active = frappe.datetime.comment_when(student.specific_lesson.last_watched);
-			}
-		} else {
-			// If course is 100% completed, show completion date
-			if (student.overall_progress >= 100 && student.completion_date) {
-				last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(student.completion_date)}</span>`;
-			} else if (student.lesson_details && student.lesson_details.length > 0) {
-				// Find most recent lesson activity
-				let recent_log = student.lesson_details[0];
-
-				if (recent_log.is_completed && recent_log.completion_date) {
-					last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(recent_log.completion_date)}</span>`;
-				} else if (recent_log.last_watched_timestamp) {
-					last_active = frappe.datetime.comment_when(recent_log.last_watched_timestamp);
-				} else {
-					last_active = "Just started";
-				}
-			}
-		}
-
-		html += `
-			<tr class="student-row" data-student="${student.student}" style="cursor:pointer;">
-				<td>
-					<div style="font-weight:bold;">${student.student_name}</div>
-					<div class="text-muted small">${student.student}</div>
-				</td>
-				<td>
-					<div class="progress" style="height: 20px;">
-						<div class="progress-bar ${get_progress_color(progress_val)}" role="progressbar"
-							style="width: ${progress_val}%"
-							aria-valuenow="${progress_val}" aria-valuemin="0" aria-valuemax="100">
-							${progress_val.toFixed(1)}%
-						</div>
-					</div>
-				</td>
-				<td>${student.completed_lessons} of ${data.lesson_count} completed</td>
-				<td><span class="badge" style="background: ${video_speed !== '-' ? '#17a2b8' : '#6c757d'}; color: white;">${video_speed}</span></td>
-				<td>${last_active}</td>
-			</tr>
-			<tr class="student-details-row" id="details-${student.student}" style="display:table-row;">
-				<td colspan="5" style="background:#f8f9fa; padding:20px;">
-					${render_student_details(student, lesson_filter)}
-				</td>
-			</tr>
-		`;
+		html += render_student_rows(student, data, lesson_filter);
 	});
 
 	html += `</tbody></table>`;
 	$('#students-table').html(html);
 
-	// Add click handler for expandable rows
-	$('.student-row').off('click').on('click', function () {
-		let student_id = $(this).data('student');
-		let details_row = $(`#details-${student_id}`);
+	// Add click handler for expandable rows (delegated, rows are patched live)
+	$('#students-table').off('click', '.student-row').on('click', '.student-row', function () {
+		let details_row = find_details_row($(this).data('student'));
 
 		// Toggle visibility - use hide/show instead of fade for table rows
 		if (details_row.is(':visible')) {
@@ -240,14 +405,99 @@ function update_dashboard(data, lesson_filter) {
 	});
 }
 
+function render_student_rows(student, data, lesson_filter) {
+	// Find most recent activity log
+	let last_active = "No activity";
+
+	// Get video speed from lesson details
+	let video_speed = '-';
+	if (lesson_filter && student.specific_lesson) {
+		video_speed = student.specific_lesson.video_speed || '-';
+	} else if (student.lesson_details && student.lesson_details.length > 0) {
+		// Find the most recent non-null video speed
+		for (let ld of student.lesson_details) {
+			if (ld.video_speed) {
+				video_speed = ld.video_speed;
+				break;
+			}
+		}
+	}
+
+	// Unify progress bar with the completed lessons count
+	let progress_val = student.completed_lessons !== undefined && data.lesson_count
+		? (student.completed_lessons / data.lesson_count) * 100
+		: (student.overall_progress || 0);
+
+	if (lesson_filter && student.specific_lesson) {
+		progress_val = student.specific_lesson.completion_percentage;
+		if (student.specific_lesson.is_completed && student.specific_lesson.completion_date) {
+			last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(student.specific_lesson.completion_date)}</span>`;
+		} else if (student.specific_lesson.last_watched_timestamp) {
+			last_active = frappe.datetime.comment_when(student.specific_lesson.last_watched_timestamp);
+		}
+	} else {
+		// If course is 100% completed, show completion date
+		if (student.overall_progress >= 100 && student.completion_date) {
+			last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(student.completion_date)}</span>`;
+		} else if (student.lesson_details && student.lesson_details.length > 0) {
+			// Find most recent lesson activity
+			let recent_log = student.lesson_details[0];
+
+			if (recent_log.is_completed && recent_log.completion_date) {
+				last_active = `<span class="text-success">Completed on ${frappe.datetime.str_to_user(recent_log.completion_date)}</span>`;
+			} else if (recent_log.last_watched_timestamp) {
+				last_active = frappe.datetime.comment_when(recent_log.last_watched_timestamp);
+			} else {
+				last_active = "Just started";
+			}
+		}
+	}
+
+	return `
+		<tr class="student-row" data-student="${student.student}" style="cursor:pointer;">
+			<td>
+				<div style="font-weight:bold;">${student.student_name}</div>
+				<div class="text-muted small">${student.student}</div>
+			</td>
+			<td>
+				<div class="progress" style="height: 20px;">
+					<div class="progress-bar ${get_progress_color(progress_val)}" role="progressbar"
+						style="width: ${progress_val}%"
+						aria-valuenow="${progress_val}" aria-valuemin="0" aria-valuemax="100">
+						${progress_val.toFixed(1)}%
+					</div>
+				</div>
+			</td>
+			<td>${render_completed_cell(student, data, lesson_filter)}</td>
+			<td><span class="badge" style="background: ${video_speed !== '-' ? '#17a2b8' : '#6c757d'}; color: white;">${video_speed}</span></td>
+			<td>${last_active}</td>
+		</tr>
+		<tr class="student-details-row" data-student="${student.student}" style="display:table-row;">
+			<td colspan="5" style="background:#f8f9fa; padding:20px;">
+				${render_student_details(student, lesson_filter)}
+			</td>
+		</tr>
+	`;
+}
+
+function render_completed_cell(student, data, lesson_filter) {
+	if (student.completed_lessons !== undefined) {
+		return `${student.completed_lessons} of ${data.lesson_count} completed`;
+	}
+	if (lesson_filter && student.specific_lesson) {
+		return student.specific_lesson.is_completed ? __('Lesson completed') : __('Lesson not completed');
+	}
+	return '-';
+}
+
 function render_student_details(student, lesson_filter) {
 	let details_html = '<div class="row">';
 
 	if (lesson_filter) {
 		// Show specific lesson details if lesson filter is active
 		details_html += `<div class="col-md-12"><h5>Lesson Activity Details</h5></div>`;
-		if (student.lesson_details && student.lesson_details.length > 0) {
-			details_html += render_lesson_list(student.lesson_details);
+		if (student.specific_lesson) {
+			details_html += render_lesson_list([student.specific_lesson]);
 		} else {
 			details_html += `<div class="col-md-12 text-muted">No activity recorded yet</div>`;
 		}
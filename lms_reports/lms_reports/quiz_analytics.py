@@ -0,0 +1,292 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Per-quiz attempt analytics.
+
+LMS Quiz Analytics keeps, per quiz, the students who attempted it, passed it
+(at first attempt or later) and attempted it without passing, an
+attempts-to-pass histogram and a best-score distribution. Histograms are
+stored as short JSON lists of counts.
+
+The quiz hook applies each submission's change of the lesson log counters
+(attempts, best score, attempt of the first pass) under a row lock, so
+reads never scan lesson logs. `rebuild_quiz_analytics` recomputes the rows
+from LMS Quiz Submission. As for the lesson log, a quiz counts as passed at
+100%.
+"""
+
+import json
+from itertools import groupby
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+ANALYTICS_DOCTYPE = "LMS Quiz Analytics"
+ANALYTICS_ROLES = ["System Manager", "Course Creator", "Moderator"]
+
+COUNT_FIELDS = ["students", "passed", "first_attempt_passes", "abandoned"]
+HISTOGRAM_FIELDS = ["attempts_histogram", "score_histogram"]
+
+# Attempts-to-pass buckets: 1, 2, ... the last one counts this many attempts or more
+ATTEMPT_BUCKETS = 10
+# Best-score buckets of 10%, plus one for 100%
+SCORE_BUCKETS = 11
+
+PASS_PERCENTAGE = 100
+
+# Quizzes rebuilt per query and commit
+REBUILD_CHUNK_SIZE = 50
+
+
+def get_empty_stats():
+	return frappe._dict(
+		{
+			**{field: 0 for field in COUNT_FIELDS},
+			"attempts_histogram": [0] * ATTEMPT_BUCKETS,
+			"score_histogram": [0] * SCORE_BUCKETS,
+		}
+	)
+
+
+def decode_stats(row):
+	stats = get_empty_stats()
+	for field in COUNT_FIELDS:
+		stats[field] = cint(row.get(field))
+	for field in HISTOGRAM_FIELDS:
+		values = json.loads(row.get(field) or "[]")
+		stats[field][: len(values)] = values
+
+	return stats
+
+
+def encode_stats(stats):
+	return {
+		**{field: stats[field] for field in COUNT_FIELDS},
+		**{field: json.dumps(stats[field], separators=(",", ":")) for field in HISTOGRAM_FIELDS},
+	}
+
+
+def get_score_bucket(score):
+	return min(max(int(flt(score) // 10), 0), SCORE_BUCKETS - 1)
+
+
+def get_attempt_bucket(attempt):
+	return min(max(cint(attempt), 1), ATTEMPT_BUCKETS) - 1
+
+
+def apply_attempt(stats, before, after):
+	"""
+	Apply the change of one student's quiz counters to the quiz stats
+
+	Args:
+		stats: see `get_empty_stats`, updated in place
+		before: (attempts, best_score, passed_at_attempt) before the submission
+		after: the same after it
+
+	Returns:
+		stats
+	"""
+	attempts, best_score, passed_at = before
+	new_attempts, new_best_score, new_passed_at = after
+
+	if not cint(new_attempts):
+		return stats
+
+	if not cint(attempts):
+		stats.students += 1
+		stats.abandoned += 1
+	else:
+		stats.score_histogram[get_score_bucket(best_score)] -= 1
+	stats.score_histogram[get_score_bucket(new_best_score)] += 1
+
+	if cint(new_passed_at) and not cint(passed_at):
+		stats.passed += 1
+		stats.abandoned -= 1
+		stats.attempts_histogram[get_attempt_bucket(new_passed_at)] += 1
+		if cint(new_passed_at) == 1:
+			stats.first_attempt_passes += 1
+
+	return stats
+
+
+def summarize_attempts(percentages):
+	"""
+	Counters of one student from their submission percentages, oldest first
+
+	Returns:
+		(attempts, best_score, passed_at_attempt), as kept on the lesson log
+	"""
+	passed_at = 0
+	for attempt, percentage in enumerate(percentages, start=1):
+		if flt(percentage) >= PASS_PERCENTAGE:
+			passed_at = attempt
+			break
+
+	return len(percentages), max([flt(p) for p in percentages] or [0]), passed_at
+
+
+def update_quiz_analytics(quiz, lesson, course, before, after):
+	"""
+	Apply one submission to the analytics of a quiz, in the caller's transaction
+
+	Args:
+		quiz: LMS Quiz name
+		lesson: Course Lesson of the quiz
+		course: LMS Course of the lesson
+		before, after: see `apply_attempt`
+	"""
+	if not frappe.db.exists(ANALYTICS_DOCTYPE, quiz):
+		insert_analytics([(quiz, lesson, course, get_empty_stats())], ignore_duplicates=True)
+
+	row = frappe.db.get_value(
+		ANALYTICS_DOCTYPE, quiz, COUNT_FIELDS + HISTOGRAM_FIELDS, as_dict=True, for_update=True
+	)
+	stats = apply_attempt(decode_stats(row), before, after)
+	frappe.db.set_value(ANALYTICS_DOCTYPE, quiz, encode_stats(stats))
+
+
+def insert_analytics(rows, ignore_duplicates=False):
+	"""Insert analytics rows, given as (quiz, lesson, course, stats) tuples"""
+	now = now_datetime()
+	user = frappe.session.user
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"docstatus",
+		"quiz",
+		"lesson",
+		"course",
+		*COUNT_FIELDS,
+		*HISTOGRAM_FIELDS,
+	]
+
+	values = []
+	for quiz, lesson, course, stats in rows:
+		encoded = encode_stats(stats)
+		values.append(
+			[
+				quiz,
+				now,
+				now,
+				user,
+				user,
+				0,
+				quiz,
+				lesson,
+				course,
+				*(encoded[field] for field in COUNT_FIELDS + HISTOGRAM_FIELDS),
+			]
+		)
+
+	frappe.db.bulk_insert(ANALYTICS_DOCTYPE, fields, values, ignore_duplicates=ignore_duplicates)
+
+
+def rebuild_quiz_analytics(quiz=None, course=None, on_chunk=None):
+	"""
+	Recompute quiz analytics from LMS Quiz Submission
+
+	Submissions are read for a chunk of quizzes at a time, ordered by student
+	and time, and each chunk's rows are replaced and committed together.
+
+	Args:
+		quiz: only this quiz
+		course: only quizzes of this course
+		on_chunk: callback(quizzes, submissions) after each committed chunk
+
+	Returns:
+		number of quizzes rebuilt
+	"""
+	Quiz = frappe.qb.DocType("LMS Quiz")
+	Lesson = frappe.qb.DocType("Course Lesson")
+	query = (
+		frappe.qb.from_(Quiz)
+		.left_join(Lesson)
+		.on(Lesson.name == Quiz.lesson)
+		.select(Quiz.name, Quiz.lesson, Lesson.course)
+		.orderby(Quiz.name)
+	)
+	if quiz:
+		query = query.where(Quiz.name == quiz)
+	if course:
+		query = query.where(Lesson.course == course)
+
+	quizzes = query.run(as_dict=True)
+
+	Submission = frappe.qb.DocType("LMS Quiz Submission")
+	for start in range(0, len(quizzes), REBUILD_CHUNK_SIZE):
+		chunk = quizzes[start : start + REBUILD_CHUNK_SIZE]
+		stats = {row.name: get_empty_stats() for row in chunk}
+
+		submissions = (
+			frappe.qb.from_(Submission)
+			.select(Submission.quiz, Submission.member, Submission.percentage)
+			.where(Submission.quiz.isin(list(stats)))
+			.orderby(Submission.quiz)
+			.orderby(Submission.member)
+			.orderby(Submission.creation)
+		).run()
+
+		for (quiz_name, _member), rows in groupby(submissions, key=lambda row: (row[0], row[1])):
+			counters = summarize_attempts([row[2] for row in rows])
+			apply_attempt(stats[quiz_name], (0, 0, 0), counters)
+
+		frappe.db.delete(ANALYTICS_DOCTYPE, {"name": ["in", list(stats)]})
+		insert_analytics([(row.name, row.lesson, row.course, stats[row.name]) for row in chunk])
+		frappe.db.commit()
+
+		if on_chunk:
+			on_chunk(len(chunk), len(submissions))
+
+	return len(quizzes)
+
+
+@frappe.whitelist()
+def get_quiz_analytics(quiz=None, course=None):
+	"""
+	Attempt analytics of a quiz, or of all quizzes of a course
+
+	Returns:
+		list of dicts with the stored counts and histograms, plus
+		`pass_rate`, `first_attempt_pass_rate` (percent of students who
+		attempted) and `average_attempts_to_pass`
+	"""
+	frappe.only_for(ANALYTICS_ROLES)
+
+	filters = {}
+	if quiz:
+		filters["quiz"] = quiz
+	if course:
+		filters["course"] = course
+
+	rows = frappe.get_all(
+		ANALYTICS_DOCTYPE,
+		filters=filters,
+		fields=["quiz", "lesson", "course", *COUNT_FIELDS, *HISTOGRAM_FIELDS],
+		order_by="quiz asc",
+	)
+
+	result = []
+	for row in rows:
+		stats = decode_stats(row)
+		students = stats.students
+		passed_attempts = sum(count * (bucket + 1) for bucket, count in enumerate(stats.attempts_histogram))
+		result.append(
+			{
+				"quiz": row.quiz,
+				"lesson": row.lesson,
+				"course": row.course,
+				**stats,
+				"pass_rate": flt(stats.passed / students * 100, 1) if students else 0,
+				"first_attempt_pass_rate": flt(stats.first_attempt_passes / students * 100, 1)
+				if students
+				else 0,
+				# The last bucket counts as ATTEMPT_BUCKETS attempts
+				"average_attempts_to_pass": flt(passed_attempts / stats.passed, 2) if stats.passed else 0,
+			}
+		)
+
+	return result
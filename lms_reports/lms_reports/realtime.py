@@ -0,0 +1,283 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Realtime push of lesson and course progress changes.
+
+Tracking writes queue compact deltas during the transaction; they are merged
+per (student, course) and published once after commit:
+- to the learner's browser, throttled per student and course so bursts don't
+  flood the socket, while completions (which unlock the next lesson) are always sent.
+  Throttled updates are merged in the cache and pushed by a scheduler tick once
+  the window expires, so the last update of a burst is never lost
+- to the course room, as changed (student, lesson) rows for the Student
+  Progress Dashboard
+"""
+
+import json
+import pickle
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+EVENT_LESSON_PROGRESS = "lms_lesson_progress"
+EVENT_COURSE_PROGRESS = "lms_course_progress"
+
+# Minimum seconds between progress-only pushes for a student and course
+THROTTLE_SECONDS = 5
+
+# Seconds merged throttled updates are kept for their trailing push, longer
+# than the minute between scheduler ticks
+DEFERRED_TTL = 300
+# Sorted set of deferred [member, course] pairs, scored by when they are due
+DEFERRED_DUE_KEY = "lms_reports:realtime_deferred_due"
+# Field of the deferred hash holding the course progress, lessons use their name
+DEFERRED_PROGRESS = "__progress__"
+
+
+def queue_lesson_update(doc):
+	"""
+	Queue a lesson delta for an LMS Student Lesson Log that was just saved
+
+	Args:
+		doc: LMS Student Lesson Log document
+	"""
+	from lms_reports.progress_tracker import get_progress_weighting
+
+	before = doc.get_doc_before_save()
+
+	# The lesson locker counts the video as watched from the course's threshold
+	threshold = flt(get_progress_weighting(doc.course).watched_threshold)
+	was_video_done = before and (flt(before.completion_percentage) >= threshold or cint(before.is_completed))
+	is_video_done = flt(doc.completion_percentage) >= threshold or cint(doc.is_completed)
+
+	# Only these can change whether the lesson (and the next one) is unlocked
+	unlock_may_change = (
+		not before
+		or bool(is_video_done) != bool(was_video_done)
+		or cint(doc.is_completed) != cint(before.is_completed)
+		or flt(doc.quiz_best_score) != flt(before.quiz_best_score)
+	)
+
+	_get_pending()["courses"].setdefault(doc.course, {})[(doc.student, doc.lesson)] = get_course_row(doc)
+
+	entry = _get_entry(doc.student, doc.course)
+	entry["lessons"][doc.lesson] = {
+		"lesson": doc.lesson,
+		"completion_percentage": flt(doc.completion_percentage, 1),
+		"recheck": entry["lessons"].get(doc.lesson, {}).get("recheck") or unlock_may_change,
+	}
+	if unlock_may_change:
+		entry["urgent"] = True
+
+
+def queue_bulk_update(logs):
+	"""
+	Queue deltas for lesson logs written with bulk queries, where no document hooks run
+
+	Args:
+		logs: dicts with the LMS Student Lesson Log fields used by `get_course_row`
+	"""
+	courses = _get_pending()["courses"]
+	for log in logs:
+		courses.setdefault(log["course"], {})[(log["student"], log["lesson"])] = get_course_row(log)
+
+		entry = _get_entry(log["student"], log["course"])
+		entry["lessons"][log["lesson"]] = {
+			"lesson": log["lesson"],
+			"completion_percentage": flt(log.get("completion_percentage"), 1),
+			"recheck": True,
+		}
+		entry["urgent"] = True
+
+
+def queue_course_progress(member, course, progress):
+	"""Queue the new overall course progress of a member"""
+	entry = _get_entry(member, course)
+	entry["progress"] = flt(progress, 2)
+
+
+def get_course_row(log):
+	"""
+	Build a dashboard row for one (student, lesson) from a lesson log
+
+	Uses the same keys as the lesson details of `get_course_progress_summary`,
+	plus `version` (the log's modified timestamp) for catching up after a reconnect.
+	"""
+	is_completed = cint(log.get("is_completed"))
+	return {
+		"student": log.get("student"),
+		"lesson": log.get("lesson"),
+		"is_completed": is_completed,
+		"completion_percentage": 100 if is_completed else flt(log.get("completion_percentage")),
+		"completion_date": log.get("last_watched_timestamp") if is_completed else None,
+		"video_speed": log.get("video_speed") or None,
+		"last_watched_timestamp": log.get("last_watched_timestamp"),
+		"quiz_attempts": cint(log.get("quiz_attempts")),
+		"quiz_best_score": flt(log.get("quiz_best_score")),
+		"quiz_passed_at_attempt": cint(log.get("quiz_passed_at_attempt")),
+		"version": str(log.get("modified")),
+	}
+
+
+def flush_pending():
+	"""Publish queued deltas, called after the transaction is committed"""
+	pending = getattr(frappe.local, "lms_reports_realtime", None)
+	_discard_pending()
+
+	if not pending:
+		return
+
+	_publish_learner_updates(pending["learners"])
+	_publish_course_rows(pending["courses"])
+
+
+def _publish_learner_updates(learners):
+	cache = frappe.cache()
+	for (member, course), entry in learners.items():
+		if not entry["urgent"] and cache.get_value(get_throttle_key(member, course)):
+			_defer_learner_update(member, course, entry)
+			continue
+
+		_merge_deferred(member, course, entry)
+		_publish_learner_update(member, course, entry)
+
+
+def _publish_learner_update(member, course, entry):
+	from lms_reports.lesson_locker import get_lesson_completion_status
+
+	try:
+		lessons = []
+		for delta in entry["lessons"].values():
+			row = {"lesson": delta["lesson"], "completion_percentage": delta["completion_percentage"]}
+			if delta["recheck"]:
+				status = get_lesson_completion_status(delta["lesson"], member)
+				row.update(
+					{
+						"is_completed": cint(status["is_completed"]),
+						"video_completed": cint(status["video_completed"]),
+						"quiz_completed": cint(status["quiz_completed"]),
+					}
+				)
+			lessons.append(row)
+
+		message = {"course": course, "lessons": lessons}
+		if entry["progress"] is not None:
+			message["progress"] = entry["progress"]
+
+		frappe.publish_realtime(EVENT_LESSON_PROGRESS, message, user=member)
+		frappe.cache().set_value(get_throttle_key(member, course), 1, expires_in_sec=THROTTLE_SECONDS)
+	except Exception:
+		frappe.log_error(f"Failed to publish progress for {member} in {course}", "LMS Reports - Realtime")
+
+
+def get_throttle_key(member, course):
+	return f"lms_reports:realtime_throttle:{member}:{course}"
+
+
+def get_deferred_key(member, course):
+	return f"lms_reports:realtime_deferred:{member}:{course}"
+
+
+def _defer_learner_update(member, course, entry):
+	"""Merge a throttled update into the cache and queue its trailing push"""
+	cache = frappe.cache()
+	deferred_key = get_deferred_key(member, course)
+	for lesson, delta in entry["lessons"].items():
+		previous = cache.hget(deferred_key, lesson)
+		cache.hset(
+			deferred_key,
+			lesson,
+			{**delta, "recheck": delta["recheck"] or bool(previous and previous["recheck"])},
+		)
+	if entry["progress"] is not None:
+		cache.hset(deferred_key, DEFERRED_PROGRESS, entry["progress"])
+	cache.expire(cache.make_key(deferred_key), DEFERRED_TTL)
+
+	# NX keeps the first due time, which is when the running window expires
+	remaining = cache.pttl(cache.make_key(get_throttle_key(member, course)))
+	due = time.time() + (remaining / 1000 if remaining and remaining > 0 else 0)
+	cache.zadd(cache.make_key(DEFERRED_DUE_KEY), {json.dumps([member, course]): due}, nx=True)
+
+
+def _merge_deferred(member, course, entry):
+	"""Add deferred lessons and progress to an update about to be pushed, newer values win"""
+	cache = frappe.cache()
+	deferred_key = cache.make_key(get_deferred_key(member, course))
+
+	# Read and delete in one transaction so an update deferred in between isn't lost
+	pipeline = cache.pipeline()
+	pipeline.hgetall(deferred_key)
+	pipeline.delete(deferred_key)
+	deferred, _deleted = pipeline.execute()
+	if not deferred:
+		return
+
+	deferred = {frappe.safe_decode(key): pickle.loads(value) for key, value in deferred.items()}
+	progress = deferred.pop(DEFERRED_PROGRESS, None)
+	if entry["progress"] is None:
+		entry["progress"] = progress
+
+	for lesson, delta in deferred.items():
+		current = entry["lessons"].get(lesson)
+		if current:
+			current["recheck"] = current["recheck"] or delta["recheck"]
+		else:
+			entry["lessons"][lesson] = delta
+
+
+def publish_deferred_updates():
+	"""
+	Scheduler tick: push the merged throttled updates whose window has expired
+
+	Updates deferred while a window is open wait here for at most a tick; one
+	pushed in between by an unthrottled update leaves nothing to publish.
+	"""
+	cache = frappe.cache()
+	due_key = cache.make_key(DEFERRED_DUE_KEY)
+	for pair in cache.zrangebyscore(due_key, "-inf", time.time()):
+		# Only the worker that removes the pair publishes it
+		if not cache.zrem(due_key, pair):
+			continue
+
+		member, course = json.loads(frappe.safe_decode(pair))
+		entry = {"lessons": {}, "progress": None, "urgent": False}
+		_merge_deferred(member, course, entry)
+		if entry["lessons"] or entry["progress"] is not None:
+			_publish_learner_update(member, course, entry)
+
+
+def _publish_course_rows(courses):
+	for course, rows in courses.items():
+		rows = list(rows.values())
+		try:
+			frappe.publish_realtime(
+				EVENT_COURSE_PROGRESS,
+				{"course": course, "version": max(r["version"] for r in rows), "rows": rows},
+				doctype="LMS Course",
+				docname=course,
+			)
+		except Exception:
+			frappe.log_error(f"Failed to publish dashboard rows for {course}", "LMS Reports - Realtime")
+
+
+def _get_pending():
+	pending = getattr(frappe.local, "lms_reports_realtime", None)
+	if pending is None:
+		pending = frappe.local.lms_reports_realtime = {"learners": {}, "courses": {}}
+		frappe.db.after_commit.add(flush_pending)
+		frappe.db.after_rollback.add(_discard_pending)
+
+	return pending
+
+
+def _get_entry(member, course):
+	return _get_pending()["learners"].setdefault(
+		(member, course), {"lessons": {}, "progress": None, "urgent": False}
+	)
+
+
+def _discard_pending():
+	if hasattr(frappe.local, "lms_reports_realtime"):
+		del frappe.local.lms_reports_realtime
@@ -0,0 +1,522 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Rebuild LMS Student Lesson Log from its source doctypes.
+
+Logs are derived per (student, lesson) from:
+- LMS Video Watch Duration: watched duration (watch_time) and playback speed
+- LMS Quiz Submission: attempts, best score and the attempt that passed
+- LMS Course Progress: completion
+
+Tracking writes values these sources can't reproduce (playback positions,
+attempts and completions recorded by the tracking APIs), so existing logs are
+only filled in: counters, scores and timestamps are never lowered and other
+fields are only set when empty. Running the rebuild on a healthy site leaves
+its logs unchanged.
+
+Work is split into units (one course or one student) that run in a process
+pool, each process with its own site connection. Logs are written with bulk
+inserts and updates, so document hooks (realtime pushes) don't run. Finished
+units are checkpointed in the site's private folder so an interrupted
+rebuild resumes where it stopped.
+"""
+
+import json
+import multiprocessing
+import os
+from datetime import datetime
+
+import frappe
+from frappe.utils import cint, flt, get_datetime, now_datetime
+
+from lms_reports.lms_reports.archive import restore_lesson_logs
+from lms_reports.progress_tracker import clear_member_progress_cache
+
+LOG_DOCTYPE = "LMS Student Lesson Log"
+
+# Fields owned by the rebuild; other log fields (video totals, history) are kept
+REBUILT_FIELDS = [
+	"student_name",
+	"course",
+	"chapter",
+	"watched_duration",
+	"video_speed",
+	"quiz_attempts",
+	"quiz_best_score",
+	"quiz_passed_at_attempt",
+	"is_completed",
+	"completion_percentage",
+	"last_watched_timestamp",
+]
+
+# Fields the rebuild only ever raises on an existing log
+MAX_FIELDS = [
+	"watched_duration",
+	"quiz_attempts",
+	"quiz_best_score",
+	"is_completed",
+	"completion_percentage",
+	"last_watched_timestamp",
+]
+
+# Diffs kept per unit in dry-run mode
+MAX_DIFFS_PER_UNIT = 20
+
+
+def get_checkpoint_path():
+	return frappe.get_site_path("private", "lms_reports_rebuild.json")
+
+
+def load_checkpoint(signature):
+	"""Return units already rebuilt for the same arguments"""
+	path = get_checkpoint_path()
+	if not os.path.exists(path):
+		return set()
+
+	with open(path) as f:
+		checkpoint = json.load(f)
+
+	if checkpoint.get("signature") != signature:
+		return set()
+	return set(checkpoint.get("done", []))
+
+
+def save_checkpoint(signature, done):
+	path = get_checkpoint_path()
+	with open(path + ".tmp", "w") as f:
+		json.dump({"signature": signature, "done": sorted(done)}, f)
+	os.replace(path + ".tmp", path)
+
+
+def clear_checkpoint():
+	path = get_checkpoint_path()
+	if os.path.exists(path):
+		os.remove(path)
+
+
+def get_units(partition, scope):
+	"""
+	Return the course or student names to rebuild
+
+	Args:
+		partition: "course" or "student"
+		scope: dict with optional course, from_date, to_date
+	"""
+	if partition == "course":
+		if scope.get("course"):
+			return [scope["course"]]
+		return frappe.get_all("LMS Course", pluck="name", order_by="name asc")
+
+	students = set()
+	for doctype, field in (
+		("LMS Course Progress", "member"),
+		("LMS Quiz Submission", "member"),
+		("LMS Video Watch Duration", "owner"),
+	):
+		students.update(frappe.get_all(doctype, distinct=True, pluck=field))
+	return sorted(s for s in students if s)
+
+
+def get_date_filter(scope):
+	if scope.get("from_date") and scope.get("to_date"):
+		return ["between", [scope["from_date"], scope["to_date"]]]
+	if scope.get("from_date"):
+		return [">=", scope["from_date"]]
+	if scope.get("to_date"):
+		return ["<=", scope["to_date"]]
+	return None
+
+
+def get_unit_lessons(partition, key, scope):
+	"""
+	Course Lesson rows of one unit: the lessons of its course, or for a
+	student unit without a course scope the lessons of the student's source rows
+
+	Returns:
+		{name: course lesson row}
+	"""
+	if partition == "course" or scope.get("course"):
+		lesson_filters = {"course": scope.get("course") or key}
+	else:
+		names = set(
+			frappe.get_all("LMS Course Progress", filters={"member": key}, distinct=True, pluck="lesson")
+		)
+		names.update(
+			frappe.get_all("LMS Video Watch Duration", filters={"owner": key}, distinct=True, pluck="lesson")
+		)
+		quizzes = frappe.get_all("LMS Quiz Submission", filters={"member": key}, distinct=True, pluck="quiz")
+		if quizzes:
+			names.update(frappe.get_all("LMS Quiz", filters={"name": ["in", quizzes]}, pluck="lesson"))
+
+		names.discard(None)
+		if not names:
+			return {}
+		lesson_filters = {"name": ["in", list(names)]}
+
+	return {
+		row.name: row
+		for row in frappe.get_all(
+			"Course Lesson", filters=lesson_filters, fields=["name", "course", "chapter"]
+		)
+	}
+
+
+def get_source_rows(partition, key, scope):
+	"""
+	Load source rows of one unit
+
+	With a date range only (student, lesson) pairs touched in the range are
+	rebuilt, but from all of their source rows so the totals stay correct.
+
+	Returns:
+		(lessons {name: course lesson row}, {(student, lesson): sources})
+	"""
+	lessons = get_unit_lessons(partition, key, scope)
+	if not lessons:
+		return lessons, {}
+
+	lesson_filter = {"lesson": ["in", list(lessons)]}
+
+	quiz_lessons = dict(
+		frappe.get_all("LMS Quiz", filters=lesson_filter, fields=["name", "lesson"], as_list=True)
+	)
+
+	video_student_field, video_fields = get_video_source_fields()
+	student_field = {"LMS Video Watch Duration": video_student_field}
+	sources = {
+		"video": ("LMS Video Watch Duration", video_fields, dict(lesson_filter)),
+		"quiz": (
+			"LMS Quiz Submission",
+			["member as student", "quiz", "percentage", "creation", "modified"],
+			{"quiz": ["in", list(quiz_lessons) or [""]]},
+		),
+		"progress": (
+			"LMS Course Progress",
+			["member as student", "lesson", "status", "modified"],
+			dict(lesson_filter),
+		),
+	}
+
+	date_filter = get_date_filter(scope)
+	rows = {}
+	touched = set()
+	for kind, (doctype, fields, filters) in sources.items():
+		if partition == "student":
+			filters[student_field.get(doctype, "member")] = key
+
+		for row in frappe.get_all(doctype, filters=filters, fields=fields, order_by="creation asc"):
+			if kind == "quiz":
+				row.lesson = quiz_lessons.get(row.quiz)
+			if not row.student or row.lesson not in lessons:
+				continue
+
+			pair = (row.student, row.lesson)
+			rows.setdefault(pair, {"video": [], "quiz": [], "progress": []})[kind].append(row)
+			if date_filter and in_range(row.modified, scope):
+				touched.add(pair)
+
+	if date_filter:
+		rows = {pair: value for pair, value in rows.items() if pair in touched}
+
+	return lessons, rows
+
+
+def get_video_source_fields():
+	"""
+	Fields read from LMS Video Watch Duration, aliased to student and duration
+
+	LMS keeps the viewer in `member` and the seconds watched in `watch_time`;
+	sites without them fall back to the owner and a `duration` field. When
+	neither duration field exists the skip is logged and durations are left
+	as they are.
+
+	Returns:
+		(student fieldname, fields for `frappe.get_all`)
+	"""
+	meta = frappe.get_meta("LMS Video Watch Duration")
+	student_field = "member" if meta.has_field("member") else "owner"
+	fields = [f"{student_field} as student", "lesson", "modified"]
+
+	duration_field = next((f for f in ("watch_time", "duration") if meta.has_field(f)), None)
+	if duration_field:
+		fields.append(f"{duration_field} as duration")
+	else:
+		frappe.logger("lms_reports").info(
+			"LMS Video Watch Duration has no watch_time or duration field, watched durations are not rebuilt"
+		)
+
+	if meta.has_field("playback_speed"):
+		fields.append("playback_speed")
+
+	return student_field, fields
+
+
+def in_range(value, scope):
+	value = get_datetime(value)
+	if scope.get("from_date") and value < get_datetime(scope["from_date"]):
+		return False
+	if scope.get("to_date") and value > get_datetime(scope["to_date"]):
+		return False
+	return True
+
+
+def build_log_values(student, lesson, sources):
+	"""Derive the rebuilt log fields of one (student, lesson) from its source rows"""
+	values = {
+		"course": lesson.course,
+		"chapter": lesson.chapter,
+		"watched_duration": 0,
+		"video_speed": None,
+		"quiz_attempts": 0,
+		"quiz_best_score": 0,
+		"quiz_passed_at_attempt": 0,
+		"is_completed": 0,
+		"last_watched_timestamp": None,
+	}
+
+	timestamps = []
+	for row in sources["video"]:
+		values["watched_duration"] = max(values["watched_duration"], flt(row.get("duration")))
+		if row.get("playback_speed"):
+			values["video_speed"] = row.playback_speed
+		timestamps.append(row.modified)
+
+	# Submissions are in creation order, so the index is the attempt number
+	for attempt, row in enumerate(sources["quiz"], start=1):
+		values["quiz_attempts"] = attempt
+		values["quiz_best_score"] = max(values["quiz_best_score"], flt(row.percentage))
+		if flt(row.percentage) >= 100 and not values["quiz_passed_at_attempt"]:
+			values["quiz_passed_at_attempt"] = attempt
+		timestamps.append(row.modified)
+
+	for row in sources["progress"]:
+		if row.status == "Complete":
+			values["is_completed"] = 1
+		timestamps.append(row.modified)
+
+	if timestamps:
+		values["last_watched_timestamp"] = max(get_datetime(t) for t in timestamps)
+
+	return values
+
+
+def rebuild_unit(partition, key, scope, dry_run=False):
+	"""
+	Rebuild the logs of one course or student
+
+	Returns:
+		dict with created, updated and unchanged counts, plus sample diffs in dry-run mode
+	"""
+	lessons, rows = get_source_rows(partition, key, scope)
+	stats = {"unit": key, "created": 0, "updated": 0, "unchanged": 0, "diffs": []}
+	if not rows:
+		return stats
+
+	# Archived logs are merged into, not created again next to the archive
+	if not dry_run:
+		restore_lesson_logs(set(rows))
+
+	existing = {}
+	for log in frappe.get_all(
+		LOG_DOCTYPE,
+		filters={
+			"lesson": ["in", list({lesson for _, lesson in rows})],
+			"student": ["in", list({student for student, _ in rows})],
+		},
+		fields=["name", "student", "lesson", "completion_percentage", *REBUILT_FIELDS],
+	):
+		existing[(log.student, log.lesson)] = log
+
+	student_names = dict(
+		frappe.get_all(
+			"User",
+			filters={"name": ["in", list({student for student, _ in rows})]},
+			fields=["name", "full_name"],
+			as_list=True,
+		)
+	)
+
+	inserts = []
+	updates = {}
+	members_by_course = {}
+	for (student, lesson), sources in rows.items():
+		values = build_log_values(student, lessons[lesson], sources)
+		values["student_name"] = student_names.get(student)
+		# Video percentage needs the video length, which only the log knows
+		values["completion_percentage"] = 100 if values["is_completed"] else 0
+		log = existing.get((student, lesson))
+
+		if not log:
+			stats["created"] += 1
+			inserts.append((student, lesson, values))
+			members_by_course.setdefault(values["course"], set()).add(student)
+			add_diff(stats, student, lesson, None, values)
+			continue
+
+		changed = merge_log_values(log, values)
+		if not changed:
+			stats["unchanged"] += 1
+			continue
+
+		stats["updated"] += 1
+		updates[log.name] = changed
+		members_by_course.setdefault(values["course"], set()).add(student)
+		add_diff(stats, student, lesson, {f: log.get(f) for f in changed}, changed)
+
+	if dry_run:
+		return stats
+
+	if inserts:
+		insert_logs(inserts)
+	if updates:
+		frappe.db.bulk_update(LOG_DOCTYPE, updates)
+	frappe.db.commit()
+
+	for course, members in members_by_course.items():
+		clear_member_progress_cache(course, list(members))
+
+	return stats
+
+
+def merge_log_values(log, values):
+	"""
+	Changes to apply to an existing log from its rebuilt values
+
+	Fields in MAX_FIELDS only move up, the attempt that passed the quiz and
+	the other fields are only set when the log has none.
+
+	Returns:
+		{field: new value} for the fields that change
+	"""
+	changed = {}
+	for field, value in values.items():
+		current = log.get(field)
+		if field == "last_watched_timestamp":
+			merged = (
+				value if value and (not current or get_datetime(value) > get_datetime(current)) else current
+			)
+		elif field in MAX_FIELDS:
+			merged = max(flt(current), flt(value))
+		elif field == "quiz_passed_at_attempt":
+			merged = cint(current) or value
+		else:
+			merged = current or value
+
+		if not is_same(current, merged):
+			changed[field] = merged
+
+	return changed
+
+
+def is_same(old, new):
+	if isinstance(new, (int, float)):
+		return flt(old) == flt(new)
+	if isinstance(new, datetime):
+		return bool(old) and get_datetime(old) == new
+	return (old or None) == (new or None)
+
+
+def add_diff(stats, student, lesson, old, new):
+	if len(stats["diffs"]) < MAX_DIFFS_PER_UNIT:
+		stats["diffs"].append({"student": student, "lesson": lesson, "old": old, "new": new})
+
+
+def insert_logs(inserts):
+	now = now_datetime()
+	user = frappe.session.user
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"docstatus",
+		"student",
+		"lesson",
+		*REBUILT_FIELDS,
+	]
+
+	values = []
+	for student, lesson, row in inserts:
+		# last_watched_timestamp is never NULL, like on logs inserted as documents
+		row["last_watched_timestamp"] = row["last_watched_timestamp"] or now
+		values.append(
+			# Same name as the doctype's naming expression LSLL-{student}-{lesson}
+			[
+				f"LSLL-{student}-{lesson}",
+				now,
+				now,
+				user,
+				user,
+				0,
+				student,
+				lesson,
+				*(row[field] for field in REBUILT_FIELDS),
+			]
+		)
+	frappe.db.bulk_insert(LOG_DOCTYPE, fields, values, ignore_duplicates=True)
+
+
+def run_unit(args):
+	"""Process pool entry point: connect to the site and rebuild one unit"""
+	site, partition, key, scope, dry_run = args
+
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		return rebuild_unit(partition, key, scope, dry_run)
+	except Exception:
+		frappe.db.rollback()
+		return {"unit": key, "error": frappe.get_traceback()}
+	finally:
+		frappe.destroy()
+
+
+def rebuild_lesson_logs(
+	site, partition="course", scope=None, processes=4, dry_run=False, reset=False, on_result=None
+):
+	"""
+	Rebuild lesson logs of a course, a date range or the whole site
+
+	Args:
+		site: site name, each worker process connects to it
+		partition: split work per "course" or per "student"
+		scope: dict with optional course, from_date, to_date
+		processes: worker processes
+		dry_run: only compute and return the diffs
+		reset: ignore the checkpoint of a previous run
+		on_result: called with the stats of each finished unit
+	"""
+	scope = {k: v for k, v in (scope or {}).items() if v}
+	signature = json.dumps({"partition": partition, "scope": scope}, sort_keys=True, default=str)
+
+	if reset:
+		clear_checkpoint()
+	done = set() if dry_run else load_checkpoint(signature)
+
+	units = [unit for unit in get_units(partition, scope) if unit not in done]
+	tasks = [(site, partition, unit, scope, dry_run) for unit in units]
+
+	totals = {"units": 0, "created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+	# Spawned workers start from a fresh interpreter, so no connection state is inherited
+	context = multiprocessing.get_context("spawn")
+	with context.Pool(processes=max(1, cint(processes))) as pool:
+		for stats in pool.imap_unordered(run_unit, tasks):
+			totals["units"] += 1
+			if stats.get("error"):
+				totals["errors"] += 1
+			else:
+				for field in ("created", "updated", "unchanged"):
+					totals[field] += stats[field]
+				if not dry_run:
+					done.add(stats["unit"])
+					save_checkpoint(signature, done)
+
+			if on_result:
+				on_result(stats)
+
+	if not dry_run and not totals["errors"]:
+		clear_checkpoint()
+
+	return totals
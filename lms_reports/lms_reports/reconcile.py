@@ -0,0 +1,138 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Nightly reconciliation of LMS Student Lesson Log completion with LMS Course Progress.
+
+Tracking writes no longer check LMS Course Progress on every event; the log
+is flagged from the progress row itself when it is created. Completions made
+(or reset) by other code paths are repaired here: each batch is one left join
+that returns only the logs whose `is_completed` disagrees with LMS, which are
+then fixed with bulk updates. The number of repaired logs is kept in LMS
+Reports Settings as the drift metric.
+
+LMS Course Progress wins both ways: it is the completion record LMS and the
+progress tracker use, and every path of this app that completes a log also
+writes it. A log reset here gets `completion_percentage` back from the seconds
+actually watched, so the two fields never disagree.
+"""
+
+import frappe
+from frappe.utils import flt, now_datetime
+
+from lms_reports.lms_reports.coverage import decode_coverage, get_coverage_percentage
+from lms_reports.progress_tracker import clear_member_progress_cache
+
+# Disagreeing logs repaired per batch
+BATCH_SIZE = 5000
+
+
+def get_drifted_logs(after=None, limit=BATCH_SIZE):
+	"""
+	Return logs whose completion disagrees with LMS Course Progress
+
+	Args:
+		after: continue after this log name
+		limit: max logs returned
+
+	Returns:
+		list of dicts with name, student, course, is_completed (the value it
+		should have), watched_coverage and video_total_duration
+	"""
+	Log = frappe.qb.DocType("LMS Student Lesson Log")
+	Progress = frappe.qb.DocType("LMS Course Progress")
+
+	query = (
+		frappe.qb.from_(Log)
+		.left_join(Progress)
+		.on(
+			(Progress.member == Log.student)
+			& (Progress.lesson == Log.lesson)
+			& (Progress.status == "Complete")
+		)
+		.select(
+			Log.name,
+			Log.student,
+			Log.course,
+			Log.watched_coverage,
+			Log.video_total_duration,
+			Progress.name.as_("progress"),
+		)
+		.where(
+			((Log.is_completed == 0) & Progress.name.isnotnull())
+			| ((Log.is_completed == 1) & Progress.name.isnull())
+		)
+		.orderby(Log.name)
+		.limit(limit)
+	)
+	if after:
+		query = query.where(Log.name > after)
+
+	# Duplicate progress rows would repeat a log, keep one per name
+	drifted = {}
+	for row in query.run(as_dict=True):
+		drifted[row.name] = {
+			"name": row.name,
+			"student": row.student,
+			"course": row.course,
+			"is_completed": 1 if row.progress else 0,
+			"watched_coverage": row.watched_coverage,
+			"video_total_duration": row.video_total_duration,
+		}
+
+	return list(drifted.values())
+
+
+def get_completion_update(row):
+	"""
+	Fields that bring a drifted log in line with LMS Course Progress
+
+	Args:
+		row: see `get_drifted_logs`
+	"""
+	if row["is_completed"]:
+		return {"is_completed": 1, "completion_percentage": 100}
+
+	coverage = decode_coverage(row["watched_coverage"])
+	return {
+		"is_completed": 0,
+		"completion_percentage": flt(get_coverage_percentage(coverage, row["video_total_duration"]), 2),
+	}
+
+
+def clear_progress_cache(batch):
+	"""Drop cached lesson progress of the members whose logs were repaired"""
+	members_by_course = {}
+	for row in batch:
+		members_by_course.setdefault(row["course"], set()).add(row["student"])
+
+	for course, members in members_by_course.items():
+		clear_member_progress_cache(course, list(members))
+
+
+def reconcile_lesson_completion():
+	"""Repair drifted lesson logs in batches and record the drift count"""
+	drift = 0
+	after = None
+
+	while True:
+		batch = get_drifted_logs(after)
+		if not batch:
+			break
+
+		updates = {row["name"]: get_completion_update(row) for row in batch}
+
+		frappe.db.bulk_update("LMS Student Lesson Log", updates)
+		frappe.db.commit()
+		clear_progress_cache(batch)
+
+		drift += len(batch)
+		after = batch[-1]["name"]
+
+	frappe.db.set_single_value(
+		"LMS Reports Settings", {"last_reconciliation": now_datetime(), "reconciliation_drift": drift}
+	)
+	frappe.db.commit()
+
+	frappe.logger("lms_reports").info(f"Lesson completion reconciliation repaired {drift} logs")
+	return drift
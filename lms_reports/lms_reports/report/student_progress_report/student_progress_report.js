@@ -8,7 +8,7 @@ frappe.query_reports["Student Progress Report"] = {
             "label": __("Student"),
             "fieldtype": "Link",
             "options": "User",
-            "default": frappe.session.user if frappe.session.user != "Administrator" else ""
+            "default": frappe.session.user != "Administrator" ? frappe.session.user : ""
         },
         {
             "fieldname": "course",
@@ -36,6 +36,25 @@ frappe.query_reports["Student Progress Report"] = {
             "fieldname": "is_completed",
             "label": __("Completed Only"),
             "fieldtype": "Check"
+        },
+        {
+            "fieldname": "include_archived",
+            "label": __("Include Archived"),
+            "fieldtype": "Check"
+        },
+        {
+            "fieldname": "group_by",
+            "label": __("Group By"),
+            "fieldtype": "Select",
+            "options": ["", "Course", "Chapter", "Lesson", "Student"]
         }
-    ]
+    ],
+
+    "onload": function (report) {
+        // Prepared results are only kept fresh for users who open the report
+        frappe.call({
+            method: "lms_reports.lms_reports.report.student_progress_report.student_progress_report.mark_report_viewed",
+            type: "POST"
+        });
+    }
 };
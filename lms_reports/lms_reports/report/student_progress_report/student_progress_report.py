@@ -1,11 +1,41 @@
 # Copyright (c) 2026, LMS Reports and contributors
 # For license information, please see license.txt
 
+from datetime import datetime
+
 import frappe
 from frappe import _
+from frappe.query_builder.functions import Avg, Count, Max, Sum
+from frappe.utils import add_to_date, cint, now_datetime
+from pypika.terms import Case
+
+from lms_reports.lms_reports.archive import ARCHIVE_DOCTYPE, get_archived_logs, should_include_archive
+
+REPORT_NAME = "Student Progress Report"
+
+# Logs are read in keyset-paginated chunks so a full scan never runs as one query
+CHUNK_SIZE = 10000
+
+# Prepared results are only refreshed for users who opened the report within
+# this many TTLs, and at most this many filter sets per run
+RECENT_VIEW_TTLS = 3
+MAX_REFRESHES_PER_RUN = 20
+
+# "Group By" filter options and the log field each one groups on
+GROUP_BY_FIELDS = {
+	"Course": "course",
+	"Chapter": "chapter",
+	"Lesson": "lesson",
+	"Student": "student"
+}
 
 
 def execute(filters=None):
+	filters = frappe._dict(filters or {})
+
+	if filters.get("group_by"):
+		return get_grouped_columns(filters.group_by), get_grouped_data(filters)
+
 	columns = get_columns()
 	data = get_data(filters)
 	return columns, data
@@ -98,7 +128,155 @@ def get_columns():
 	]
 
 
+def get_grouped_columns(group_by):
+	fieldname = GROUP_BY_FIELDS[group_by]
+	options = {
+		"course": "LMS Course",
+		"chapter": "Course Chapter",
+		"lesson": "Course Lesson",
+		"student": "User"
+	}[fieldname]
+
+	columns = [
+		{
+			"fieldname": fieldname,
+			"label": _(group_by),
+			"fieldtype": "Link",
+			"options": options,
+			"width": 180
+		}
+	]
+
+	if fieldname == "student":
+		columns.append({
+			"fieldname": "student_name",
+			"label": _("Student Name"),
+			"fieldtype": "Data",
+			"width": 180
+		})
+
+	return [
+		*columns,
+		{
+			"fieldname": "students",
+			"label": _("Students"),
+			"fieldtype": "Int",
+			"width": 100
+		},
+		{
+			"fieldname": "lessons",
+			"label": _("Lessons"),
+			"fieldtype": "Int",
+			"width": 100
+		},
+		{
+			"fieldname": "completed_count",
+			"label": _("Completed"),
+			"fieldtype": "Int",
+			"width": 100
+		},
+		{
+			"fieldname": "avg_completion",
+			"label": _("Avg Completion %"),
+			"fieldtype": "Percent",
+			"width": 130
+		},
+		{
+			"fieldname": "avg_quiz_attempts",
+			"label": _("Avg Quiz Attempts"),
+			"fieldtype": "Float",
+			"precision": 2,
+			"width": 130
+		},
+		{
+			"fieldname": "total_watched_duration",
+			"label": _("Watch Time (sec)"),
+			"fieldtype": "Float",
+			"width": 130
+		}
+	]
+
+
+def get_grouped_data(filters):
+	"""
+	Aggregate lesson logs per course, chapter, lesson or student in SQL
+
+	Only one row per group leaves the database, so the cost follows the
+	number of groups rather than the number of logs. Archived logs are
+	aggregated together with the hot ones when the filters reach them.
+	"""
+	fieldname = GROUP_BY_FIELDS[filters.group_by]
+	fields = [
+		"student", "student_name", "lesson", "is_completed", "completion_percentage",
+		"quiz_attempts", "watched_duration"
+	]
+	conditions = get_conditions(filters)
+
+	def get_source(doctype):
+		Source = frappe.qb.DocType(doctype)
+		query = frappe.qb.from_(Source).select(*(Source[f] for f in dict.fromkeys([fieldname, *fields])))
+		for field, value in conditions.items():
+			query = query.where(Source[field] == value)
+		return query
+
+	source = get_source("LMS Student Lesson Log")
+	if include_archive(filters):
+		source = source.union_all(get_source(ARCHIVE_DOCTYPE))
+
+	Log = source.as_("logs")
+	group_field = Log[fieldname]
+	query = (
+		frappe.qb.from_(Log)
+		.select(
+			group_field.as_(fieldname),
+			Count(Log.student).distinct().as_("students"),
+			Count(Log.lesson).distinct().as_("lessons"),
+			Sum(Log.is_completed).as_("completed_count"),
+			Avg(Log.completion_percentage).as_("avg_completion"),
+			# Mean over learners who attempted the quiz at all
+			Avg(Case().when(Log.quiz_attempts > 0, Log.quiz_attempts)).as_("avg_quiz_attempts"),
+			Sum(Log.watched_duration).as_("total_watched_duration")
+		)
+		.groupby(group_field)
+		.orderby(group_field)
+	)
+
+	if fieldname == "student":
+		query = query.select(Max(Log.student_name).as_("student_name"))
+
+	return query.run(as_dict=True)
+
+
 def get_data(filters):
+	conditions = get_conditions(filters)
+	fields = [
+		"student", "student_name", "course", "chapter", "lesson",
+		"completion_percentage", "is_completed", "video_speed",
+		"watched_duration", "last_watched_timestamp",
+		"quiz_attempts", "quiz_best_score", "quiz_passed_at_attempt"
+	]
+
+	data = []
+	for chunk in iter_lesson_logs(conditions, fields):
+		data.extend(chunk)
+
+	# Cold logs of inactive enrollments, only when asked for
+	if include_archive(filters):
+		data.extend(get_archived_logs(conditions, ["name", *fields]))
+
+	# Same order as before: latest activity first, never watched last
+	data.sort(key=lambda row: row.last_watched_timestamp or datetime.min, reverse=True)
+	return data
+
+
+def include_archive(filters):
+	"""Whether the report reads LMS Student Lesson Log Archive too, see `should_include_archive`"""
+	filters = filters or {}
+	return should_include_archive(filters.get("include_archived"), filters.get("from_date"))
+
+
+def get_conditions(filters):
+	filters = filters or {}
 	conditions = {}
 	if filters.get("student"):
 		conditions["student"] = filters.get("student")
@@ -109,14 +287,115 @@ def get_data(filters):
 	if filters.get("is_completed"):
 		conditions["is_completed"] = 1
 
-	return frappe.get_all(
-		"LMS Student Lesson Log",
-		filters=conditions,
-		fields=[
-			"student", "student_name", "course", "chapter", "lesson",
-			"completion_percentage", "is_completed", "video_speed",
-			"watched_duration", "last_watched_timestamp",
-			"quiz_attempts", "quiz_best_score", "quiz_passed_at_attempt"
-		],
-		order_by="last_watched_timestamp desc"
-	)
+	return conditions
+
+
+def iter_lesson_logs(conditions, fields, chunk_size=CHUNK_SIZE, after=None,
+		doctype="LMS Student Lesson Log"):
+	"""
+	Yield LMS Student Lesson Log rows matching `conditions` in chunks
+
+	Rows are ordered by name and each chunk continues after the last name of
+	the previous one, so every query is a short index range scan.
+
+	Args:
+		conditions: filters dict, see `get_conditions`
+		fields: fields to fetch, `name` is always included
+		chunk_size: rows per query
+		after: resume after this log name
+		doctype: read the archive (LMS Student Lesson Log Archive) instead
+	"""
+	while True:
+		chunk_filters = dict(conditions)
+		if after:
+			chunk_filters["name"] = [">", after]
+
+		chunk = frappe.get_all(
+			doctype,
+			filters=chunk_filters,
+			fields=["name", *fields],
+			order_by="name asc",
+			limit_page_length=chunk_size
+		)
+		if not chunk:
+			return
+
+		yield chunk
+
+		if len(chunk) < chunk_size:
+			return
+		after = chunk[-1].name
+
+
+def get_report_views_key():
+	return "lms_reports:student_progress_report:viewed"
+
+
+@frappe.whitelist()
+def mark_report_viewed():
+	"""Remember when the current user last opened the report, called from its onload"""
+	frappe.cache().hset(get_report_views_key(), frappe.session.user, now_datetime())
+
+
+def refresh_stale_prepared_reports():
+	"""
+	Regenerate prepared results older than the TTL in LMS Reports Settings
+
+	The report runs as a prepared report, so results are generated in a
+	background worker and served with their "generated at" time when the
+	report is reopened. This hourly job queues a fresh run for filter sets
+	whose latest result has expired, only for users who opened the report
+	within the last RECENT_VIEW_TTLS TTLs, newest filter sets first and at
+	most MAX_REFRESHES_PER_RUN per run. Abandoned filter sets are refreshed
+	again when their user comes back.
+	"""
+	from frappe.core.doctype.prepared_report.prepared_report import make_prepared_report
+
+	ttl = cint(frappe.db.get_single_value("LMS Reports Settings", "report_cache_ttl"))
+	if ttl <= 0:
+		return
+
+	now = now_datetime()
+	cutoff = add_to_date(now, hours=-ttl)
+	viewed_after = add_to_date(now, hours=-ttl * RECENT_VIEW_TTLS)
+	viewers = {
+		frappe.safe_decode(user)
+		for user, viewed_at in (frappe.cache().hgetall(get_report_views_key()) or {}).items()
+		if viewed_at and viewed_at > viewed_after
+	}
+	if not viewers:
+		return
+
+	# Filter sets already being regenerated
+	pending = {
+		(r.owner, r.filters)
+		for r in frappe.get_all(
+			"Prepared Report",
+			filters={"report_name": REPORT_NAME, "status": ["in", ["Queued", "Started"]]},
+			fields=["owner", "filters"]
+		)
+	}
+
+	latest = {}
+	for r in frappe.get_all(
+		"Prepared Report",
+		filters={"report_name": REPORT_NAME, "status": "Completed", "owner": ["in", list(viewers)]},
+		fields=["owner", "filters", "report_end_time"],
+		order_by="creation desc"
+	):
+		latest.setdefault((r.owner, r.filters), r)
+
+	stale = [
+		prepared
+		for key, prepared in latest.items()
+		if key not in pending and prepared.report_end_time and prepared.report_end_time <= cutoff
+	]
+
+	current_user = frappe.session.user
+	try:
+		for prepared in stale[:MAX_REFRESHES_PER_RUN]:
+			# Results are looked up per owner, so regenerate as the same user
+			frappe.set_user(prepared.owner)
+			make_prepared_report(REPORT_NAME, prepared.filters)
+	finally:
+		frappe.set_user(current_user)
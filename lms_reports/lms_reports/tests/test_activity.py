@@ -0,0 +1,51 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.activity import get_log_activity
+
+
+def lesson_log(last_watched, history=(), is_completed=0, quiz_attempts=0):
+	return frappe._dict(
+		{
+			"last_watched_timestamp": last_watched,
+			"is_completed": is_completed,
+			"quiz_attempts": quiz_attempts,
+			"watch_history": [
+				frappe._dict({"name": name, "start_time": start, "end_time": end})
+				for name, start, end in history
+			],
+		}
+	)
+
+
+class TestDailyActivity(FrappeTestCase):
+	def test_new_log_counts_as_active(self):
+		delta = get_log_activity(lesson_log("2026-10-01 10:00:00", [("a", 0, 30)]), None)
+		self.assertEqual(str(delta["activity_date"]), "2026-10-01")
+		self.assertEqual(delta["active_students"], 1)
+		self.assertEqual(delta["watch_seconds"], 30)
+
+	def test_only_new_history_rows_count(self):
+		"""Rows already saved are not counted again, rewinds add nothing"""
+		before = lesson_log("2026-10-01 10:00:00", [("a", 0, 30)])
+		after = lesson_log("2026-10-01 10:00:30", [("a", 0, 30), ("b", 30, 60), ("c", 60, 40)])
+		delta = get_log_activity(after, before)
+		self.assertEqual(delta["active_students"], 0)
+		self.assertEqual(delta["watch_seconds"], 30)
+
+	def test_next_day_is_active_again(self):
+		before = lesson_log("2026-10-01 23:59:00", quiz_attempts=1)
+		after = lesson_log("2026-10-02 00:01:00", is_completed=1, quiz_attempts=2)
+		delta = get_log_activity(after, before)
+		self.assertEqual(delta["active_students"], 1)
+		self.assertEqual(delta["completions"], 1)
+		self.assertEqual(delta["quiz_attempts"], 1)
+
+	def test_save_without_activity(self):
+		"""An edit that leaves the activity timestamp alone is not activity"""
+		before = lesson_log("2026-10-01 10:00:00")
+		after = lesson_log("2026-10-01 10:00:00", is_completed=1)
+		self.assertIsNone(get_log_activity(after, before))
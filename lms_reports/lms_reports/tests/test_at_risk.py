@@ -0,0 +1,64 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+
+from lms_reports.lms_reports.at_risk import get_stalled_lesson, get_stalled_lessons, get_window
+
+
+class TestAtRiskWindow(FrappeTestCase):
+	def test_first_run_is_open_ended(self):
+		start, end = get_window(None, get_datetime("2026-10-20 10:00:00"), 14)
+		self.assertIsNone(start)
+		self.assertEqual(str(end), "2026-10-06 10:00:00")
+
+	def test_consecutive_runs_cover_every_crossing_once(self):
+		"""The window of a run starts where the previous run's window ended"""
+		first_run = get_datetime("2026-10-20 10:00:00")
+		second_run = get_datetime("2026-10-20 11:00:00")
+		_start, first_end = get_window(None, first_run, 7)
+		second_start, second_end = get_window(first_run, second_run, 7)
+		self.assertEqual(second_start, first_end)
+		self.assertEqual(str(second_end), "2026-10-13 11:00:00")
+
+
+class TestStalledLesson(FrappeTestCase):
+	def test_locked_first_lesson_is_not_stalled(self):
+		"""A locked first lesson has no lesson before it to finish"""
+		rows = [(frappe._dict(name="L1"), False, "Not enrolled", {})]
+		self.assertEqual(get_stalled_lesson(rows), (None, None))
+
+	def test_blocking_lesson_is_the_one_before(self):
+		rows = [
+			(frappe._dict(name="L1"), True, None, {"missing": ["Quiz"]}),
+			(frappe._dict(name="L2"), False, "Locked", {}),
+		]
+		self.assertEqual(get_stalled_lesson(rows), ("L1", ["Quiz"]))
+
+	@patch("lms_reports.lms_reports.at_risk.get_members_outline_access")
+	def test_outline_is_read_once_per_course(self, get_members_outline_access):
+		"""Only members with a locked lesson are returned"""
+		get_members_outline_access.return_value = (
+			None,
+			{
+				"stuck@example.com": [
+					(frappe._dict(name="L1"), True, None, {"missing": ["Quiz"]}),
+					(frappe._dict(name="L2"), False, "Locked", {}),
+				],
+				"done@example.com": [
+					(frappe._dict(name="L1"), True, None, {}),
+					(frappe._dict(name="L2"), True, None, {}),
+				],
+			},
+		)
+		self.assertEqual(
+			get_stalled_lessons("Course", ["stuck@example.com", "done@example.com"]),
+			{"stuck@example.com": ("L1", ["Quiz"])},
+		)
+		get_members_outline_access.assert_called_once_with(
+			"Course", ["stuck@example.com", "done@example.com"]
+		)
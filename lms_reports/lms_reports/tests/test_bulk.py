@@ -0,0 +1,129 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from lms_reports.lms_reports.bulk import check_course_access, enroll_users, mark_lessons_complete
+
+COURSE_TITLE = "Test Bulk Course"
+STUDENTS = ["bulk-student-1@example.com", "bulk-student-2@example.com", "bulk-student-3@example.com"]
+
+
+def make_user(email):
+	if not frappe.db.exists("User", email):
+		user = frappe.new_doc("User")
+		user.email = email
+		user.first_name = email.split("@")[0]
+		user.send_welcome_email = 0
+		user.insert(ignore_permissions=True)
+	return email
+
+
+def make_course():
+	course = frappe.db.get_value("LMS Course", {"title": COURSE_TITLE}, "name")
+	if not course:
+		doc = frappe.new_doc("LMS Course")
+		doc.title = COURSE_TITLE
+		doc.published = 1
+		doc.status = "Approved"
+		doc.short_introduction = "Test Short Intro"
+		doc.description = "Test Description"
+		doc.append("instructors", {"instructor": "Administrator"})
+		doc.save()
+		course = doc.name
+
+	chapter = frappe.db.get_value("Course Chapter", {"course": course}, "name")
+	if not chapter:
+		chapter = (
+			frappe.get_doc({"doctype": "Course Chapter", "title": "Test Bulk Chapter", "course": course})
+			.insert(ignore_permissions=True)
+			.name
+		)
+
+	lesson = frappe.db.get_value("Course Lesson", {"course": course}, "name")
+	if not lesson:
+		lesson = (
+			frappe.get_doc(
+				{
+					"doctype": "Course Lesson",
+					"title": "Test Bulk Lesson",
+					"course": course,
+					"chapter": chapter,
+				}
+			)
+			.insert(ignore_permissions=True)
+			.name
+		)
+
+	return course, lesson
+
+
+class TestBulk(FrappeTestCase):
+	def setUp(self):
+		super().setUp()
+		self.enqueue_patcher = patch("frappe.enqueue")
+		self.enqueue_patcher.start()
+
+		frappe.set_user("Administrator")
+		for email in STUDENTS:
+			make_user(email)
+		self.course, self.lesson = make_course()
+		for doctype, field in (
+			("LMS Enrollment", "member"),
+			("LMS Course Progress", "member"),
+			("LMS Student Lesson Log", "student"),
+		):
+			frappe.db.delete(doctype, {"course": self.course, field: ["in", STUDENTS]})
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+		self.enqueue_patcher.stop()
+		super().tearDown()
+
+	def test_enroll_skips_existing_enrollments(self):
+		self.assertEqual(
+			enroll_users(STUDENTS[:2], [self.course]),
+			{"enrolled": 2, "skipped": 0},
+		)
+		self.assertEqual(
+			enroll_users(STUDENTS[:2], [self.course]),
+			{"enrolled": 0, "skipped": 2},
+		)
+		self.assertEqual(frappe.db.count("LMS Enrollment", {"course": self.course, "member": STUDENTS[0]}), 1)
+
+	def test_mark_complete_skips_completed_and_not_enrolled(self):
+		"""Pairs already complete are skipped, students without an enrollment are not marked"""
+		enrolled, not_enrolled = STUDENTS[0], STUDENTS[2]
+		enroll_users([enrolled], [self.course])
+		pairs = [(enrolled, self.lesson), (not_enrolled, self.lesson)]
+
+		self.assertEqual(mark_lessons_complete(pairs), {"completed": 1, "skipped": 0, "not_enrolled": 1})
+		self.assertEqual(mark_lessons_complete(pairs), {"completed": 0, "skipped": 1, "not_enrolled": 1})
+
+		log = frappe.db.get_value(
+			"LMS Student Lesson Log",
+			{"student": enrolled, "lesson": self.lesson},
+			["is_completed", "completion_percentage"],
+			as_dict=True,
+		)
+		self.assertEqual(log.is_completed, 1)
+		self.assertEqual(flt(log.completion_percentage), 100)
+		self.assertFalse(
+			frappe.db.exists("LMS Student Lesson Log", {"student": not_enrolled, "lesson": self.lesson})
+		)
+
+		# Enrollment progress is recomputed from the completed lesson
+		progress = frappe.db.get_value(
+			"LMS Enrollment", {"member": enrolled, "course": self.course}, "progress"
+		)
+		self.assertGreater(flt(progress), 0)
+
+	def test_course_access_requires_instructor(self):
+		check_course_access([self.course])
+
+		frappe.set_user(STUDENTS[0])
+		self.assertRaises(frappe.PermissionError, check_course_access, [self.course])
@@ -0,0 +1,59 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.coverage import (
+	add_segment,
+	count_seconds,
+	decode_coverage,
+	encode_coverage,
+	get_coverage_percentage,
+	get_heartbeat_span,
+	get_intervals,
+)
+
+
+class TestWatchedCoverage(FrappeTestCase):
+	def test_overlapping_segments_count_once(self):
+		"""Rewatching a part doesn't add to the unique seconds"""
+		bitmap = bytearray()
+		self.assertEqual(add_segment(bitmap, 0, 30, 100), 30)
+		self.assertEqual(add_segment(bitmap, 20, 40, 100), 10)
+		self.assertEqual(count_seconds(bitmap), 40)
+		self.assertEqual(get_intervals(bitmap), [[0, 40]])
+
+	def test_seeking_ahead_is_not_watched(self):
+		"""Only the watched segments count, not the furthest position"""
+		bitmap = bytearray()
+		add_segment(bitmap, 0, 10, 100)
+		add_segment(bitmap, 90, 100, 100)
+		self.assertEqual(get_coverage_percentage(bitmap, 100), 20)
+		self.assertEqual(get_intervals(bitmap), [[0, 10], [90, 100]])
+
+	def test_fractional_boundaries_leave_no_gaps(self):
+		"""Heartbeats ending mid-second join up with the next segment"""
+		bitmap = bytearray()
+		add_segment(bitmap, 0, 30.2, 60.5)
+		add_segment(bitmap, 30.2, 60.5, 60.5)
+		self.assertEqual(get_coverage_percentage(bitmap, 60.5), 100)
+
+	def test_bounded_by_video_length(self):
+		"""Segments past the end are clipped, storage follows the video length"""
+		bitmap = bytearray()
+		add_segment(bitmap, 50, 500, 60)
+		self.assertEqual(count_seconds(bitmap), 10)
+		self.assertEqual(len(bitmap), 8)
+
+	def test_encode_roundtrip(self):
+		bitmap = bytearray()
+		add_segment(bitmap, 3, 17, 20)
+		self.assertEqual(decode_coverage(encode_coverage(bitmap)), bitmap)
+		self.assertEqual(decode_coverage(None), bytearray())
+
+	def test_heartbeat_span_follows_playback_speed(self):
+		"""A faster player covers more of the video between two heartbeats"""
+		self.assertEqual(get_heartbeat_span("1x"), 30)
+		self.assertEqual(get_heartbeat_span("2x"), 60)
+		self.assertEqual(get_heartbeat_span("0.5x"), 30)
+		self.assertEqual(get_heartbeat_span(None), 30)
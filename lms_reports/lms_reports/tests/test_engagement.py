@@ -0,0 +1,37 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import unittest
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports import engagement
+from lms_reports.lms_reports.engagement import _summarize_numpy, _summarize_python, get_bucket_seconds
+
+SEGMENTS = [
+	# (row, start, end, speed): student 0 watches to 65s, student 1 stops at 40s in two parts
+	(0, 0, 65, "1x"),
+	(1, 0, 20, "2x"),
+	(1, 20, 40, "2x"),
+	(1, 40, 40, "2x"),
+]
+
+
+class TestLessonEngagement(FrappeTestCase):
+	def assert_summary(self, summary):
+		self.assertEqual(summary["students"], 2)
+		self.assertEqual(summary["retention"], [2, 2, 1])
+		self.assertEqual(summary["drop_off"], [0, 1, 1])
+		self.assertEqual(summary["speed_seconds"], {"1x": 65, "2x": 40})
+		self.assertEqual(summary["speed_students"], {"1x": 1, "2x": 1})
+
+	def test_python_bucketing(self):
+		self.assert_summary(_summarize_python(SEGMENTS, 2, 30, 3))
+
+	@unittest.skipIf(engagement.np is None, "NumPy is not installed")
+	def test_numpy_bucketing(self):
+		self.assert_summary(_summarize_numpy(SEGMENTS, 2, 30, 3))
+
+	def test_long_video_buckets_are_widened(self):
+		self.assertEqual(get_bucket_seconds(600, 30), 30)
+		self.assertEqual(get_bucket_seconds(4 * 60 * 60, 30), 72)
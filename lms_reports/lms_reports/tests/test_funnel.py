@@ -0,0 +1,58 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from lms_reports.lms_reports.funnel import get_log_counts
+
+COURSE = "test-funnel-course"
+LESSON = "test-funnel-lesson"
+STANDARD_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "docstatus"]
+
+
+def insert_rows(doctype, fields, rows):
+	now = now_datetime()
+	frappe.db.bulk_insert(
+		doctype,
+		[*STANDARD_FIELDS, *fields],
+		[
+			[frappe.generate_hash(length=10), now, now, "Administrator", "Administrator", 0, *row]
+			for row in rows
+		],
+	)
+
+
+class TestFunnelLogCounts(FrappeTestCase):
+	def setUp(self):
+		super().setUp()
+		frappe.db.delete("LMS Student Lesson Log", {"course": COURSE})
+		frappe.db.delete("LMS Enrollment", {"course": COURSE})
+
+	def add_logs(self, logs):
+		insert_rows(
+			"LMS Student Lesson Log",
+			["student", "course", "lesson", "completion_percentage", "is_completed"],
+			[
+				[student, COURSE, LESSON, completion, is_completed]
+				for student, completion, is_completed in logs
+			],
+		)
+
+	def enroll(self, *students):
+		insert_rows("LMS Enrollment", ["member", "course"], [[student, COURSE] for student in students])
+
+	def test_watched_uses_only_the_threshold(self):
+		"""A lesson marked complete below the threshold is started but not watched"""
+		self.enroll("watched@example.com", "marked@example.com")
+		self.add_logs([("watched@example.com", 95, 0), ("marked@example.com", 40, 1)])
+
+		self.assertEqual(get_log_counts(COURSE, 90), {LESSON: (2, 1)})
+
+	def test_students_are_counted_once(self):
+		"""Duplicate enrollments don't double count, students without one aren't counted"""
+		self.enroll("twice@example.com", "twice@example.com")
+		self.add_logs([("twice@example.com", 100, 1), ("not-enrolled@example.com", 100, 1)])
+
+		self.assertEqual(get_log_counts(COURSE, 90), {LESSON: (1, 1)})
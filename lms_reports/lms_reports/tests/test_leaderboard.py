@@ -0,0 +1,70 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.leaderboard import (
+	LocalLeaderboard,
+	decode_score,
+	encode_score,
+	update_leaderboard,
+)
+
+
+class TestLeaderboard(FrappeTestCase):
+	def test_score_order(self):
+		"""Higher progress first, then whoever reached it earlier"""
+		early = encode_score(80, "2026-10-01 10:00:00")
+		late = encode_score(80, "2026-10-02 10:00:00")
+		ahead = encode_score(80.5, "2026-10-03 10:00:00")
+		self.assertGreater(early, late)
+		self.assertGreater(ahead, early)
+
+		progress, reached_at = decode_score(early)
+		self.assertEqual(progress, 80)
+		self.assertEqual(str(reached_at), "2026-10-01 10:00:00")
+
+	def test_rank_and_top(self):
+		board = LocalLeaderboard()
+		board.set_scores(
+			{
+				"a@example.com": encode_score(50, "2026-10-01"),
+				"b@example.com": encode_score(90, "2026-10-02"),
+				"c@example.com": encode_score(90, "2026-10-01"),
+			}
+		)
+		self.assertEqual([member for member, _score in board.top(2)], ["c@example.com", "b@example.com"])
+		self.assertEqual(board.rank("a@example.com"), 2)
+		self.assertIsNone(board.rank("d@example.com"))
+
+		board.remove("c@example.com")
+		self.assertEqual(board.rank("b@example.com"), 0)
+		self.assertEqual(board.count(), 2)
+
+	def test_unchanged_progress_keeps_its_time(self):
+		board = LocalLeaderboard()
+		board.set_scores({"a@example.com": encode_score(40, "2026-10-01")})
+
+		update_leaderboard("Course", {"a@example.com": 40}, board=board)
+		self.assertEqual(str(decode_score(board.get_score("a@example.com"))[1]), "2026-10-01 00:00:00")
+
+		update_leaderboard("Course", {"a@example.com": 60, "b@example.com": 10}, board=board)
+		self.assertEqual(decode_score(board.get_score("a@example.com"))[0], 60)
+		self.assertEqual(board.rank("b@example.com"), 1)
+
+	def test_ties_match_redis_order(self):
+		"""Equal scores rank the greater member first, like ZREVRANGE"""
+		board = LocalLeaderboard()
+		score = encode_score(70, "2026-10-01")
+		board.set_scores(
+			{"a@example.com": score, "b@example.com": score, "c@example.com": encode_score(10, "2026-10-01")}
+		)
+		self.assertEqual(
+			[member for member, _score in board.top(3)], ["b@example.com", "a@example.com", "c@example.com"]
+		)
+		self.assertEqual(board.rank("b@example.com"), 0)
+		self.assertEqual(board.rank("a@example.com"), 1)
+		self.assertEqual(
+			[member for member, _score in board.top(2, offset=1)], ["a@example.com", "c@example.com"]
+		)
+		self.assertEqual(board.top(2, offset=3), [])
@@ -0,0 +1,35 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lesson_locker import (
+	LESSON_COMPLETED,
+	LESSON_QUIZ_DONE,
+	LESSON_UNLOCKED,
+	LESSON_VIDEO_DONE,
+	pack_lesson_flags,
+	unpack_lesson_flags,
+)
+
+
+class TestLessonLockBits(FrappeTestCase):
+	def test_pack_roundtrip(self):
+		"""Flags survive packing for odd and even lesson counts"""
+		flags = [
+			LESSON_UNLOCKED | LESSON_COMPLETED | LESSON_VIDEO_DONE | LESSON_QUIZ_DONE,
+			LESSON_UNLOCKED | LESSON_VIDEO_DONE,
+			0,
+			LESSON_UNLOCKED,
+			LESSON_QUIZ_DONE,
+		]
+
+		for count in (0, 1, 4, 5):
+			encoded = pack_lesson_flags(flags[:count])
+			self.assertEqual(unpack_lesson_flags(encoded, count), flags[:count])
+
+	def test_packed_size(self):
+		"""Two lessons are packed per byte"""
+		encoded = pack_lesson_flags([LESSON_UNLOCKED] * 200)
+		# 100 bytes of flags, base64 encoded
+		self.assertEqual(len(encoded), 136)
@@ -0,0 +1,41 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.progress_tracker import DEFAULT_WEIGHTING, calculate_lesson_progress
+
+
+class TestLessonProgressWeighting(FrappeTestCase):
+	def test_default_weighting(self):
+		"""Video and quiz count 60/40 by default"""
+		progress = calculate_lesson_progress(
+			frappe._dict(DEFAULT_WEIGHTING), True, video_completion=100, quiz_score=50
+		)
+		self.assertEqual(progress["progress_percentage"], 80)
+		self.assertTrue(progress["video_watched"])
+		self.assertFalse(progress["quiz_completed"])
+		self.assertFalse(progress["is_completed"])
+
+	def test_custom_weighting_and_threshold(self):
+		"""Course weighting and watched threshold are applied"""
+		weighting = frappe._dict(video_weight=20, quiz_weight=80, watched_threshold=80)
+		progress = calculate_lesson_progress(
+			weighting, True, video_completion=85, quiz_score=100, passing_percentage=70
+		)
+		self.assertEqual(progress["progress_percentage"], 97)
+		self.assertTrue(progress["is_completed"])
+
+	def test_lesson_without_quiz(self):
+		"""Lessons without a quiz only count video progress"""
+		progress = calculate_lesson_progress(frappe._dict(DEFAULT_WEIGHTING), False, video_completion=40)
+		self.assertEqual(progress["progress_percentage"], 40)
+		self.assertIsNone(progress["quiz_completed"])
+
+	def test_unsubmitted_quiz(self):
+		"""A quiz that was never submitted is not completed"""
+		progress = calculate_lesson_progress(
+			frappe._dict(DEFAULT_WEIGHTING), True, video_completion=100, passing_percentage=0
+		)
+		self.assertFalse(progress["quiz_completed"])
@@ -0,0 +1,43 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.quiz_analytics import (
+	apply_attempt,
+	decode_stats,
+	encode_stats,
+	get_empty_stats,
+	summarize_attempts,
+)
+
+
+class TestQuizAnalytics(FrappeTestCase):
+	def test_incremental_matches_rebuild(self):
+		"""Applying submissions one by one gives the same stats as summarizing them"""
+		incremental = get_empty_stats()
+		rebuilt = get_empty_stats()
+
+		for percentages in ([40, 100], [100], [20, 60], [90]):
+			counters = (0, 0, 0)
+			for i in range(1, len(percentages) + 1):
+				after = summarize_attempts(percentages[:i])
+				apply_attempt(incremental, counters, after)
+				counters = after
+			apply_attempt(rebuilt, (0, 0, 0), summarize_attempts(percentages))
+
+		self.assertEqual(incremental, rebuilt)
+		self.assertEqual(incremental.students, 4)
+		self.assertEqual(incremental.passed, 2)
+		self.assertEqual(incremental.first_attempt_passes, 1)
+		self.assertEqual(incremental.abandoned, 2)
+		self.assertEqual(incremental.attempts_histogram[:3], [1, 1, 0])
+		self.assertEqual(incremental.score_histogram, [0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 2])
+
+	def test_summarize_attempts(self):
+		self.assertEqual(summarize_attempts([50, 100, 80]), (3, 100, 2))
+		self.assertEqual(summarize_attempts([50, 70]), (2, 70, 0))
+
+	def test_stats_roundtrip(self):
+		stats = apply_attempt(get_empty_stats(), (0, 0, 0), (1, 100, 1))
+		self.assertEqual(decode_stats(encode_stats(stats)), stats)
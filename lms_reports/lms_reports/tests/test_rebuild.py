@@ -0,0 +1,59 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from datetime import datetime
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.rebuild import build_log_values, merge_log_values
+
+
+class TestRebuildMerge(FrappeTestCase):
+	def setUp(self):
+		self.lesson = frappe._dict(course="course-1", chapter="chapter-1")
+		self.log = frappe._dict(
+			student_name="Student",
+			course="course-1",
+			chapter="chapter-1",
+			watched_duration=540,
+			video_speed="1.5x",
+			quiz_attempts=3,
+			quiz_best_score=100,
+			quiz_passed_at_attempt=2,
+			is_completed=1,
+			completion_percentage=100,
+			last_watched_timestamp=datetime(2026, 5, 1, 10, 0),
+		)
+
+	def test_tracked_log_is_unchanged(self):
+		"""A log written by tracking is not lowered by sources that know less"""
+		values = build_log_values(
+			"student@example.com", self.lesson, {"video": [], "quiz": [], "progress": []}
+		)
+		values["student_name"] = "Student"
+		values["completion_percentage"] = 0
+
+		self.assertEqual(merge_log_values(self.log, values), {})
+
+	def test_missing_values_are_filled(self):
+		"""Empty fields are filled and counters raised"""
+		log = frappe._dict(course="course-1", chapter="chapter-1", quiz_attempts=1, video_speed=None)
+		values = {
+			"course": "course-1",
+			"chapter": "chapter-1",
+			"video_speed": "1x",
+			"quiz_attempts": 2,
+			"quiz_passed_at_attempt": 2,
+			"last_watched_timestamp": datetime(2026, 5, 1, 10, 0),
+		}
+
+		self.assertEqual(
+			merge_log_values(log, values),
+			{
+				"video_speed": "1x",
+				"quiz_attempts": 2,
+				"quiz_passed_at_attempt": 2,
+				"last_watched_timestamp": datetime(2026, 5, 1, 10, 0),
+			},
+		)
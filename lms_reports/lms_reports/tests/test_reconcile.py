@@ -0,0 +1,29 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.coverage import add_segment, encode_coverage
+from lms_reports.lms_reports.reconcile import get_completion_update
+
+
+class TestReconcile(FrappeTestCase):
+	def test_completed_log(self):
+		"""A log completed in LMS Course Progress gets both fields set"""
+		row = {"name": "log", "is_completed": 1, "watched_coverage": None, "video_total_duration": 60}
+		self.assertEqual(get_completion_update(row), {"is_completed": 1, "completion_percentage": 100})
+
+	def test_reset_log_falls_back_to_coverage(self):
+		"""A reset log gets the share of the video actually watched, not 100%"""
+		coverage = bytearray()
+		add_segment(coverage, 0, 30, 60)
+		row = {
+			"name": "log",
+			"is_completed": 0,
+			"watched_coverage": encode_coverage(coverage),
+			"video_total_duration": 60,
+		}
+		self.assertEqual(get_completion_update(row), {"is_completed": 0, "completion_percentage": 50})
+
+		row["watched_coverage"] = None
+		self.assertEqual(get_completion_update(row), {"is_completed": 0, "completion_percentage": 0})
@@ -0,0 +1,90 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, flt, now_datetime
+
+from lms_reports.lms_reports.api import get_student_progress
+
+COURSE = "test-student-progress-course"
+COMPLETION = [50, 20, 50, 80, 20, 50]
+
+
+class TestStudentProgressPaging(FrappeTestCase):
+	def setUp(self):
+		super().setUp()
+		frappe.set_user("Administrator")
+		frappe.db.delete("LMS Student Lesson Log", {"course": COURSE})
+
+		now = now_datetime()
+		rows = []
+		for i, completion in enumerate(COMPLETION):
+			# Same timestamp for pairs of logs, so ties are broken by name
+			timestamp = add_to_date(now, minutes=-(i // 2))
+			rows.append(
+				[
+					f"test-progress-log-{i}",
+					now,
+					now,
+					"Administrator",
+					"Administrator",
+					0,
+					f"student-{i}@example.com",
+					COURSE,
+					f"lesson-{i}",
+					completion,
+					timestamp,
+				]
+			)
+		frappe.db.bulk_insert(
+			"LMS Student Lesson Log",
+			[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"docstatus",
+				"student",
+				"course",
+				"lesson",
+				"completion_percentage",
+				"last_watched_timestamp",
+			],
+			rows,
+		)
+
+	def get_all_pages(self, **kwargs):
+		rows, cursor = [], None
+		while True:
+			page = get_student_progress(course=COURSE, limit=2, cursor=cursor, **kwargs)
+			self.assertLessEqual(len(page["rows"]), 2)
+			rows.extend(page["rows"])
+			cursor = page["next_cursor"]
+			if not cursor:
+				return rows
+
+	def test_keyset_pages_follow_sort_order(self):
+		"""Pages concatenate to the full sorted list, ties broken by name, no row twice"""
+		for sort_by, sort_order in (
+			("completion_percentage", "asc"),
+			("completion_percentage", "desc"),
+			("last_watched_timestamp", "desc"),
+		):
+			rows = self.get_all_pages(sort_by=sort_by, sort_order=sort_order)
+			key = flt if sort_by == "completion_percentage" else str
+
+			self.assertEqual(len({row.name for row in rows}), len(COMPLETION))
+			self.assertEqual(
+				[row.name for row in rows],
+				[
+					row.name
+					for row in sorted(
+						rows, key=lambda row: (key(row[sort_by]), row.name), reverse=sort_order == "desc"
+					)
+				],
+			)
+
+	def test_invalid_sort_field(self):
+		self.assertRaises(frappe.ValidationError, get_student_progress, course=COURSE, sort_by="owner")
@@ -0,0 +1,52 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from lms_reports.lms_reports.watch_history import compress_rows, decompress_rows, merge_sessions
+
+
+def heartbeat(watched_at, start, end, speed="1x"):
+	return {
+		"watched_at": watched_at,
+		"video_speed": speed,
+		"start_time": start,
+		"end_time": end,
+		"duration_watched": end,
+	}
+
+
+class TestWatchHistoryCompaction(FrappeTestCase):
+	def test_consecutive_heartbeats_merge(self):
+		"""Heartbeats continuing each other become one session row"""
+		sessions = merge_sessions(
+			[
+				heartbeat("2026-10-01 10:00:00", 0, 30),
+				heartbeat("2026-10-01 10:00:30", 30, 60),
+				heartbeat("2026-10-01 10:01:00", 60, 90),
+			]
+		)
+		self.assertEqual(len(sessions), 1)
+		self.assertEqual(sessions[0].start_time, 0)
+		self.assertEqual(sessions[0].end_time, 90)
+		self.assertEqual(sessions[0].duration_watched, 90)
+		self.assertEqual(str(sessions[0].watched_at), "2026-10-01 10:00:00")
+
+	def test_session_breaks(self):
+		"""A long pause, a seek or a speed change starts a new session"""
+		sessions = merge_sessions(
+			[
+				heartbeat("2026-10-01 10:00:00", 0, 30),
+				heartbeat("2026-10-01 11:00:00", 30, 60),
+				heartbeat("2026-10-01 11:00:30", 300, 330),
+				heartbeat("2026-10-01 11:01:00", 330, 360, speed="2x"),
+			],
+			session_gap=300,
+		)
+		self.assertEqual(len(sessions), 4)
+
+	def test_archive_roundtrip(self):
+		rows = merge_sessions([heartbeat("2026-10-01 10:00:00", 0, 30)])
+		restored = decompress_rows(compress_rows(rows))
+		self.assertEqual(restored[0]["end_time"], 30)
+		self.assertEqual(restored[0]["watched_at"], "2026-10-01 10:00:00")
@@ -0,0 +1,327 @@
+# Copyright (c) 2026, LMS Reports and contributors
+# For license information, please see license.txt
+
+"""
+Compaction and archival of LMS Watch History.
+
+The player reports one history row per heartbeat. A daily job:
+- merges consecutive heartbeats of one viewing session into a single row
+  (start, end, speed, last position), for logs changed since the last run
+- moves rows older than the retention horizon (LMS Reports Settings) into
+  LMS Watch History Archive as zlib-compressed JSON, one record per log and run
+
+Both passes work in bounded batches of logs, committed one batch at a time,
+and write child rows with plain queries so the lesson log's `modified` (and
+the realtime pipeline) is left alone.
+"""
+
+import base64
+import json
+import zlib
+
+import frappe
+from frappe.utils import add_days, add_to_date, cint, flt, get_datetime, now_datetime
+
+from lms_reports.lms_reports.engagement import clear_lessons_engagement_cache
+
+HISTORY_DOCTYPE = "LMS Watch History"
+ARCHIVE_DOCTYPE = "LMS Watch History Archive"
+LOG_DOCTYPE = "LMS Student Lesson Log"
+
+HISTORY_FIELDS = ["watched_at", "video_speed", "start_time", "end_time", "duration_watched"]
+
+# Logs rewritten per batch, and batches per run; the rest waits for the next run
+BATCH_SIZE = 200
+MAX_BATCHES = 50
+
+# Max seconds between the end of a row and the start of the next within a session
+DEFAULT_SESSION_GAP = 300
+
+# Position slack, in seconds, for heartbeats that continue the previous one
+POSITION_SLACK = 5
+
+
+def merge_sessions(rows, session_gap=DEFAULT_SESSION_GAP):
+	"""
+	Merge consecutive heartbeat rows of the same viewing session
+
+	Rows belong to the same session when they follow each other within
+	`session_gap` seconds, at the same speed, and the next one starts where
+	the previous one ended (seeking or rewinding starts a new session).
+
+	Args:
+		rows: history rows (dicts with HISTORY_FIELDS) in watch order
+		session_gap: max seconds between two rows of one session
+
+	Returns:
+		list of merged rows; watched_at is the time the session started and
+		duration_watched, the player position, is the session's last one
+	"""
+	sessions = []
+	last_seen = None
+	for row in rows:
+		row = frappe._dict({field: row.get(field) for field in HISTORY_FIELDS})
+		watched_at = get_datetime(row.watched_at)
+		current = sessions[-1] if sessions else None
+
+		if (
+			current
+			and (row.video_speed or None) == (current.video_speed or None)
+			and (watched_at - last_seen).total_seconds() <= session_gap
+			and flt(current.start_time) - POSITION_SLACK
+			<= flt(row.start_time)
+			<= flt(current.end_time) + POSITION_SLACK
+		):
+			current.end_time = max(flt(current.end_time), flt(row.end_time))
+			current.duration_watched = row.duration_watched
+		else:
+			row.watched_at = watched_at
+			sessions.append(row)
+
+		last_seen = watched_at
+
+	return sessions
+
+
+def compress_rows(rows):
+	return base64.b64encode(zlib.compress(json.dumps(rows, default=str).encode())).decode()
+
+
+def decompress_rows(value):
+	return json.loads(zlib.decompress(base64.b64decode(value))) if value else []
+
+
+def get_archived_history(lesson_log):
+	"""All archived history rows of a lesson log, oldest first"""
+	rows = []
+	for archive in frappe.get_all(
+		ARCHIVE_DOCTYPE,
+		filters={"lesson_log": lesson_log},
+		fields=["compressed_rows"],
+		order_by="from_date asc",
+	):
+		rows.extend(decompress_rows(archive.compressed_rows))
+	return rows
+
+
+def rewrite_history(logs, cutoff=None, session_gap=DEFAULT_SESSION_GAP):
+	"""
+	Compact the history of a batch of logs and archive rows older than `cutoff`
+
+	Args:
+		logs: dict {log name: log row with student, course, lesson}
+		cutoff: rows watched before this are archived, None to keep everything
+		session_gap: see `merge_sessions`
+
+	Returns:
+		int: history rows removed from the hot table
+	"""
+	history = {}
+	for row in frappe.get_all(
+		HISTORY_DOCTYPE,
+		filters={"parenttype": LOG_DOCTYPE, "parent": ["in", list(logs)]},
+		fields=["name", "parent", "parentfield", *HISTORY_FIELDS],
+		order_by="parent asc, idx asc",
+	):
+		history.setdefault(row.parent, []).append(row)
+
+	reclaimed = 0
+	new_rows = []
+	archives = []
+	stale = []
+	lessons = set()
+	now = now_datetime()
+	for log_name, rows in history.items():
+		old, recent = [], []
+		for row in rows:
+			(old if cutoff and get_datetime(row.watched_at) < cutoff else recent).append(row)
+		kept = merge_sessions(recent, session_gap)
+
+		if not old and len(kept) == len(rows):
+			continue
+
+		if old:
+			archived = merge_sessions(old, session_gap)
+			# Rows of a deleted log are archived without its details
+			log = logs.get(log_name) or frappe._dict()
+			archives.append(
+				{
+					"lesson_log": log_name,
+					"student": log.student,
+					"course": log.course,
+					"lesson": log.lesson,
+					"from_date": archived[0].watched_at,
+					"to_date": get_datetime(old[-1].watched_at),
+					"row_count": len(archived),
+					"compressed_rows": compress_rows(archived),
+				}
+			)
+
+		stale.extend(r.name for r in rows)
+		lessons.add((logs.get(log_name) or {}).get("lesson"))
+		for idx, row in enumerate(kept, start=1):
+			new_rows.append(
+				[
+					frappe.generate_hash(length=10),
+					now,
+					now,
+					"Administrator",
+					"Administrator",
+					log_name,
+					LOG_DOCTYPE,
+					rows[0].parentfield,
+					idx,
+					*(row.get(field) for field in HISTORY_FIELDS),
+				]
+			)
+		reclaimed += len(rows) - len(kept)
+
+	if archives:
+		insert_archives(archives)
+	if stale:
+		frappe.db.delete(HISTORY_DOCTYPE, {"name": ["in", stale]})
+	if new_rows:
+		frappe.db.bulk_insert(
+			HISTORY_DOCTYPE,
+			[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"parent",
+				"parenttype",
+				"parentfield",
+				"idx",
+				*HISTORY_FIELDS,
+			],
+			new_rows,
+		)
+	clear_lessons_engagement_cache(lessons)
+
+	return reclaimed
+
+
+def insert_archives(archives):
+	now = now_datetime()
+	fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", *archives[0]]
+	frappe.db.bulk_insert(
+		ARCHIVE_DOCTYPE,
+		fields,
+		[
+			[
+				frappe.generate_hash(length=10),
+				now,
+				now,
+				"Administrator",
+				"Administrator",
+				0,
+				*archive.values(),
+			]
+			for archive in archives
+		],
+	)
+
+
+def get_logs(names):
+	return {
+		log.name: log
+		for log in frappe.get_all(
+			LOG_DOCTYPE,
+			filters={"name": ["in", list(names)]},
+			fields=["name", "student", "course", "lesson", "modified"],
+		)
+	}
+
+
+def compact_watch_history():
+	"""
+	Daily job: compact recently changed histories and archive old rows
+
+	Reports the rows reclaimed in LMS Reports Settings and the lms_reports logger.
+	"""
+	settings = frappe.get_cached_doc("LMS Reports Settings")
+	session_gap = cint(settings.history_session_gap) or DEFAULT_SESSION_GAP
+	retention_days = cint(settings.history_retention_days)
+	cutoff = get_datetime(add_days(now_datetime(), -retention_days)) if retention_days > 0 else None
+
+	# Saving a log rewrites its history rows, so logs still being watched are
+	# left alone until their session has gone idle
+	idle_before = add_to_date(now_datetime(), seconds=-session_gap)
+	reclaimed = 0
+
+	# Logs with new heartbeats since the last run, oldest change first. The
+	# watermark is a (modified, name) keyset, so logs sharing a timestamp
+	# across a batch boundary are not skipped
+	watermark = settings.history_compaction_watermark
+	watermark_name = settings.history_compaction_watermark_name or ""
+	Log = frappe.qb.DocType(LOG_DOCTYPE)
+	for _batch in range(MAX_BATCHES):
+		query = (
+			frappe.qb.from_(Log)
+			.select(Log.name, Log.student, Log.course, Log.lesson, Log.modified)
+			.where(Log.modified < idle_before)
+			.orderby(Log.modified)
+			.orderby(Log.name)
+			.limit(BATCH_SIZE)
+		)
+		if watermark:
+			query = query.where(
+				(Log.modified > watermark) | ((Log.modified == watermark) & (Log.name > watermark_name))
+			)
+
+		batch = query.run(as_dict=True)
+		if not batch:
+			break
+
+		reclaimed += rewrite_history({log.name: log for log in batch}, cutoff, session_gap)
+		watermark, watermark_name = batch[-1].modified, batch[-1].name
+		frappe.db.set_single_value(
+			"LMS Reports Settings",
+			{"history_compaction_watermark": watermark, "history_compaction_watermark_name": watermark_name},
+		)
+		frappe.db.commit()
+
+		if len(batch) < BATCH_SIZE:
+			break
+
+	# Logs still holding rows past the retention horizon, found via the watched_at index
+	if cutoff:
+		after = None
+		for _batch in range(MAX_BATCHES):
+			filters = {"parenttype": LOG_DOCTYPE, "watched_at": ["<", cutoff]}
+			if after:
+				filters["parent"] = [">", after]
+
+			parents = frappe.get_all(
+				HISTORY_DOCTYPE,
+				filters=filters,
+				distinct=True,
+				pluck="parent",
+				order_by="parent asc",
+				limit_page_length=BATCH_SIZE,
+			)
+			if not parents:
+				break
+
+			logs = get_logs(parents)
+			for parent in parents:
+				logs.setdefault(parent, frappe._dict(name=parent))
+			idle = {
+				name: log
+				for name, log in logs.items()
+				if not log.modified or get_datetime(log.modified) < idle_before
+			}
+
+			reclaimed += rewrite_history(idle, cutoff, session_gap)
+			frappe.db.commit()
+			after = parents[-1]
+
+	frappe.db.set_single_value(
+		"LMS Reports Settings",
+		{"last_history_compaction": now_datetime(), "history_rows_reclaimed": reclaimed},
+	)
+	frappe.db.commit()
+
+	frappe.logger("lms_reports").info(f"Watch history compaction reclaimed {reclaimed} rows")
+	return reclaimed
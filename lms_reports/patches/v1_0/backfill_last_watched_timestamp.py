@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	"""Give lesson logs without activity their creation time, so the column is never NULL"""
+	for doctype in ("LMS Student Lesson Log", "LMS Student Lesson Log Archive"):
+		Log = frappe.qb.DocType(doctype)
+		(
+			frappe.qb.update(Log)
+			.set(Log.last_watched_timestamp, Log.creation)
+			.where(Log.last_watched_timestamp.isnull())
+		).run()
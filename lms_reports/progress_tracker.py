@@ -7,83 +7,265 @@ Calculates progress based on:
 """
 
 import frappe
-from frappe.utils import flt, cint
+from frappe import _
+from frappe.utils import cint, flt
 
+from lms_reports.lms_reports.api import get_watermark, make_delta_response
+from lms_reports.lms_reports.leaderboard import update_leaderboard
+from lms_reports.lms_reports.realtime import queue_course_progress
 
-def get_enhanced_course_progress(course, member=None):
+# Used for courses without an LMS Course Progress Weighting
+DEFAULT_WEIGHTING = {
+	"video_weight": 60,
+	"quiz_weight": 40,
+	"watched_threshold": 95
+}
+
+# Default passing percentage of quizzes that don't set one
+DEFAULT_PASSING_PERCENTAGE = 70
+
+# Enrollments recomputed and committed per batch by `recompute_course_progress`
+RECOMPUTE_CHUNK_SIZE = 500
+
+# Marks a full recompute in the changed lessons of `update_course_progress_realtime`
+ALL_LESSONS = "*"
+
+# Seconds cached lesson progress of a member is kept after the last update
+MEMBER_PROGRESS_CACHE_TTL = 7 * 24 * 3600
+
+
+def get_progress_weighting(course):
 	"""
-	Calculate real-time course progress including video and quiz completion
+	Get the video/quiz weighting and watched threshold of a course
+
+	Returns:
+		frappe._dict with video_weight, quiz_weight and watched_threshold
+	"""
+	weighting = frappe.db.get_value(
+		"LMS Course Progress Weighting",
+		course,
+		list(DEFAULT_WEIGHTING),
+		as_dict=True
+	)
+	return frappe._dict(weighting or DEFAULT_WEIGHTING)
+
+
+def calculate_lesson_progress(weighting, has_quiz, is_complete=False, video_completion=0,
+		quiz_score=None, passing_percentage=DEFAULT_PASSING_PERCENTAGE):
+	"""
+	Calculate the progress of one lesson from already fetched values
 
 	Args:
-		course: Course name
-		member: Student email (defaults to current user)
+		weighting: see `get_progress_weighting`
+		has_quiz: the lesson has a quiz
+		is_complete: the lesson is complete in LMS Course Progress
+		video_completion: video completion percentage from the lesson log
+		quiz_score: latest quiz percentage, None if never submitted
+		passing_percentage: quiz passing percentage
 
 	Returns:
 		dict: {
-			'overall_progress': float,  # 0-100
-			'lessons_completed': int,
-			'total_lessons': int,
-			'videos_watched': int,
-			'quizzes_completed': int
+			'progress_percentage': float (0-100),
+			'is_completed': bool,
+			'video_watched': bool,
+			'quiz_completed': bool or None
 		}
 	"""
-	if not member:
-		member = frappe.session.user
+	if is_complete:
+		return {
+			'progress_percentage': 100,
+			'is_completed': True,
+			'video_watched': True,
+			'quiz_completed': True
+		}
+
+	video_completion = flt(video_completion)
+	video_watched = video_completion >= flt(weighting.watched_threshold)
+
+	quiz_completed = None
+	if has_quiz:
+		quiz_completed = quiz_score is not None and flt(quiz_score) >= flt(passing_percentage)
+		progress = (
+			video_completion * flt(weighting.video_weight)
+			+ flt(quiz_score) * flt(weighting.quiz_weight)
+		) / 100
+	else:
+		# Lesson only has video
+		progress = video_completion
+
+	return {
+		'progress_percentage': flt(progress, 2),
+		'is_completed': video_watched and (quiz_completed if has_quiz else True),
+		'video_watched': video_watched,
+		'quiz_completed': quiz_completed
+	}
+
 
-	# Get all lessons in course
-	lessons = frappe.db.get_all(
+def get_course_lessons(course):
+	return frappe.db.get_all(
 		"Course Lesson",
 		filters={"course": course},
 		fields=["name", "quiz_id"]
 	)
 
-	if not lessons:
-		return {
-			'overall_progress': 0,
-			'lessons_completed': 0,
-			'total_lessons': 0,
-			'videos_watched': 0,
-			'quizzes_completed': 0
-		}
 
-	total_lessons = len(lessons)
-	completed_lessons = 0
-	videos_watched = 0
-	quizzes_completed = 0
-	total_progress_points = 0
+def get_members_lesson_progress(course, members, weighting=None, lessons=None):
+	"""
+	Calculate lesson progress of several members with a fixed number of queries
+
+	Args:
+		course: Course name
+		members: list of student emails
+		weighting: see `get_progress_weighting`, fetched when not given
+		lessons: Course Lesson rows (name, quiz_id) to calculate, all lessons of
+			the course when not given
+
+	Returns:
+		dict: {member: {lesson: progress dict, see `calculate_lesson_progress`}}
+	"""
+	weighting = weighting or get_progress_weighting(course)
+	if lessons is None:
+		lessons = get_course_lessons(course)
+
+	result = {member: {} for member in members}
+	if not lessons or not members:
+		return result
+
+	lesson_names = [l.name for l in lessons]
+	quiz_ids = list({l.quiz_id for l in lessons if l.quiz_id})
+
+	completed = {
+		(row.member, row.lesson)
+		for row in frappe.get_all(
+			"LMS Course Progress",
+			filters={"member": ["in", members], "lesson": ["in", lesson_names], "status": "Complete"},
+			fields=["member", "lesson"]
+		)
+	}
+
+	video_map = {
+		(row.student, row.lesson): row.completion_percentage
+		for row in frappe.get_all(
+			"LMS Student Lesson Log",
+			filters={"student": ["in", members], "lesson": ["in", lesson_names]},
+			fields=["student", "lesson", "completion_percentage"]
+		)
+	}
 
-	for lesson in lessons:
-		lesson_progress = get_lesson_progress(lesson.name, member)
-		total_progress_points += lesson_progress['progress_percentage']
+	passing_map = {}
+	score_map = {}
+	if quiz_ids:
+		passing_map = dict(frappe.get_all(
+			"LMS Quiz",
+			filters={"name": ["in", quiz_ids]},
+			fields=["name", "passing_percentage"],
+			as_list=True
+		))
+
+		# Newest first, so the first row seen per quiz is the latest attempt
+		for submission in frappe.get_all(
+			"LMS Quiz Submission",
+			filters={"quiz": ["in", quiz_ids], "member": ["in", members]},
+			fields=["member", "quiz", "percentage"],
+			order_by="creation desc"
+		):
+			score_map.setdefault((submission.member, submission.quiz), submission.percentage or 0)
+
+	for member in members:
+		for lesson in lessons:
+			result[member][lesson.name] = calculate_lesson_progress(
+				weighting,
+				bool(lesson.quiz_id),
+				is_complete=(member, lesson.name) in completed,
+				video_completion=video_map.get((member, lesson.name)),
+				quiz_score=score_map.get((member, lesson.quiz_id)),
+				passing_percentage=passing_map.get(lesson.quiz_id) or DEFAULT_PASSING_PERCENTAGE
+			)
+
+	return result
+
+
+def summarize_lesson_progress(lesson_progress, total_lessons):
+	"""Build a course summary (see `get_enhanced_course_progress`) from lesson progress dicts"""
+	summary = {
+		'overall_progress': 0,
+		'lessons_completed': 0,
+		'total_lessons': total_lessons,
+		'videos_watched': 0,
+		'quizzes_completed': 0
+	}
+	if not total_lessons:
+		return summary
 
-		if lesson_progress['is_completed']:
-			completed_lessons += 1
+	total_progress_points = 0
+	for progress in lesson_progress:
+		total_progress_points += progress['progress_percentage']
+
+		if progress['is_completed']:
+			summary['lessons_completed'] += 1
 
-		if lesson_progress['video_watched']:
-			videos_watched += 1
+		if progress['video_watched']:
+			summary['videos_watched'] += 1
 
-		if lesson_progress['quiz_completed']:
-			quizzes_completed += 1
+		if progress['quiz_completed']:
+			summary['quizzes_completed'] += 1
 
 	# Calculate overall progress (average of all lesson progress)
-	overall_progress = flt(total_progress_points / total_lessons, 2) if total_lessons > 0 else 0
+	summary['overall_progress'] = flt(total_progress_points / total_lessons, 2)
+	return summary
+
+
+def get_members_course_progress(course, members, weighting=None):
+	"""
+	Calculate course progress of several members with a fixed number of queries
+
+	Args:
+		course: Course name
+		members: list of student emails
+		weighting: see `get_progress_weighting`, fetched when not given
+
+	Returns:
+		dict: {member: summary dict, see `get_enhanced_course_progress`}
+	"""
+	lessons = get_course_lessons(course)
+	progress = get_members_lesson_progress(course, members, weighting, lessons)
 
 	return {
-		'overall_progress': overall_progress,
-		'lessons_completed': completed_lessons,
-		'total_lessons': total_lessons,
-		'videos_watched': videos_watched,
-		'quizzes_completed': quizzes_completed
+		member: summarize_lesson_progress(progress[member].values(), len(lessons))
+		for member in members
 	}
 
 
+def get_enhanced_course_progress(course, member=None):
+	"""
+	Calculate real-time course progress including video and quiz completion
+
+	Args:
+		course: Course name
+		member: Student email (defaults to current user)
+
+	Returns:
+		dict: {
+			'overall_progress': float,  # 0-100
+			'lessons_completed': int,
+			'total_lessons': int,
+			'videos_watched': int,
+			'quizzes_completed': int
+		}
+	"""
+	if not member:
+		member = frappe.session.user
+
+	return get_members_course_progress(course, [member])[member]
+
+
 def get_lesson_progress(lesson, member):
 	"""
 	Calculate progress for a single lesson
 
-	Progress calculation:
-	- Video: 60% weight
-	- Quiz: 40% weight
+	Progress calculation (weights per course, see `get_progress_weighting`):
+	- Video: 60% weight by default
+	- Quiz: 40% weight by default
 	- Lesson marked complete: 100%
 
 	Returns:
@@ -94,6 +276,8 @@ def get_lesson_progress(lesson, member):
 			'quiz_completed': bool
 		}
 	"""
+	lesson_doc = frappe.db.get_value("Course Lesson", lesson, ["course", "quiz_id"], as_dict=True)
+
 	# Check if lesson is marked as complete
 	is_complete = frappe.db.exists(
 		"LMS Course Progress",
@@ -104,70 +288,44 @@ def get_lesson_progress(lesson, member):
 		}
 	)
 
-	if is_complete:
-		return {
-			'progress_percentage': 100,
-			'is_completed': True,
-			'video_watched': True,
-			'quiz_completed': True
-		}
-
 	# Get video watch progress from LMS Student Lesson Log
-	video_progress = frappe.db.get_value(
+	video_completion = frappe.db.get_value(
 		"LMS Student Lesson Log",
 		{
 			"lesson": lesson,
 			"student": member
 		},
-		["completion_percentage", "is_completed"],
-		as_dict=True
-	) or {}
-
-	video_completion = flt(video_progress.get('completion_percentage', 0))
-	video_watched = video_completion >= 95  # Consider 95%+ as watched
-
-	# Get quiz completion
-	lesson_doc = frappe.get_doc("Course Lesson", lesson)
-	quiz_completed = False
-	quiz_score = 0
+		"completion_percentage"
+	)
 
+	# Latest quiz attempt
+	quiz_score = None
+	passing_percentage = DEFAULT_PASSING_PERCENTAGE
 	if lesson_doc.quiz_id:
-		quiz_result = frappe.db.get_value(
+		submissions = frappe.get_all(
 			"LMS Quiz Submission",
-			{
-				"quiz": lesson_doc.quiz_id,
-				"member": member
-			},
-			["score", "percentage"],
-			as_dict=True
+			filters={"quiz": lesson_doc.quiz_id, "member": member},
+			fields=["percentage"],
+			order_by="creation desc",
+			limit=1
 		)
-
-		if quiz_result:
-			quiz_score = flt(quiz_result.get('percentage', 0))
-			# Get passing percentage from quiz
-			passing_percentage = frappe.db.get_value(
-				"LMS Quiz",
-				lesson_doc.quiz_id,
-				"passing_percentage"
-			) or 70
-
-			quiz_completed = quiz_score >= passing_percentage
-
-	# Calculate weighted progress
-	# Video: 60%, Quiz: 40%
-	if lesson_doc.quiz_id:
-		# Lesson has both video and quiz
-		progress = (video_completion * 0.6) + (quiz_score * 0.4)
-	else:
-		# Lesson only has video
-		progress = video_completion
-
-	return {
-		'progress_percentage': flt(progress, 2),
-		'is_completed': video_watched and (quiz_completed if lesson_doc.quiz_id else True),
-		'video_watched': video_watched,
-		'quiz_completed': quiz_completed if lesson_doc.quiz_id else None
-	}
+		if submissions:
+			quiz_score = submissions[0].percentage or 0
+
+		passing_percentage = frappe.db.get_value(
+			"LMS Quiz",
+			lesson_doc.quiz_id,
+			"passing_percentage"
+		) or DEFAULT_PASSING_PERCENTAGE
+
+	return calculate_lesson_progress(
+		get_progress_weighting(lesson_doc.course),
+		bool(lesson_doc.quiz_id),
+		is_complete=is_complete,
+		video_completion=video_completion,
+		quiz_score=quiz_score,
+		passing_percentage=passing_percentage
+	)
 
 
 @frappe.whitelist()
@@ -179,58 +337,282 @@ def get_my_course_progress(course):
 
 
 @frappe.whitelist()
-def update_course_progress_realtime(course, member=None):
+def update_course_progress_realtime(course, member=None, lesson=None):
 	"""
-	Update LMS Enrollment progress with real-time calculation
+	Queue an update of LMS Enrollment progress and return the last known value
 	Called after video watch or quiz completion
+
+	Requests for the same course and member collapse into one background job
+	(stable job id), which recomputes only the lessons marked as changed.
+
+	Args:
+		course: Course name
+		member: Student email (defaults to current user)
+		lesson: The lesson that changed; without it the whole course is recomputed
 	"""
 	if not member:
 		member = frappe.session.user
+	elif member != frappe.session.user:
+		frappe.has_permission("LMS Enrollment", "write", throw=True)
+
+	progress = frappe.db.get_value("LMS Enrollment", {"course": course, "member": member}, "progress")
+	if progress is None:
+		return {"overall_progress": 0, "queued": False}
+
+	frappe.cache().sadd(get_member_progress_key(course, member, "dirty"), lesson or ALL_LESSONS)
+	frappe.enqueue(
+		"lms_reports.progress_tracker.apply_course_progress_update",
+		queue="short",
+		job_id=f"lms_reports:course_progress:{course}:{member}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		course=course,
+		member=member
+	)
 
-	progress_data = get_enhanced_course_progress(course, member)
+	return {"overall_progress": flt(progress), "queued": True}
 
-	# Update LMS Enrollment
-	enrollment = frappe.db.get_value(
-		"LMS Enrollment",
-		{
-			"course": course,
-			"member": member
-		},
-		"name"
-	)
 
-	if enrollment:
-		frappe.db.set_value(
-			"LMS Enrollment",
-			enrollment,
-			"progress",
-			progress_data['overall_progress']
-		)
+def get_member_progress_key(course, member, kind):
+	return f"lms_reports:member_progress:{kind}:{course}:{member}"
+
+
+def clear_member_progress_cache(course, members):
+	"""
+	Drop cached lesson progress of members of a course
+
+	Called by every writer that changes lesson logs or LMS Course Progress
+	outside `update_course_progress_realtime`, so the next incremental update
+	recomputes all lessons instead of writing older values back.
+	"""
+	if members:
+		frappe.cache().delete_value([get_member_progress_key(course, member, "lessons") for member in members])
+
+
+def apply_course_progress_update(course, member):
+	"""
+	Background job, see `update_course_progress_realtime`
+
+	Keeps running while new lessons are marked as changed, since requests
+	made while it runs don't queue another job.
+	"""
+	cache = frappe.cache()
+	dirty_key = get_member_progress_key(course, member, "dirty")
+
+	while True:
+		dirty = {frappe.safe_decode(value) for value in cache.smembers(dirty_key)}
+		if not dirty:
+			return
+		cache.srem(dirty_key, *dirty)
+
+		progress = get_member_progress_incremental(course, member, dirty)
+		enrollment = frappe.db.get_value("LMS Enrollment", {"course": course, "member": member}, "name")
+		if enrollment:
+			frappe.db.set_value("LMS Enrollment", enrollment, "progress", progress['overall_progress'])
+			queue_course_progress(member, course, progress['overall_progress'])
 		frappe.db.commit()
 
-	return progress_data
+		if enrollment:
+			update_leaderboard(course, {member: progress['overall_progress']})
+
+
+def get_member_progress_incremental(course, member, changed_lessons):
+	"""
+	Recompute course progress of a member from cached lesson progress
+
+	Lesson progress is cached per (course, member); only `changed_lessons`
+	are recalculated. Everything is recalculated when the outline or the
+	weighting changed, or when ALL_LESSONS is among the changed lessons.
+	"""
+	cache = frappe.cache()
+	cache_key = get_member_progress_key(course, member, "lessons")
+	weighting = get_progress_weighting(course)
+	lessons = get_course_lessons(course)
+
+	cached = cache.hgetall(cache_key) or {}
+	cached = {frappe.safe_decode(k): v for k, v in cached.items()}
+	lesson_names = {l.name for l in lessons}
+
+	full = (
+		ALL_LESSONS in changed_lessons
+		or cached.pop("__weighting", None) != dict(weighting)
+		or set(cached) != lesson_names
+	)
+	to_compute = lessons if full else [l for l in lessons if l.name in changed_lessons]
+
+	computed = get_members_lesson_progress(course, [member], weighting, to_compute)[member]
+	if full:
+		cache.delete_value(cache_key)
+		cached = {}
+
+	for lesson, progress in computed.items():
+		cache.hset(cache_key, lesson, progress)
+		cached[lesson] = progress
+	cache.hset(cache_key, "__weighting", dict(weighting))
+	cache.expire(cache.make_key(cache_key), MEMBER_PROGRESS_CACHE_TTL)
+
+	return summarize_lesson_progress(
+		[cached[name] for name in lesson_names if name in cached], len(lessons)
+	)
 
 
 @frappe.whitelist()
-def get_bulk_course_progress(courses):
+def get_bulk_course_progress(courses, since=None):
 	"""
 	Fetch progress for multiple courses at once.
 	courses: List of course names or a JSON string of course names.
+	since: Optional dict (or JSON) of {course: watermark} from a previous call.
+		When given, the result is wrapped in a delta envelope (see
+		`make_delta_response`) whose `data` only holds courses that changed,
+		with the new watermark of every course in `watermark`.
 	"""
 	import json
 	if isinstance(courses, str):
 		courses = json.loads(courses)
-	
+	if isinstance(since, str):
+		since = json.loads(since) if since else {}
+
 	results = {}
 	member = frappe.session.user
-	
+
 	if member == "Guest":
-		return results
+		return results if since is None else make_delta_response({}, data=results, unchanged=True)
 
+	watermarks = {}
 	for course in courses:
+		if since is not None:
+			watermarks[course] = get_watermark(
+				("LMS Student Lesson Log", {"course": course, "student": member}),
+				("LMS Course Progress", {"course": course, "member": member}),
+				("LMS Quiz Submission", {"course": course, "member": member})
+			)
+			if since.get(course) and since[course] == watermarks[course]:
+				continue
+
 		results[course] = get_enhanced_course_progress(course, member)
-		frappe.errprint(f"[DEBUG] Progress for {course}: {results[course]}")
-	
-	frappe.log_error(title="Progress Tracker Debug", message=f"User: {member}, Courses: {courses}, Results: {results}")
-	
+
+	if since is not None:
+		return make_delta_response(
+			watermarks, data=results, unchanged=not results, delta=bool(since)
+		)
+
 	return results
+
+
+def get_recompute_key(course, flag):
+	return f"lms_reports:progress_recompute:{flag}:{course}"
+
+
+def enqueue_course_progress_recompute(course):
+	"""
+	Queue a recompute of LMS Enrollment.progress for every member of a course
+
+	Requests while a recompute is queued or running collapse into one job;
+	the dirty flag makes the running job start another pass with the latest
+	weighting.
+	"""
+	cache = frappe.cache()
+	cache.set_value(get_recompute_key(course, "dirty"), 1)
+	cache.delete_value(get_recompute_key(course, "cancel"))
+
+	frappe.enqueue(
+		"lms_reports.progress_tracker.recompute_course_progress",
+		queue="long",
+		job_id=f"lms_reports:progress_recompute:{course}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		course=course
+	)
+
+
+def recompute_course_progress(course):
+	"""Background job, see `enqueue_course_progress_recompute`"""
+	cache = frappe.cache()
+	dirty_key = get_recompute_key(course, "dirty")
+
+	while cache.get_value(dirty_key):
+		cache.delete_value(dirty_key)
+		if not recompute_course_progress_pass(course):
+			return
+
+
+def recompute_course_progress_pass(course):
+	"""
+	Recompute enrollment progress of a course in keyset-paginated batches
+
+	Each batch is computed first and then written with one bulk update and
+	committed, so enrollment rows are only locked for the short write.
+
+	Returns:
+		False if the recompute was cancelled
+	"""
+	cache = frappe.cache()
+	cancel_key = get_recompute_key(course, "cancel")
+	weighting = get_progress_weighting(course)
+	total = frappe.db.count("LMS Enrollment", {"course": course})
+	title = _("Recomputing progress of {0}").format(course)
+
+	done = 0
+	after = None
+	while True:
+		if cache.get_value(cancel_key):
+			cache.delete_value(cancel_key)
+			frappe.publish_progress(
+				100,
+				title=title,
+				doctype="LMS Course Progress Weighting",
+				docname=course,
+				description=_("Cancelled after {0} of {1} enrollments").format(done, total),
+			)
+			return False
+
+		filters = {"course": course}
+		if after:
+			filters["name"] = [">", after]
+
+		chunk = frappe.get_all(
+			"LMS Enrollment",
+			filters=filters,
+			fields=["name", "member"],
+			order_by="name asc",
+			limit_page_length=RECOMPUTE_CHUNK_SIZE,
+		)
+		if not chunk:
+			break
+
+		progress = get_members_course_progress(course, list({row.member for row in chunk}), weighting)
+		frappe.db.bulk_update(
+			"LMS Enrollment",
+			{row.name: {"progress": progress[row.member]["overall_progress"]} for row in chunk},
+		)
+		frappe.db.commit()
+		clear_member_progress_cache(course, [row.member for row in chunk])
+		update_leaderboard(course, {row.member: progress[row.member]["overall_progress"] for row in chunk})
+
+		done += len(chunk)
+		after = chunk[-1].name
+		frappe.publish_progress(
+			done * 100 / (total or done),
+			title=title,
+			doctype="LMS Course Progress Weighting",
+			docname=course,
+			description=_("{0} of {1} enrollments").format(done, total),
+		)
+
+	return True
+
+
+@frappe.whitelist()
+def recompute_progress(course):
+	"""Queue a progress recompute for all members of a course"""
+	frappe.has_permission("LMS Course Progress Weighting", "write", throw=True)
+	enqueue_course_progress_recompute(course)
+
+
+@frappe.whitelist()
+def cancel_progress_recompute(course):
+	"""Stop a running progress recompute after its current batch"""
+	frappe.has_permission("LMS Course Progress Weighting", "write", throw=True)
+	cache = frappe.cache()
+	cache.delete_value(get_recompute_key(course, "dirty"))
+	cache.set_value(get_recompute_key(course, "cancel"), 1, expires_in_sec=3600)
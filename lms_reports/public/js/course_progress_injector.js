@@ -77,15 +77,31 @@
 		isProcessing = true;
 		console.log(`Fetching progress for courses: ${courseNames.join(', ')}`);
 
+		// Only courses that changed since the cached watermark are recomputed
+		const cache = getProgressCache();
+		const since = {};
+		courseNames.forEach(courseName => {
+			if (cache[courseName]) since[courseName] = cache[courseName].watermark;
+		});
+
 		frappe.call({
 			method: 'lms_reports.progress_tracker.get_bulk_course_progress',
-			args: { courses: courseNames },
+			args: { courses: courseNames, since: since },
 			callback: function (r) {
 				console.log("Progress received:", r.message);
 				if (r.message) {
+					const watermarks = r.message.watermark || {};
+					const changed = r.message.data || {};
+					courseNames.forEach(courseName => {
+						if (changed[courseName]) {
+							cache[courseName] = { watermark: watermarks[courseName], data: changed[courseName] };
+						}
+					});
+					setProgressCache(cache);
+
 					cardsToProcess.forEach(card => {
 						const courseName = card.dataset.courseName;
-						const progressData = r.message[courseName];
+						const progressData = cache[courseName] && cache[courseName].data;
 
 						if (progressData) {
 							const progress = Math.round(progressData.overall_progress || 0);
@@ -104,6 +120,25 @@
 		});
 	}
 
+	// Last progress response per course, with its watermark
+	const PROGRESS_CACHE_KEY = 'lms_reports_course_progress:' + frappe.session.user;
+
+	function getProgressCache() {
+		try {
+			return JSON.parse(sessionStorage.getItem(PROGRESS_CACHE_KEY) || '{}');
+		} catch (e) {
+			return {};
+		}
+	}
+
+	function setProgressCache(cache) {
+		try {
+			sessionStorage.setItem(PROGRESS_CACHE_KEY, JSON.stringify(cache));
+		} catch (e) {
+			// Storage full or disabled, progress is fetched in full next time
+		}
+	}
+
 	function renderProgress(card, progress) {
 		// Find existing content container or footer to insert before
 		const content = card.querySelector('.course-card-content, .card-body, .card-content') || card;
@@ -131,12 +166,24 @@
 		}
 	}
 
-	// Debounced listener
-	let timeout;
-	const observer = new MutationObserver(() => {
-		clearTimeout(timeout);
-		timeout = setTimeout(injectProgress, 500);
-	});
+	// Update rendered progress bars from a pushed course progress change
+	function applyProgressPush(data) {
+		if (!data || data.progress === undefined) return;
+
+		const progress = Math.round(data.progress || 0);
+		document.querySelectorAll('[data-course-name]').forEach((card) => {
+			if (card.dataset.courseName !== data.course) return;
+
+			const fill = card.querySelector('.lms-card-progress-bar-fill');
+			const text = card.querySelector('.lms-progress-text');
+			if (fill) fill.style.width = `${progress}%`;
+			if (text) text.textContent = `${progress}% completed (LR)`;
+		});
+	}
+
+	if (frappe.realtime) {
+		frappe.realtime.on('lms_lesson_progress', applyProgressPush);
+	}
 
 	// Start
 	console.log("Injector waiting for load...");
@@ -146,12 +193,7 @@
 		window.addEventListener('load', () => setTimeout(injectProgress, 1500));
 	}
 
-	observer.observe(document.body, { childList: true, subtree: true });
-
-	// Handle hash changes for SPA (LMS uses Vue)
-	window.addEventListener('hashchange', () => setTimeout(injectProgress, 500));
-
-	// Also run on page transitions if Frappe's router is used
-	$(document).on('page-change', () => setTimeout(injectProgress, 500));
+	// Re-scan on DOM changes and SPA navigation via the shared, throttled observer
+	window.lms_reports.observe(() => injectProgress());
 
 })();
@@ -8,6 +8,23 @@
 
 	console.log("=== Lesson Locker Active ===");
 
+	// Flag bits, see lms_reports.lesson_locker.get_course_lesson_lock_bits
+	const LESSON_UNLOCKED = 1;
+	const LESSON_COMPLETED = 2;
+	const LESSON_VIDEO_DONE = 4;
+	const LESSON_QUIZ_DONE = 8;
+	const OUTLINE_KEY_PREFIX = 'lms_reports_outline:';
+
+	// Lock status per course, from the last bulk request
+	const lockStatus = {};
+	// Lesson names per course in outline order
+	const outlineOrder = {};
+	// Lock reasons of clicked lessons, fetched on demand
+	const lockReasons = {};
+	// Signature of the outline links last rendered, to skip identical re-renders
+	let lastOutlineSignature = null;
+	let pendingRequest = null;
+
 	// Check lesson access before navigation
 	function checkLessonAccess(lessonName, courseName) {
 		return new Promise((resolve, reject) => {
@@ -32,91 +49,229 @@
 		});
 	}
 
-	// Block lesson link if locked
-	async function lockLessonsInOutline() {
-		console.log("Scanning for lessons to lock...");
+	// Outline (lesson names in order) cached by version, it rarely changes
+	function getCachedOutline(courseName) {
+		try {
+			return JSON.parse(localStorage.getItem(OUTLINE_KEY_PREFIX + courseName) || 'null');
+		} catch (e) {
+			return null;
+		}
+	}
 
-		// Find all lesson links in course outline
-		const lessonLinks = document.querySelectorAll('a[href*="/learn/"]');
-
-		lessonLinks.forEach(async (link) => {
-			const href = link.getAttribute('href');
-			const match = href.match(/\/learn\/([^\/]+)\/([^\/]+)/);
-
-			if (match) {
-				const courseName = match[1];
-				const lessonName = match[2];
-
-				try {
-					const access = await checkLessonAccess(lessonName, courseName);
-
-					if (!access.can_access) {
-						// Lock this lesson
-						link.classList.add('lesson-locked');
-						link.style.opacity = '0.5';
-						link.style.cursor = 'not-allowed';
-						link.style.pointerEvents = 'none';
-
-						// Add lock icon
-						if (!link.querySelector('.lock-icon')) {
-							const lockIcon = document.createElement('span');
-							lockIcon.className = 'lock-icon';
-							lockIcon.innerHTML = ' 🔒';
-							lockIcon.title = access.reason;
-							link.appendChild(lockIcon);
-						}
-
-						// Prevent click
-						link.addEventListener('click', function(e) {
-							e.preventDefault();
-							e.stopPropagation();
-
-							frappe.msgprint({
-								title: __('Lesson Locked'),
-								message: access.reason + '<br><br>' +
-									(access.previous_lesson_title ?
-										`Please complete: <strong>${access.previous_lesson_title}</strong>` : ''),
-								indicator: 'orange'
-							});
-
-							return false;
-						}, true);
-					} else {
-						// Lesson is accessible - show checkmark if completed
-						const status = await getLessonStatus(lessonName);
-						if (status && status.is_completed) {
-							if (!link.querySelector('.complete-icon')) {
-								const checkIcon = document.createElement('span');
-								checkIcon.className = 'complete-icon';
-								checkIcon.innerHTML = ' ✅';
-								checkIcon.title = 'Completed';
-								link.appendChild(checkIcon);
-							}
-						}
-					}
-				} catch (err) {
-					console.error(`Error locking lesson ${lessonName}:`, err);
-				}
-			}
-		});
+	function setCachedOutline(courseName, outline) {
+		try {
+			localStorage.setItem(OUTLINE_KEY_PREFIX + courseName, JSON.stringify(outline));
+		} catch (e) {
+			// Storage full or disabled, the outline is sent again next time
+		}
+	}
+
+	function unpackFlags(encoded, count) {
+		const bytes = atob(encoded || '');
+		const flags = [];
+		for (let i = 0; i < count; i++) {
+			const byte = bytes.charCodeAt(i >> 1) || 0;
+			flags.push((i % 2 ? byte >> 4 : byte) & 0x0F);
+		}
+		return flags;
 	}
 
-	// Get lesson completion status
-	function getLessonStatus(lessonName) {
-		return new Promise((resolve) => {
+	// Get lock status of every lesson in a course as packed flags
+	function getCourseLockStatus(courseName) {
+		const cached = getCachedOutline(courseName);
+
+		return new Promise((resolve, reject) => {
 			frappe.call({
-				method: 'lms_reports.lesson_locker.get_lesson_completion_status',
+				method: 'lms_reports.lesson_locker.get_course_lesson_lock_bits',
 				args: {
-					lesson: lessonName,
-					member: frappe.session.user
+					course: courseName,
+					version: cached ? cached.version : null
 				},
 				callback: function(r) {
-					resolve(r.message);
+					const data = r.message || {};
+					let outline = cached;
+					if (data.lessons) {
+						outline = { version: data.version, lessons: data.lessons };
+						setCachedOutline(courseName, outline);
+					}
+					if (!outline) {
+						resolve({});
+						return;
+					}
+
+					outlineOrder[courseName] = outline.lessons;
+					const flags = unpackFlags(data.flags, outline.lessons.length);
+					const status = {};
+					outline.lessons.forEach((lessonName, i) => {
+						status[lessonName] = {
+							index: i,
+							can_access: !!(flags[i] & LESSON_UNLOCKED),
+							is_completed: !!(flags[i] & LESSON_COMPLETED),
+							video_completed: !!(flags[i] & LESSON_VIDEO_DONE),
+							quiz_completed: !!(flags[i] & LESSON_QUIZ_DONE)
+						};
+					});
+					resolve(status);
+				},
+				error: function(err) {
+					console.error("Error fetching lesson lock status:", err);
+					reject(err);
 				}
 			});
 		});
 	}
 
+	function parseLessonLink(link) {
+		const href = link.getAttribute('href') || '';
+		const match = href.match(/\/learn\/([^\/]+)\/([^\/]+)/);
+		if (!match) return null;
+		return { courseName: match[1], lessonName: match[2] };
+	}
+
+	function showLockedMessage(access) {
+		frappe.msgprint({
+			title: __('Lesson Locked'),
+			message: access.reason + '<br><br>' +
+				(access.previous_lesson_title ?
+					`Please complete: <strong>${access.previous_lesson_title}</strong>` : ''),
+			indicator: 'orange'
+		});
+	}
+
+	// Bound once per link; reads the current status so re-renders don't stack handlers
+	function onLockedClick(e) {
+		const info = parseLessonLink(this);
+		const access = info && (lockStatus[info.courseName] || {})[info.lessonName];
+		if (!access || access.can_access) return;
+
+		e.preventDefault();
+		e.stopPropagation();
+
+		// The reason text is only fetched for the lesson actually clicked
+		const key = info.courseName + '/' + info.lessonName;
+		if (lockReasons[key]) {
+			showLockedMessage(lockReasons[key]);
+		} else {
+			checkLessonAccess(info.lessonName, info.courseName).then((result) => {
+				lockReasons[key] = result;
+				showLockedMessage(result);
+			}).catch(() => {});
+		}
+		return false;
+	}
+
+	function applyLinkStatus(link, access) {
+		const state = access.can_access ? (access.is_completed ? 'completed' : 'open') : 'locked';
+		if (link.dataset.lmsLockState === state) return;
+		link.dataset.lmsLockState = state;
+
+		if (!link.dataset.lmsLockBound) {
+			link.addEventListener('click', onLockedClick, true);
+			link.dataset.lmsLockBound = 'true';
+		}
+
+		const lockIcon = link.querySelector('.lock-icon');
+		const checkIcon = link.querySelector('.complete-icon');
+
+		if (state === 'locked') {
+			// Lock this lesson
+			link.classList.add('lesson-locked');
+			link.style.opacity = '0.5';
+			link.style.cursor = 'not-allowed';
+
+			if (checkIcon) checkIcon.remove();
+			if (!lockIcon) {
+				const icon = document.createElement('span');
+				icon.className = 'lock-icon';
+				icon.innerHTML = ' 🔒';
+				icon.title = __('Locked');
+				link.appendChild(icon);
+			}
+			return;
+		}
+
+		// Lesson is accessible - show checkmark if completed
+		link.classList.remove('lesson-locked');
+		link.style.opacity = '';
+		link.style.cursor = '';
+		if (lockIcon) lockIcon.remove();
+
+		if (state === 'completed' && !checkIcon) {
+			const icon = document.createElement('span');
+			icon.className = 'complete-icon';
+			icon.innerHTML = ' ✅';
+			icon.title = 'Completed';
+			link.appendChild(icon);
+		}
+	}
+
+	// Block lesson link if locked
+	async function lockLessonsInOutline() {
+		// Find all lesson links in course outline
+		const lessonLinks = Array.from(document.querySelectorAll('a[href*="/learn/"]'))
+			.map((link) => ({ link, info: parseLessonLink(link) }))
+			.filter((item) => item.info);
+
+		if (!lessonLinks.length) return;
+
+		const signature = lessonLinks.map((item) => item.link.getAttribute('href')).join('|');
+		if (signature === lastOutlineSignature || pendingRequest) return;
+
+		console.log("Scanning for lessons to lock...");
+
+		const courses = [...new Set(lessonLinks.map((item) => item.info.courseName))];
+		pendingRequest = Promise.all(courses.map(async (courseName) => {
+			lockStatus[courseName] = await getCourseLockStatus(courseName);
+		}));
+
+		try {
+			await pendingRequest;
+			lessonLinks.forEach(({ link, info }) => {
+				const access = (lockStatus[info.courseName] || {})[info.lessonName];
+				if (access) applyLinkStatus(link, access);
+			});
+			lastOutlineSignature = signature;
+		} catch (err) {
+			console.error("Error locking lessons:", err);
+		} finally {
+			pendingRequest = null;
+		}
+	}
+
+	// Apply a pushed progress delta without re-fetching the outline status
+	function applyProgressPush(data) {
+		const status = data && lockStatus[data.course];
+		if (!status) return;
+
+		const order = outlineOrder[data.course] || [];
+		(data.lessons || []).forEach((delta) => {
+			const lesson = status[delta.lesson];
+			if (!lesson || delta.is_completed === undefined) return;
+
+			lesson.is_completed = !!delta.is_completed;
+			lesson.video_completed = !!delta.video_completed;
+			lesson.quiz_completed = !!delta.quiz_completed;
+
+			// Completing a lesson unlocks the next one in the outline
+			const next = status[order[lesson.index + 1]];
+			if (next && lesson.is_completed) {
+				next.can_access = true;
+			}
+		});
+
+		// Reasons may be outdated now
+		Object.keys(lockReasons).forEach((key) => {
+			if (key.startsWith(data.course + '/')) delete lockReasons[key];
+		});
+
+		document.querySelectorAll('a[href*="/learn/"]').forEach((link) => {
+			const info = parseLessonLink(link);
+			if (info && info.courseName === data.course && status[info.lessonName]) {
+				applyLinkStatus(link, status[info.lessonName]);
+			}
+		});
+	}
+
 	// Block direct navigation to locked lessons
 	function interceptLessonNavigation() {
 		// Get current URL
@@ -152,25 +307,24 @@
 	// Run on page load
 	function init() {
 		// Lock lessons in sidebar/outline
-		setTimeout(lockLessonsInOutline, 1000);
+		lockLessonsInOutline();
 
 		// Check current page
 		interceptLessonNavigation();
 
-		// Re-run on navigation (for SPA)
-		window.addEventListener('hashchange', () => {
-			setTimeout(lockLessonsInOutline, 500);
-			interceptLessonNavigation();
-		});
-
-		// Watch for DOM changes
-		const observer = new MutationObserver(() => {
-			setTimeout(lockLessonsInOutline, 500);
-		});
+		// Progress pushed by the server after tracking writes
+		if (frappe.realtime) {
+			frappe.realtime.on('lms_lesson_progress', applyProgressPush);
+		}
 
-		observer.observe(document.body, {
-			childList: true,
-			subtree: true
+		// Re-run on outline changes and SPA navigation via the shared observer
+		window.lms_reports.observe((routeChanged) => {
+			if (routeChanged) {
+				// Completion may have changed while on the previous lesson
+				lastOutlineSignature = null;
+				interceptLessonNavigation();
+			}
+			lockLessonsInOutline();
 		});
 	}
 
@@ -181,7 +335,4 @@
 		init();
 	}
 
-	// Also handle Frappe's page-change event
-	$(document).on('page-change', init);
-
 })();
@@ -68,13 +68,178 @@
         });
     }
 
-    // Track video progress
-    function trackProgress(videoEl, lessonInfo) {
+    // Buffered watch event queue.
+    // Events are kept in memory with a localStorage backup and sent in batches
+    // on a timer, when the page is hidden and on pagehide (via sendBeacon).
+    // Batches that could not be sent are retried on the next page load.
+    const BATCH_METHOD = 'lms_reports.lms_reports.api.track_lesson_watch_batch';
+    const QUEUE_KEY_PREFIX = 'lms_reports_watch_queue:';
+    const FLUSH_INTERVAL = 15000;
+    const MAX_BATCH_SIZE = 50;
+    const MAX_QUEUE_SIZE = 500;
+    // Queues of other tabs untouched for this long are treated as orphaned
+    const ORPHAN_AGE = 60000;
+    // A live page refreshes the claim on its tab id every FLUSH_INTERVAL
+    const TAB_CLAIM_PREFIX = 'lms_reports_tab_claim:';
+
+    const eventQueue = {
+        tabId: null,
+        key: null,
+        events: [],
+        inFlight: 0,
+
+        init() {
+            // A duplicated tab inherits sessionStorage, and with it the tab id
+            // of a page that is still open: take a new id then
+            let tabId = sessionStorage.getItem('lms_reports_tab_id');
+            if (!tabId || this.isClaimed(tabId)) {
+                tabId = Date.now().toString(36) + Math.random().toString(36).slice(2, 8);
+                sessionStorage.setItem('lms_reports_tab_id', tabId);
+            }
+            this.tabId = tabId;
+            this.claim();
+            this.key = QUEUE_KEY_PREFIX + tabId;
+            this.events = this.read(this.key);
+            this.recoverOrphans();
+        },
+
+        isClaimed(tabId) {
+            const updated = Number(localStorage.getItem(TAB_CLAIM_PREFIX + tabId) || 0);
+            return Date.now() - updated < ORPHAN_AGE;
+        },
+
+        claim() {
+            try {
+                localStorage.setItem(TAB_CLAIM_PREFIX + this.tabId, String(Date.now()));
+            } catch (e) {
+                // Storage full or disabled
+            }
+        },
+
+        // Called on pagehide, so a reload of this tab keeps its id
+        release() {
+            localStorage.removeItem(TAB_CLAIM_PREFIX + this.tabId);
+        },
+
+        read(key) {
+            try {
+                const stored = JSON.parse(localStorage.getItem(key) || 'null');
+                return (stored && stored.events) || [];
+            } catch (e) {
+                return [];
+            }
+        },
+
+        // Adopt events left behind by tabs that were closed before flushing
+        recoverOrphans() {
+            const now = Date.now();
+            for (let i = localStorage.length - 1; i >= 0; i--) {
+                const key = localStorage.key(i);
+                if (key && key.startsWith(TAB_CLAIM_PREFIX) && key !== TAB_CLAIM_PREFIX + this.tabId) {
+                    // Claims of tabs closed without pagehide
+                    if (now - Number(localStorage.getItem(key) || 0) >= ORPHAN_AGE) localStorage.removeItem(key);
+                    continue;
+                }
+                if (!key || !key.startsWith(QUEUE_KEY_PREFIX) || key === this.key) continue;
+
+                let stored = null;
+                try {
+                    stored = JSON.parse(localStorage.getItem(key) || 'null');
+                } catch (e) {
+                    // corrupt entry, drop it below
+                }
+                if (stored && now - (stored.updated || 0) < ORPHAN_AGE) continue;
+
+                this.events = ((stored && stored.events) || []).concat(this.events);
+                localStorage.removeItem(key);
+            }
+            this.trim();
+            this.persist();
+        },
+
+        trim() {
+            if (this.events.length > MAX_QUEUE_SIZE) {
+                this.events.splice(0, this.events.length - MAX_QUEUE_SIZE);
+            }
+        },
+
+        persist() {
+            try {
+                if (this.events.length) {
+                    localStorage.setItem(this.key, JSON.stringify({ updated: Date.now(), events: this.events }));
+                } else {
+                    localStorage.removeItem(this.key);
+                }
+            } catch (e) {
+                // Storage full or disabled, keep the in-memory copy only
+            }
+        },
+
+        push(event) {
+            this.events.push(event);
+            this.trim();
+            this.persist();
+        },
+
+        flush() {
+            if (this.inFlight || !this.events.length) return;
+            if (frappe.session.user === "Guest") return;
+
+            const batch = this.events.slice(0, MAX_BATCH_SIZE);
+            this.inFlight = batch.length;
+
+            frappe.call({
+                method: BATCH_METHOD,
+                args: { events: JSON.stringify(batch) },
+                callback: (r) => {
+                    this.events.splice(0, this.inFlight);
+                    this.inFlight = 0;
+                    this.persist();
+                    if (r.message && r.message.success) {
+                        console.log(`LMS Tracker: Flushed ${batch.length} watch events`);
+                    }
+                    // Keep draining if more events piled up meanwhile
+                    if (this.events.length) this.flush();
+                },
+                error: (err) => {
+                    this.inFlight = 0;
+                    console.error("LMS Tracker: Failed to flush watch events, will retry", err);
+                }
+            });
+        },
+
+        // Last-chance flush while the page is going away. One batch per beacon
+        // keeps each body far below the browser's beacon size limit; once a
+        // beacon is refused the rest stays in the localStorage queue.
+        beacon() {
+            if (!navigator.sendBeacon) return;
+            if (frappe.session.user === "Guest") return;
+
+            while (this.events.length > this.inFlight) {
+                const batch = this.events.slice(this.inFlight, this.inFlight + MAX_BATCH_SIZE);
+                const body = new URLSearchParams();
+                body.append('events', JSON.stringify(batch));
+                body.append('csrf_token', frappe.csrf_token);
+
+                if (!navigator.sendBeacon('/api/method/' + BATCH_METHOD, body)) break;
+                this.events.splice(this.inFlight, batch.length);
+            }
+            this.persist();
+        }
+    };
+
+    // Start of the segment not reported yet, and last position before a seek, per media element
+    const segmentStarts = new WeakMap();
+    const lastPositions = new WeakMap();
+
+    // Track video progress, reporting the segment watched since the last report
+    function trackProgress(videoEl, lessonInfo, endTime) {
         if (!lessonInfo) return;
         if (frappe.session.user === "Guest") return;
 
         const speed = videoEl.playbackRate + 'x';
-        const currentTime = videoEl.currentTime;
+        const currentTime = endTime !== undefined ? endTime : videoEl.currentTime;
+        const startTime = segmentStarts.has(videoEl) ? segmentStarts.get(videoEl) : currentTime;
         const duration = videoEl.duration;
 
         if (!duration || isNaN(duration)) {
@@ -82,29 +247,21 @@
             return;
         }
 
-        console.log(`LMS Tracker: Tracking - Speed: ${speed}, Time: ${currentTime}/${duration}`);
-
-        frappe.call({
-            method: 'lms_reports.lms_reports.api.track_lesson_watch',
-            args: {
-                lesson_number: lessonInfo.lessonNumber,
-                lesson: lessonInfo.lesson || null,
-                course: lessonInfo.course,
-                video_speed: speed,
-                watched_duration: currentTime,
-                video_total_duration: duration,
-                start_time: 0,
-                end_time: currentTime
-            },
-            callback: function (r) {
-                if (r.message && r.message.success) {
-                    console.log(`LMS Tracker: Progress saved - ${r.message.completion_percentage}%`);
-                }
-            },
-            error: function (err) {
-                console.error("LMS Tracker: Failed to save progress", err);
-            }
+        console.log(`LMS Tracker: Queued - Speed: ${speed}, Time: ${currentTime}/${duration}`);
+
+        eventQueue.push({
+            lesson_number: lessonInfo.lessonNumber || null,
+            lesson: lessonInfo.lesson || null,
+            course: lessonInfo.course,
+            video_speed: speed,
+            watched_duration: currentTime,
+            video_total_duration: duration,
+            start_time: Math.min(startTime, currentTime),
+            end_time: currentTime
         });
+
+        // The next segment continues from the current position
+        segmentStarts.set(videoEl, videoEl.currentTime);
     }
 
     // Create debounced version (2 second delay)
@@ -129,21 +286,40 @@
                     trackProgressDebounced(player, lessonInfo);
                 });
 
+                // A segment starts whenever playback starts or resumes
+                player.addEventListener('play', () => {
+                    segmentStarts.set(player, player.currentTime);
+                });
+
+                // Close the segment at the position before the seek, so skipped parts don't count
+                player.addEventListener('seeking', () => {
+                    const before = lastPositions.get(player);
+                    if (!player.paused && before !== undefined && segmentStarts.has(player)) {
+                        trackProgress(player, lessonInfo, before);
+                    }
+                    segmentStarts.set(player, player.currentTime);
+                });
+
                 // Track on pause
                 player.addEventListener('pause', () => {
                     console.log("LMS Tracker: Video paused");
                     trackProgress(player, lessonInfo); // Immediate on pause
                 });
 
-                // Track on video end
+                // Track on video end, flushing right away so the next lesson unlocks
                 player.addEventListener('ended', () => {
                     console.log("LMS Tracker: Video ended");
                     trackProgress(player, lessonInfo);
+                    eventQueue.flush();
                 });
 
                 // Track periodically while playing (every 30 seconds)
                 let lastTrackTime = 0;
                 player.addEventListener('timeupdate', () => {
+                    if (!player.seeking) {
+                        lastPositions.set(player, player.currentTime);
+                    }
+
                     const now = Date.now();
                     if (now - lastTrackTime > 30000) {
                         trackProgressDebounced(player, lessonInfo);
@@ -251,36 +427,41 @@
             return;
         }
 
+        // Restore unsent events from previous visits and flush them
+        eventQueue.init();
+        eventQueue.flush();
+        setInterval(() => {
+            eventQueue.claim();
+            eventQueue.flush();
+        }, FLUSH_INTERVAL);
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                eventQueue.beacon();
+            }
+        });
+        window.addEventListener('pagehide', () => {
+            eventQueue.beacon();
+            eventQueue.release();
+        });
+        // Back/forward cache restores the page without running init again
+        window.addEventListener('pageshow', (e) => {
+            if (e.persisted) eventQueue.claim();
+        });
+
         // Check access first
         checkLessonAccess();
 
         // Attach video trackers
         setTimeout(attachVideoTrackers, 1000);
 
-        // Watch for dynamic content changes (SPA)
-        const observer = new MutationObserver((mutations) => {
-            attachVideoTrackers();
-        });
-
-        observer.observe(document.body, { childList: true, subtree: true });
-
-        // Handle URL changes
-        let lastPath = window.location.pathname;
-        const urlObserver = new MutationObserver(() => {
-            if (window.location.pathname !== lastPath) {
-                lastPath = window.location.pathname;
-                console.log("LMS Tracker: URL changed to", lastPath);
+        // Watch for dynamic content and URL changes (SPA) via the shared observer
+        window.lms_reports.observe((routeChanged) => {
+            if (routeChanged) {
+                console.log("LMS Tracker: URL changed to", window.location.pathname);
                 checkLessonAccess();
-                setTimeout(attachVideoTrackers, 500);
             }
-        });
-        urlObserver.observe(document, { childList: true, subtree: true });
-
-        // Handle back/forward navigation
-        window.addEventListener('popstate', () => {
-            console.log("LMS Tracker: Popstate event");
-            checkLessonAccess();
-            setTimeout(attachVideoTrackers, 500);
+            attachVideoTrackers();
         });
     }
 
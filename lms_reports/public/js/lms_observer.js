@@ -0,0 +1,98 @@
+/**
+ * LMS Reports - Shared DOM Observer
+ * One throttled MutationObserver for all LMS Reports scripts.
+ * Mutations caused only by our own injected elements (lock icons, progress
+ * bars, overlays) are ignored, so scripts don't re-trigger themselves.
+ */
+
+(function () {
+	'use strict';
+
+	window.lms_reports = window.lms_reports || {};
+	if (window.lms_reports.observe) return;
+
+	const THROTTLE_MS = 500;
+	const OWN_SELECTOR = [
+		'.lock-icon',
+		'.complete-icon',
+		'.lms-custom-progress-container',
+		'.lms-access-denied-overlay'
+	].join(', ');
+
+	const subscribers = [];
+	let timer = null;
+	let routeChanged = false;
+	let lastPath = window.location.pathname;
+	let observer = null;
+
+	function isOwnNode(node) {
+		return node.nodeType === Node.ELEMENT_NODE && node.matches(OWN_SELECTOR);
+	}
+
+	function isOwnMutation(mutation) {
+		const target = mutation.target;
+		if (target.nodeType === Node.ELEMENT_NODE && target.closest(OWN_SELECTOR)) {
+			return true;
+		}
+
+		const nodes = [...mutation.addedNodes, ...mutation.removedNodes];
+		return nodes.length > 0 && nodes.every(isOwnNode);
+	}
+
+	function run() {
+		timer = null;
+
+		if (window.location.pathname !== lastPath) {
+			lastPath = window.location.pathname;
+			routeChanged = true;
+		}
+
+		const changed = routeChanged;
+		routeChanged = false;
+
+		subscribers.forEach((callback) => {
+			try {
+				callback(changed);
+			} catch (err) {
+				console.error("LMS Reports: observer callback failed", err);
+			}
+		});
+	}
+
+	function schedule() {
+		if (timer) return;
+		timer = setTimeout(run, THROTTLE_MS);
+	}
+
+	function start() {
+		if (observer) return;
+
+		observer = new MutationObserver((mutations) => {
+			if (mutations.every(isOwnMutation)) return;
+			schedule();
+		});
+		observer.observe(document.body, { childList: true, subtree: true });
+
+		const onNavigate = () => {
+			routeChanged = true;
+			schedule();
+		};
+		window.addEventListener('popstate', onNavigate);
+		window.addEventListener('hashchange', onNavigate);
+	}
+
+	/**
+	 * Subscribe to throttled DOM changes.
+	 * The callback receives `true` when the route changed since the last call.
+	 */
+	window.lms_reports.observe = function (callback) {
+		subscribers.push(callback);
+
+		if (document.body) {
+			start();
+		} else {
+			document.addEventListener('DOMContentLoaded', start);
+		}
+	};
+
+})();
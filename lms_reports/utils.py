@@ -0,0 +1,45 @@
+"""
+Website helpers for LMS Reports
+Loads the frontend scripts only on course and lesson routes
+"""
+
+import re
+
+import frappe
+
+# Course list, course outline and lesson pages, both in the portal (/courses)
+# and in the LMS single page app (/lms), which navigates between them client side
+COURSE_ROUTE_PATTERN = re.compile(r"^(lms(/|$)|courses?(/|$))")
+
+COURSE_ROUTE_JS = [
+	"/assets/lms_reports/js/lms_observer.js",
+	"/assets/lms_reports/js/lms_bundle.js",
+	"/assets/lms_reports/js/lesson_locker.js",
+]
+
+COURSE_ROUTE_CSS = [
+	"/assets/lms_reports/css/course_progress.css",
+]
+
+
+def is_course_route(path):
+	"""Check if a website path is a course list, course or lesson page"""
+	return bool(COURSE_ROUTE_PATTERN.match((path or "").strip("/")))
+
+
+def update_website_context(context):
+	"""
+	Add the LMS Reports scripts to course and lesson pages only
+
+	Hooked via `update_website_context`, so other website pages no longer
+	load the trackers and their DOM observers.
+	"""
+	path = context.get("path")
+	if path is None and getattr(frappe.local, "request", None):
+		path = frappe.local.request.path
+
+	if not is_course_route(path):
+		return
+
+	context.web_include_js = [*(context.get("web_include_js") or []), *COURSE_ROUTE_JS]
+	context.web_include_css = [*(context.get("web_include_css") or []), *COURSE_ROUTE_CSS]